@@ -1,7 +1,8 @@
 """
 Asset management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_database
@@ -11,12 +12,16 @@ from schemas import (
     ResponseWrapper, PaginatedResponse
 )
 from utils.auth import get_current_user
+from utils.sync import record_asset_tombstones
+from utils.etag import list_fingerprint, make_etag, is_not_modified, not_modified_response
+from utils.cache import response_cache, cache_key, render_response, entry_response, CacheEntry
+from utils.query_tracker import query_budget
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/", response_model=ResponseWrapper)
+@router.post("/", response_model=ResponseWrapper[AssetSchema])
 async def create_asset(
     asset_data: AssetCreate,
     current_user: User = Depends(get_current_user),
@@ -33,12 +38,13 @@ async def create_asset(
         db.add(db_asset)
         db.commit()
         db.refresh(db_asset)
+        await response_cache.invalidate(current_user.id, "assets")
         
-        return ResponseWrapper(
-            success=True,
-            message="Asset created successfully",
-            data=AssetSchema.from_orm(db_asset)
-        )
+        return {
+            "success": True,
+            "message": "Asset created successfully",
+            "data": db_asset
+        }
         
     except Exception as e:
         logger.error(f"Asset creation error: {str(e)}")
@@ -47,35 +53,63 @@ async def create_asset(
             detail="Asset creation failed"
         )
 
-@router.get("/", response_model=ResponseWrapper)
+@router.get("/", response_model=ResponseWrapper[PaginatedResponse[AssetSchema]])
+@query_budget(5)
 async def get_assets(
+    request: Request,
     asset_type: Optional[str] = None,
+    comune: Optional[str] = None,
+    categoria_catastale: Optional[str] = None,
+    targa: Optional[str] = None,
     page: int = 1,
     per_page: int = 10,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database)
 ):
-    """Get user's assets with optional filtering and pagination"""
+    """Get user's assets with optional filtering and pagination.
+
+    comune, categoria_catastale and targa match the details keys case-insensitively
+    through the expression indexes on assets.
+    """
     try:
+        filters = (asset_type, comune, categoria_catastale, targa)
+        slot = await response_cache.lookup(
+            current_user.id, "assets", cache_key("get_assets", *filters, page, per_page)
+        )
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         query = db.query(Asset).filter(Asset.user_id == current_user.id)
         
         if asset_type:
             query = query.filter(Asset.type == asset_type)
-        
-        total = query.count()
+        if comune:
+            query = query.filter(func.lower(Asset.details_json["comune"].as_string()) == comune.lower())
+        if categoria_catastale:
+            query = query.filter(func.upper(Asset.details_json["categoria_catastale"].as_string()) == categoria_catastale.upper())
+        if targa:
+            query = query.filter(func.upper(Asset.details_json["targa"].as_string()) == targa.upper())
+        
+        total, last_updated = list_fingerprint(query, Asset)
+        etag = make_etag("assets", current_user.id, *filters, page, per_page, total, last_updated)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         assets = query.offset((page - 1) * per_page).limit(per_page).all()
         
-        return ResponseWrapper(
-            success=True,
-            message="Assets retrieved successfully",
-            data=PaginatedResponse(
-                items=[AssetSchema.from_orm(asset) for asset in assets],
-                total=total,
-                page=page,
-                per_page=per_page,
-                pages=(total + per_page - 1) // per_page
-            )
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[PaginatedResponse[AssetSchema]], {
+            "success": True,
+            "message": "Assets retrieved successfully",
+            "data": {
+                "items": assets,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page
+            }
+        }), etag)
+        await slot.store(entry)
+        return entry_response(request, entry)
         
     except Exception as e:
         logger.error(f"Assets retrieval error: {str(e)}")
@@ -84,14 +118,20 @@ async def get_assets(
             detail="Failed to retrieve assets"
         )
 
-@router.get("/{asset_id}", response_model=ResponseWrapper)
+@router.get("/{asset_id}", response_model=ResponseWrapper[AssetSchema])
+@query_budget(3)
 async def get_asset(
     asset_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database)
 ):
     """Get specific asset by ID"""
     try:
+        slot = await response_cache.lookup(current_user.id, "assets", cache_key("get_asset", asset_id))
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         asset = db.query(Asset).filter(
             Asset.id == asset_id,
             Asset.user_id == current_user.id
@@ -103,11 +143,13 @@ async def get_asset(
                 detail="Asset not found"
             )
         
-        return ResponseWrapper(
-            success=True,
-            message="Asset retrieved successfully",
-            data=AssetSchema.from_orm(asset)
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[AssetSchema], {
+            "success": True,
+            "message": "Asset retrieved successfully",
+            "data": asset
+        }), make_etag("asset", asset.id, asset.updated_at or asset.created_at))
+        await slot.store(entry)
+        return entry_response(request, entry)
         
     except HTTPException:
         raise
@@ -118,7 +160,7 @@ async def get_asset(
             detail="Failed to retrieve asset"
         )
 
-@router.put("/{asset_id}", response_model=ResponseWrapper)
+@router.put("/{asset_id}", response_model=ResponseWrapper[AssetSchema])
 async def update_asset(
     asset_id: int,
     asset_update: AssetUpdate,
@@ -145,12 +187,13 @@ async def update_asset(
         
         db.commit()
         db.refresh(asset)
+        await response_cache.invalidate(current_user.id, "assets")
         
-        return ResponseWrapper(
-            success=True,
-            message="Asset updated successfully",
-            data=AssetSchema.from_orm(asset)
-        )
+        return {
+            "success": True,
+            "message": "Asset updated successfully",
+            "data": asset
+        }
         
     except HTTPException:
         raise
@@ -161,7 +204,7 @@ async def update_asset(
             detail="Asset update failed"
         )
 
-@router.delete("/{asset_id}", response_model=ResponseWrapper)
+@router.delete("/{asset_id}", response_model=ResponseWrapper[None])
 async def delete_asset(
     asset_id: int,
     current_user: User = Depends(get_current_user),
@@ -180,13 +223,16 @@ async def delete_asset(
                 detail="Asset not found"
             )
         
+        record_asset_tombstones(db, asset)
         db.delete(asset)
         db.commit()
+        # Children go with the asset, expenses lose their asset_id
+        await response_cache.invalidate(current_user.id, "assets", "expenses", "reminders", "automations")
         
-        return ResponseWrapper(
-            success=True,
-            message="Asset deleted successfully"
-        )
+        return {
+            "success": True,
+            "message": "Asset deleted successfully"
+        }
         
     except HTTPException:
         raise
@@ -12,7 +12,7 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/register", response_model=ResponseWrapper)
+@router.post("/register", response_model=ResponseWrapper[UserSchema])
 async def register_user(
     user_data: UserCreate,
     db: Session = Depends(get_database)
@@ -37,11 +37,11 @@ async def register_user(
         db.commit()
         db.refresh(db_user)
         
-        return ResponseWrapper(
-            success=True,
-            message="User registered successfully",
-            data=UserSchema.from_orm(db_user)
-        )
+        return {
+            "success": True,
+            "message": "User registered successfully",
+            "data": db_user
+        }
         
     except Exception as e:
         logger.error(f"Registration error: {str(e)}")
@@ -50,18 +50,18 @@ async def register_user(
             detail="Registration failed"
         )
 
-@router.get("/profile", response_model=ResponseWrapper)
+@router.get("/profile", response_model=ResponseWrapper[UserSchema])
 async def get_profile(
     current_user: User = Depends(get_current_user)
 ):
     """Get current user profile"""
-    return ResponseWrapper(
-        success=True,
-        message="Profile retrieved successfully",
-        data=UserSchema.from_orm(current_user)
-    )
+    return {
+        "success": True,
+        "message": "Profile retrieved successfully",
+        "data": current_user
+    }
 
-@router.put("/profile", response_model=ResponseWrapper)
+@router.put("/profile", response_model=ResponseWrapper[UserSchema])
 async def update_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -75,11 +75,11 @@ async def update_profile(
         db.commit()
         db.refresh(current_user)
         
-        return ResponseWrapper(
-            success=True,
-            message="Profile updated successfully",
-            data=UserSchema.from_orm(current_user)
-        )
+        return {
+            "success": True,
+            "message": "Profile updated successfully",
+            "data": current_user
+        }
         
     except Exception as e:
         logger.error(f"Profile update error: {str(e)}")
@@ -88,7 +88,7 @@ async def update_profile(
             detail="Profile update failed"
         )
 
-@router.post("/verify-token", response_model=ResponseWrapper)
+@router.post("/verify-token", response_model=ResponseWrapper[UserSchema])
 async def verify_token(
     token: str,
     db: Session = Depends(get_database)
@@ -111,11 +111,11 @@ async def verify_token(
             db.commit()
             db.refresh(user)
         
-        return ResponseWrapper(
-            success=True,
-            message="Token verified successfully",
-            data=UserSchema.from_orm(user)
-        )
+        return {
+            "success": True,
+            "message": "Token verified successfully",
+            "data": user
+        }
         
     except Exception as e:
         logger.error(f"Token verification error: {str(e)}")
@@ -1,18 +1,21 @@
 """
 Automations management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from database import get_database
 from models import User, Asset, Automation
 from schemas import AutomationCreate, AutomationUpdate, Automation as AutomationSchema, ResponseWrapper
 from utils.auth import get_current_user
+from utils.etag import make_etag
+from utils.cache import response_cache, cache_key, render_response, entry_response, CacheEntry
+from utils.query_tracker import query_budget
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/", response_model=ResponseWrapper)
+@router.post("/", response_model=ResponseWrapper[AutomationSchema])
 async def create_automation(
     automation_data: AutomationCreate,
     current_user: User = Depends(get_current_user),
@@ -53,12 +56,13 @@ async def create_automation(
         db.add(db_automation)
         db.commit()
         db.refresh(db_automation)
+        await response_cache.invalidate(current_user.id, "automations")
         
-        return ResponseWrapper(
-            success=True,
-            message="Automation created successfully",
-            data=AutomationSchema.from_orm(db_automation)
-        )
+        return {
+            "success": True,
+            "message": "Automation created successfully",
+            "data": db_automation
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -68,14 +72,20 @@ async def create_automation(
             detail="Automation creation failed"
         )
 
-@router.get("/{asset_id}", response_model=ResponseWrapper)
+@router.get("/{asset_id}", response_model=ResponseWrapper[AutomationSchema])
+@query_budget(4)
 async def get_automation(
     asset_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database)
 ):
     """Get automation settings for an asset"""
     try:
+        slot = await response_cache.lookup(current_user.id, "automations", cache_key("get_automation", asset_id))
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         # Verify asset belongs to user
         asset = db.query(Asset).filter(
             Asset.id == asset_id,
@@ -98,11 +108,13 @@ async def get_automation(
                 detail="Automation not found"
             )
         
-        return ResponseWrapper(
-            success=True,
-            message="Automation retrieved successfully",
-            data=AutomationSchema.from_orm(automation)
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[AutomationSchema], {
+            "success": True,
+            "message": "Automation retrieved successfully",
+            "data": automation
+        }), make_etag("automation", automation.id, automation.updated_at or automation.created_at))
+        await slot.store(entry)
+        return entry_response(request, entry)
     except HTTPException:
         raise
     except Exception as e:
@@ -112,7 +124,7 @@ async def get_automation(
             detail="Failed to retrieve automation"
         )
 
-@router.put("/{automation_id}", response_model=ResponseWrapper)
+@router.put("/{automation_id}", response_model=ResponseWrapper[AutomationSchema])
 async def update_automation(
     automation_id: int,
     automation_update: AutomationUpdate,
@@ -149,12 +161,13 @@ async def update_automation(
         
         db.commit()
         db.refresh(automation)
+        await response_cache.invalidate(current_user.id, "automations")
         
-        return ResponseWrapper(
-            success=True,
-            message="Automation updated successfully",
-            data=AutomationSchema.from_orm(automation)
-        )
+        return {
+            "success": True,
+            "message": "Automation updated successfully",
+            "data": automation
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,180 @@
+"""
+Batch endpoint: replay queued client mutations in one request and one transaction
+"""
+import os
+import inspect
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, sessionmaker
+from database import SessionLocal
+from models import User
+from schemas import (
+    AssetCreate, AssetUpdate, Asset as AssetSchema,
+    ExpenseCreate, ExpenseUpdate, Expense as ExpenseSchema,
+    ReminderCreate, Reminder as ReminderSchema,
+    AutomationCreate, AutomationUpdate, Automation as AutomationSchema,
+    BatchRequest, BatchOperation, BatchOperationResult, ResponseWrapper
+)
+from utils.auth import get_current_user
+from utils.cache import response_cache, ALL_SCOPES
+from api import assets, expenses, reminders, automations
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+# op -> (endpoint function, body argument name, body schema, response schema)
+OPERATIONS = {
+    "asset.create": (assets.create_asset, "asset_data", AssetCreate, AssetSchema),
+    "asset.update": (assets.update_asset, "asset_update", AssetUpdate, AssetSchema),
+    "asset.delete": (assets.delete_asset, None, None, None),
+    "expense.create": (expenses.create_expense, "expense_data", ExpenseCreate, ExpenseSchema),
+    "expense.update": (expenses.update_expense, "expense_update", ExpenseUpdate, ExpenseSchema),
+    "expense.delete": (expenses.delete_expense, None, None, None),
+    "reminder.create": (reminders.create_reminder, "reminder_data", ReminderCreate, ReminderSchema),
+    "automation.create": (automations.create_automation, "automation_data", AutomationCreate, AutomationSchema),
+    "automation.update": (automations.update_automation, "automation_update", AutomationUpdate, AutomationSchema)
+}
+
+class DeferredCommitSession(Session):
+    """Session whose commit() only flushes, so the endpoints' commits join the batch transaction"""
+
+    def commit(self):
+        self.flush()
+
+    def commit_batch(self):
+        super().commit()
+
+BatchSessionLocal = sessionmaker(class_=DeferredCommitSession, **SessionLocal.kw)
+
+def get_batch_database():
+    """Dependency to get a deferred-commit database session"""
+    db = BatchSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def params_error(endpoint, body_arg: Optional[str], params: Dict[str, Any]) -> Optional[str]:
+    """Why `params` don't match the endpoint's path parameters, None when they do"""
+    expected = {
+        name: parameter for name, parameter in inspect.signature(endpoint).parameters.items()
+        if name not in (body_arg, "current_user", "db")
+    }
+    unknown = sorted(set(params) - set(expected))
+    if unknown:
+        return f"Unknown parameters: {', '.join(unknown)}"
+    missing = sorted(
+        name for name, parameter in expected.items()
+        if parameter.default is inspect.Parameter.empty and name not in params
+    )
+    if missing:
+        return f"Missing parameters: {', '.join(missing)}"
+    for name, value in params.items():
+        if expected[name].annotation is int and (not isinstance(value, int) or isinstance(value, bool)):
+            return f"Parameter {name} must be an integer"
+    return None
+
+async def run_operation(operation: BatchOperation, current_user: User, db: Session) -> Dict[str, Any]:
+    """Run one operation through the existing endpoint logic, returns its status and data"""
+    if operation.op not in OPERATIONS:
+        return {"status": status.HTTP_400_BAD_REQUEST, "detail": f"Unknown operation {operation.op}"}
+
+    endpoint, body_arg, body_schema, response_schema = OPERATIONS[operation.op]
+    error = params_error(endpoint, body_arg, operation.params)
+    if error:
+        return {"status": status.HTTP_400_BAD_REQUEST, "detail": f"Invalid parameters for {operation.op}: {error}"}
+    kwargs = dict(operation.params)
+    if body_arg:
+        try:
+            kwargs[body_arg] = body_schema(**(operation.body or {}))
+        except ValidationError as e:
+            return {"status": status.HTTP_422_UNPROCESSABLE_ENTITY, "detail": str(e)}
+
+    try:
+        result = await endpoint(**kwargs, current_user=current_user, db=db)
+    except HTTPException as e:
+        return {"status": e.status_code, "detail": e.detail}
+
+    data: Optional[Any] = None
+    if response_schema:
+        # Serialize now: the final commit expires the loaded objects
+        data = response_schema.from_orm(result["data"])
+    return {"status": status.HTTP_200_OK, "data": data}
+
+@router.post("/", response_model=ResponseWrapper[List[BatchOperationResult]])
+async def run_batch(
+    batch: BatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: DeferredCommitSession = Depends(get_batch_database)
+):
+    """Run an ordered list of operations in a single transaction.
+
+    Each operation runs in a savepoint: a failing operation is rolled back
+    alone and reported in its result. With `atomic` the first failure rolls
+    back the whole batch, the operations before it are reported as rolled
+    back and the remaining ones are skipped.
+    """
+    if len(batch.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many operations (max {BATCH_MAX_OPERATIONS})"
+        )
+
+    try:
+        results = []
+        failed = False
+        for operation in batch.operations:
+            if failed:
+                results.append(BatchOperationResult(
+                    id=operation.id,
+                    op=operation.op,
+                    status=status.HTTP_424_FAILED_DEPENDENCY,
+                    detail="Skipped after a failed operation"
+                ))
+                continue
+
+            savepoint = db.begin_nested()
+            outcome = await run_operation(operation, current_user, db)
+            if outcome["status"] < 400:
+                savepoint.commit()
+            else:
+                if savepoint.is_active:
+                    savepoint.rollback()
+                failed = batch.atomic
+            results.append(BatchOperationResult(id=operation.id, op=operation.op, **outcome))
+
+        if failed:
+            db.rollback()
+            # Their rows no longer exist: don't hand out their data or ids
+            results = [
+                BatchOperationResult(
+                    id=result.id,
+                    op=result.op,
+                    status=status.HTTP_424_FAILED_DEPENDENCY,
+                    detail="Rolled back"
+                ) if result.status < 400 else result
+                for result in results
+            ]
+            message = "Batch rolled back"
+        else:
+            db.commit_batch()
+            await response_cache.invalidate(current_user.id, *ALL_SCOPES)
+            succeeded = sum(1 for result in results if result.status < 400)
+            message = f"{succeeded}/{len(results)} operations applied"
+
+        return {
+            "success": not failed,
+            "message": message,
+            "data": results
+        }
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Batch error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Batch failed"
+        )
@@ -0,0 +1,304 @@
+"""
+Documents upload and OCR ingestion endpoints
+"""
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_database
+from models import User, Asset, Automation, Document
+from schemas import Document as DocumentSchema, Expense as ExpenseSchema, ResponseWrapper, PaginatedResponse
+from utils.auth import get_current_user
+from utils.bill_extractor import create_expense_from_document, expense_link
+from utils.document_pipeline import UPLOAD_DIR, document_pipeline
+from utils.document_store import receive_upload, get_user_storage_bytes, stored_file_name, find_cached_parse
+from utils.cache import response_cache
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def ocr_enabled_for_asset(asset_id: int, db: Session) -> bool:
+    """Check whether the OCR automation is enabled for an asset"""
+    automation = db.query(Automation).filter(Automation.asset_id == asset_id).first()
+    return bool(automation and automation.ocr)
+
+# The body is parsed by hand (see receive_upload), describe it for the docs
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+@router.post("/", response_model=ResponseWrapper[DocumentSchema], openapi_extra=UPLOAD_OPENAPI)
+async def upload_document(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    asset_id: int,
+    ocr: Optional[bool] = None,
+    create_expense: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Upload a bill document (streamed to disk) and queue it for OCR ingestion.
+    
+    With `create_expense` a pending expense is created from the extracted fields.
+    """
+    try:
+        # Verify asset belongs to user
+        asset = db.query(Asset).filter(
+            Asset.id == asset_id,
+            Asset.user_id == current_user.id
+        ).first()
+
+        if not asset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Asset not found"
+            )
+
+        user_id = current_user.id
+        used_bytes = get_user_storage_bytes(db, user_id)
+        # Don't hold a pooled connection while the body streams in
+        db.close()
+
+        upload = await receive_upload(request, user_id=user_id, used_bytes=used_bytes)
+        content_hash = upload["content_hash"]
+        file_type = upload["file_type"]
+
+        # Same content already uploaded for this asset: return the existing document
+        existing = db.query(Document).filter(
+            Document.asset_id == asset_id,
+            Document.content_hash == content_hash
+        ).first()
+        if existing:
+            return {
+                "success": True,
+                "message": "Document already uploaded",
+                "data": existing
+            }
+
+        # Reuse OCR/extraction results of identical content
+        parsed_data = find_cached_parse(db, content_hash)
+        run_ocr = parsed_data is None and (ocr if ocr is not None else ocr_enabled_for_asset(asset_id, db))
+        if parsed_data is None:
+            parsed_data = {"status": "pending" if run_ocr else "stored"}
+
+        db_document = Document(
+            asset_id=asset_id,
+            file_url=f"/{UPLOAD_DIR}/{stored_file_name(content_hash, file_type)}",
+            file_type=file_type,
+            content_hash=content_hash,
+            size_bytes=upload["size_bytes"],
+            parsed_data_json=parsed_data
+        )
+        db.add(db_document)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Concurrent upload of the same content won the race
+            db.rollback()
+            existing = db.query(Document).filter(
+                Document.asset_id == asset_id,
+                Document.content_hash == content_hash
+            ).first()
+            return {
+                "success": True,
+                "message": "Document already uploaded",
+                "data": existing
+            }
+        db.refresh(db_document)
+
+        if create_expense and parsed_data.get("status") == "processed":
+            # Cached extraction: the expense can be created right away
+            if create_expense_from_document(db, db_document, user_id):
+                db.commit()
+                db.refresh(db_document)
+                await response_cache.invalidate(user_id, "expenses")
+
+        background_tasks.add_task(document_pipeline.create_thumbnail, db_document.id)
+        if run_ocr:
+            background_tasks.add_task(document_pipeline.ingest, db_document.id, create_expense)
+
+        return {
+            "success": True,
+            "message": "Document uploaded successfully",
+            "data": db_document
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document upload error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Document upload failed"
+        )
+
+@router.get("/", response_model=ResponseWrapper[PaginatedResponse[DocumentSchema]])
+async def get_documents(
+    asset_id: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Get user's documents, optionally filtered by asset"""
+    try:
+        query = db.query(Document).join(Document.asset).filter(Asset.user_id == current_user.id)
+
+        if asset_id:
+            query = query.filter(Document.asset_id == asset_id)
+
+        total = query.count()
+        documents = query.order_by(Document.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+
+        return {
+            "success": True,
+            "message": "Documents retrieved successfully",
+            "data": {
+                "items": documents,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page
+            }
+        }
+    except Exception as e:
+        logger.error(f"Documents retrieval error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve documents"
+        )
+
+@router.get("/{document_id}", response_model=ResponseWrapper[DocumentSchema])
+async def get_document(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Get a document with its parsed data"""
+    try:
+        document = db.query(Document).join(Document.asset).filter(
+            Document.id == document_id,
+            Asset.user_id == current_user.id
+        ).first()
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+
+        return {
+            "success": True,
+            "message": "Document retrieved successfully",
+            "data": document
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document retrieval error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve document"
+        )
+
+@router.post("/{document_id}/process", response_model=ResponseWrapper[DocumentSchema])
+async def process_document(
+    document_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Queue (or re-queue) a document for OCR ingestion"""
+    try:
+        document = db.query(Document).join(Document.asset).filter(
+            Document.id == document_id,
+            Asset.user_id == current_user.id
+        ).first()
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+
+        document.parsed_data_json = {"status": "pending", **expense_link(document.parsed_data_json)}
+        db.commit()
+        db.refresh(document)
+
+        background_tasks.add_task(document_pipeline.ingest, document.id)
+
+        return {
+            "success": True,
+            "message": "Document queued for processing",
+            "data": document
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document processing error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to queue document"
+        )
+
+@router.post("/{document_id}/expense", response_model=ResponseWrapper[ExpenseSchema])
+async def create_document_expense(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Create a pending expense from the extracted fields of a processed document"""
+    try:
+        document = db.query(Document).join(Document.asset).filter(
+            Document.id == document_id,
+            Asset.user_id == current_user.id
+        ).first()
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+
+        parsed_data = document.parsed_data_json or {}
+        if parsed_data.get("expense_id"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Expense already created for this document"
+            )
+
+        expense = create_expense_from_document(db, document, current_user.id)
+        if not expense:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No amount extracted from this document"
+            )
+
+        db.commit()
+        db.refresh(expense)
+        await response_cache.invalidate(current_user.id, "expenses")
+
+        return {
+            "success": True,
+            "message": "Expense created successfully",
+            "data": expense
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document expense creation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create expense"
+        )
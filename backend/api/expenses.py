@@ -1,19 +1,23 @@
 """
 Expenses management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import Optional
 from database import get_database
 from models import User, Expense
 from schemas import ExpenseCreate, ExpenseUpdate, Expense as ExpenseSchema, ResponseWrapper, PaginatedResponse
 from utils.auth import get_current_user
+from utils.sync import record_tombstone
+from utils.etag import list_fingerprint, make_etag, is_not_modified, not_modified_response
+from utils.cache import response_cache, cache_key, render_response, entry_response, CacheEntry
+from utils.query_tracker import query_budget
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/", response_model=ResponseWrapper)
+@router.post("/", response_model=ResponseWrapper[ExpenseSchema])
 async def create_expense(
     expense_data: ExpenseCreate,
     current_user: User = Depends(get_current_user),
@@ -33,12 +37,13 @@ async def create_expense(
         db.add(db_expense)
         db.commit()
         db.refresh(db_expense)
+        await response_cache.invalidate(current_user.id, "expenses")
         
-        return ResponseWrapper(
-            success=True,
-            message="Expense created successfully",
-            data=ExpenseSchema.from_orm(db_expense)
-        )
+        return {
+            "success": True,
+            "message": "Expense created successfully",
+            "data": db_expense
+        }
     except Exception as e:
         logger.error(f"Expense creation error: {str(e)}")
         raise HTTPException(
@@ -46,8 +51,10 @@ async def create_expense(
             detail="Expense creation failed"
         )
 
-@router.get("/", response_model=ResponseWrapper)
+@router.get("/", response_model=ResponseWrapper[PaginatedResponse[ExpenseSchema]])
+@query_budget(5)
 async def get_expenses(
+    request: Request,
     category: Optional[str] = None,
     status_filter: Optional[str] = None,
     page: int = 1,
@@ -57,6 +64,12 @@ async def get_expenses(
 ):
     """Get user's expenses with optional filtering"""
     try:
+        slot = await response_cache.lookup(
+            current_user.id, "expenses", cache_key("get_expenses", category, status_filter, page, per_page)
+        )
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         query = db.query(Expense).filter(Expense.user_id == current_user.id)
         
         if category:
@@ -64,20 +77,26 @@ async def get_expenses(
         if status_filter:
             query = query.filter(Expense.status == status_filter)
         
-        total = query.count()
+        total, last_updated = list_fingerprint(query, Expense)
+        etag = make_etag("expenses", current_user.id, category, status_filter, page, per_page, total, last_updated)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         expenses = query.offset((page - 1) * per_page).limit(per_page).all()
         
-        return ResponseWrapper(
-            success=True,
-            message="Expenses retrieved successfully",
-            data=PaginatedResponse(
-                items=[ExpenseSchema.from_orm(expense) for expense in expenses],
-                total=total,
-                page=page,
-                per_page=per_page,
-                pages=(total + per_page - 1) // per_page
-            )
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[PaginatedResponse[ExpenseSchema]], {
+            "success": True,
+            "message": "Expenses retrieved successfully",
+            "data": {
+                "items": expenses,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page
+            }
+        }), etag)
+        await slot.store(entry)
+        return entry_response(request, entry)
     except Exception as e:
         logger.error(f"Expenses retrieval error: {str(e)}")
         raise HTTPException(
@@ -85,14 +104,20 @@ async def get_expenses(
             detail="Failed to retrieve expenses"
         )
 
-@router.get("/{expense_id}", response_model=ResponseWrapper)
+@router.get("/{expense_id}", response_model=ResponseWrapper[ExpenseSchema])
+@query_budget(3)
 async def get_expense(
     expense_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database)
 ):
     """Get specific expense by ID"""
     try:
+        slot = await response_cache.lookup(current_user.id, "expenses", cache_key("get_expense", expense_id))
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         expense = db.query(Expense).filter(
             Expense.id == expense_id,
             Expense.user_id == current_user.id
@@ -104,11 +129,13 @@ async def get_expense(
                 detail="Expense not found"
             )
         
-        return ResponseWrapper(
-            success=True,
-            message="Expense retrieved successfully",
-            data=ExpenseSchema.from_orm(expense)
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[ExpenseSchema], {
+            "success": True,
+            "message": "Expense retrieved successfully",
+            "data": expense
+        }), make_etag("expense", expense.id, expense.updated_at or expense.created_at))
+        await slot.store(entry)
+        return entry_response(request, entry)
     except HTTPException:
         raise
     except Exception as e:
@@ -118,7 +145,7 @@ async def get_expense(
             detail="Failed to retrieve expense"
         )
 
-@router.put("/{expense_id}", response_model=ResponseWrapper)
+@router.put("/{expense_id}", response_model=ResponseWrapper[ExpenseSchema])
 async def update_expense(
     expense_id: int,
     expense_update: ExpenseUpdate,
@@ -144,12 +171,13 @@ async def update_expense(
         
         db.commit()
         db.refresh(expense)
+        await response_cache.invalidate(current_user.id, "expenses")
         
-        return ResponseWrapper(
-            success=True,
-            message="Expense updated successfully",
-            data=ExpenseSchema.from_orm(expense)
-        )
+        return {
+            "success": True,
+            "message": "Expense updated successfully",
+            "data": expense
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -159,7 +187,7 @@ async def update_expense(
             detail="Expense update failed"
         )
 
-@router.delete("/{expense_id}", response_model=ResponseWrapper)
+@router.delete("/{expense_id}", response_model=ResponseWrapper[None])
 async def delete_expense(
     expense_id: int,
     current_user: User = Depends(get_current_user),
@@ -178,13 +206,15 @@ async def delete_expense(
                 detail="Expense not found"
             )
         
+        record_tombstone(db, current_user.id, "expense", expense.id)
         db.delete(expense)
         db.commit()
+        await response_cache.invalidate(current_user.id, "expenses")
         
-        return ResponseWrapper(
-            success=True,
-            message="Expense deleted successfully"
-        )
+        return {
+            "success": True,
+            "message": "Expense deleted successfully"
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -5,16 +5,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_database
 from models import User, Asset
-from schemas import IMUCalculationRequest, IMUCalculationResponse, ResponseWrapper
+from schemas import IMUCalculationRequest, IMUCalculationResponse, F24GenerateResponse, ResponseWrapper
 from utils.auth import get_current_user
+from utils.rate_limit import rate_limit
+from utils.metrics import time_f24_render
 from utils.imu_calc import IMUCalculator
-from utils.f24_pdf import F24Generator
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/calculate-imu", response_model=ResponseWrapper)
+@router.post("/calculate-imu", response_model=ResponseWrapper[IMUCalculationResponse])
 async def calculate_imu(
     request: IMUCalculationRequest,
     current_user: User = Depends(get_current_user),
@@ -39,11 +40,11 @@ async def calculate_imu(
             scadenza_secondo=result["scadenza_secondo"]
         )
         
-        return ResponseWrapper(
-            success=True,
-            message="IMU calculated successfully",
-            data=response_data
-        )
+        return {
+            "success": True,
+            "message": "IMU calculated successfully",
+            "data": response_data
+        }
         
     except Exception as e:
         logger.error(f"IMU calculation error: {str(e)}")
@@ -52,7 +53,7 @@ async def calculate_imu(
             detail="IMU calculation failed"
         )
 
-@router.post("/generate", response_model=ResponseWrapper)
+@router.post("/generate", response_model=ResponseWrapper[F24GenerateResponse], dependencies=[Depends(rate_limit("f24_generate"))])
 async def generate_f24(
     asset_id: int,
     payment_type: str,
@@ -83,7 +84,8 @@ async def generate_f24(
         calculator = IMUCalculator()
         imu_result = calculator.calculate_imu_for_property(asset.details_json)
         
-        # Generate F24 PDF
+        # Generate F24 PDF (reportlab is imported on first use, not at startup)
+        from utils.f24_pdf import F24Generator
         generator = F24Generator()
         
         # Prepare taxpayer data
@@ -96,21 +98,22 @@ async def generate_f24(
             "provincia": "RM"
         }
         
-        f24_path = generator.generate_imu_f24(
-            taxpayer_data=taxpayer_data,
-            property_data=asset.details_json,
-            imu_calculation=imu_result,
-            payment_type=payment_type
-        )
+        with time_f24_render():
+            f24_path = generator.generate_imu_f24(
+                taxpayer_data=taxpayer_data,
+                property_data=asset.details_json,
+                imu_calculation=imu_result,
+                payment_type=payment_type
+            )
         
         # Return file URL
         file_url = f"/static/f24/{f24_path.split('/')[-1]}"
         
-        return ResponseWrapper(
-            success=True,
-            message="F24 generated successfully",
-            data={"file_url": file_url, "path": f24_path}
-        )
+        return {
+            "success": True,
+            "message": "F24 generated successfully",
+            "data": {"file_url": file_url, "path": f24_path}
+        }
         
     except HTTPException:
         raise
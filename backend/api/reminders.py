@@ -1,19 +1,26 @@
 """
 Reminders management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from database import get_database
 from models import User, Reminder
-from schemas import ReminderCreate, Reminder as ReminderSchema, ResponseWrapper, PaginatedResponse
+from schemas import ReminderCreate, Reminder as ReminderSchema, ReminderRunResult, ResponseWrapper, PaginatedResponse
 from utils.auth import get_current_user
+from utils.rate_limit import rate_limit
+from utils.etag import list_fingerprint, make_etag, is_not_modified, not_modified_response
+from utils.cache import response_cache, cache_key, render_response, entry_response, CacheEntry
+from utils.query_tracker import query_budget
+from utils.services import get_scheduler_service
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/", response_model=ResponseWrapper)
+@router.get("/", response_model=ResponseWrapper[PaginatedResponse[ReminderSchema]])
+@query_budget(6)
 async def get_reminders(
+    request: Request,
     page: int = 1,
     per_page: int = 10,
     current_user: User = Depends(get_current_user),
@@ -21,26 +28,36 @@ async def get_reminders(
 ):
     """Get user's reminders"""
     try:
+        slot = await response_cache.lookup(current_user.id, "reminders", cache_key("get_reminders", page, per_page))
+        if slot.entry:
+            return entry_response(request, slot.entry)
+
         # Get user's assets first
         from models import Asset
         user_assets = db.query(Asset).filter(Asset.user_id == current_user.id).all()
         asset_ids = [asset.id for asset in user_assets]
         
         query = db.query(Reminder).filter(Reminder.asset_id.in_(asset_ids))
-        total = query.count()
+        total, last_updated = list_fingerprint(query, Reminder)
+        etag = make_etag("reminders", current_user.id, page, per_page, total, last_updated)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         reminders = query.offset((page - 1) * per_page).limit(per_page).all()
         
-        return ResponseWrapper(
-            success=True,
-            message="Reminders retrieved successfully",
-            data=PaginatedResponse(
-                items=[ReminderSchema.from_orm(reminder) for reminder in reminders],
-                total=total,
-                page=page,
-                per_page=per_page,
-                pages=(total + per_page - 1) // per_page
-            )
-        )
+        entry = CacheEntry(render_response(ResponseWrapper[PaginatedResponse[ReminderSchema]], {
+            "success": True,
+            "message": "Reminders retrieved successfully",
+            "data": {
+                "items": reminders,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page
+            }
+        }), etag)
+        await slot.store(entry)
+        return entry_response(request, entry)
     except Exception as e:
         logger.error(f"Reminders retrieval error: {str(e)}")
         raise HTTPException(
@@ -48,7 +65,7 @@ async def get_reminders(
             detail="Failed to retrieve reminders"
         )
 
-@router.post("/", response_model=ResponseWrapper)
+@router.post("/", response_model=ResponseWrapper[ReminderSchema])
 async def create_reminder(
     reminder_data: ReminderCreate,
     current_user: User = Depends(get_current_user),
@@ -78,12 +95,13 @@ async def create_reminder(
         db.add(db_reminder)
         db.commit()
         db.refresh(db_reminder)
+        await response_cache.invalidate(current_user.id, "reminders")
         
-        return ResponseWrapper(
-            success=True,
-            message="Reminder created successfully",
-            data=ReminderSchema.from_orm(db_reminder)
-        )
+        return {
+            "success": True,
+            "message": "Reminder created successfully",
+            "data": db_reminder
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -93,24 +111,24 @@ async def create_reminder(
             detail="Reminder creation failed"
         )
 
-@router.post("/run", response_model=ResponseWrapper)
+@router.post("/run", response_model=ResponseWrapper[ReminderRunResult], dependencies=[Depends(rate_limit("reminders_run"))])
 async def run_reminders(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database)
+    db: Session = Depends(get_database),
+    scheduler_service = Depends(get_scheduler_service)
 ):
-    """Manually trigger reminder check"""
+    """Send the current user's due reminders now (debounced, see REMINDERS_RUN_DEBOUNCE_SECONDS)"""
     try:
-        from utils.scheduler import SchedulerService
-        scheduler = SchedulerService()
-        await scheduler.check_reminders()
+        result = await scheduler_service.run_user_reminders(current_user.id, db)
         
-        return ResponseWrapper(
-            success=True,
-            message="Reminders checked successfully"
-        )
+        return {
+            "success": True,
+            "message": "Reminders checked successfully",
+            "data": result
+        }
     except Exception as e:
         logger.error(f"Reminder run error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to run reminders"
-        )
\ No newline at end of file
+        )
@@ -1,14 +1,20 @@
 """
 AI Suggestions endpoint
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from database import get_database
 from models import User, Asset, Expense
 from schemas import AISuggestionRequest, AISuggestionResponse, ResponseWrapper
 from utils.auth import get_current_user
+from utils.rate_limit import rate_limit
+from utils.metrics import time_llm
+from utils.tracing import traced, span
 from datetime import datetime, timedelta
 from decimal import Decimal
+from typing import AsyncIterator
+import json
 import logging
 import os
 
@@ -19,7 +25,83 @@ router = APIRouter()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
-@router.post("/ai", response_model=ResponseWrapper)
+def collect_rule_based_suggestions(
+    request: AISuggestionRequest,
+    current_user: User,
+    db: Session
+):
+    """Load the user's expenses and build the rule-based suggestions"""
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=request.period_months * 30)
+    
+    # Get expenses in the period
+    query = db.query(Expense).filter(
+        Expense.user_id == current_user.id,
+        Expense.created_at >= start_date
+    )
+    
+    if request.asset_id:
+        query = query.filter(Expense.asset_id == request.asset_id)
+    
+    expenses = query.all()
+    
+    # Prepare expense summary
+    total_amount = sum(float(e.amount) for e in expenses)
+    category_totals = {}
+    for expense in expenses:
+        category = expense.category
+        category_totals[category] = category_totals.get(category, 0) + float(expense.amount)
+    
+    # Generate suggestions based on expense data
+    suggestions = []
+    potential_savings = Decimal("0")
+    
+    # Simple rule-based suggestions (fallback if no AI available)
+    if total_amount > 0:
+        # High expense categories
+        for category, amount in sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:3]:
+            if amount > total_amount * 0.2:  # More than 20% of total
+                suggestions.append(
+                    f"La categoria '{category}' rappresenta una spesa significativa "
+                    f"(€{amount:.2f}). Considera di confrontare fornitori alternativi."
+                )
+                potential_savings += Decimal(str(amount * 0.1))  # Estimate 10% savings
+    
+    # Properties and vehicles in a single query
+    assets = db.query(Asset).filter(
+        Asset.user_id == current_user.id,
+        Asset.type.in_(["property", "vehicle"])
+    ).all()
+    properties = [asset for asset in assets if asset.type == "property"]
+    vehicles = [asset for asset in assets if asset.type == "vehicle"]
+    
+    # IMU optimization suggestions
+    for prop in properties:
+        if prop.details_json and 'rendita' in prop.details_json:
+            suggestions.append(
+                f"Per {prop.name}: verifica se hai diritto a detrazioni IMU "
+                f"(prima casa, terreni agricoli, ecc.)"
+            )
+    
+    # Vehicle suggestions
+    if len(vehicles) > 2:
+        suggestions.append(
+            f"Hai {len(vehicles)} veicoli registrati. Valuta se tutti sono necessari "
+            f"per ridurre i costi di assicurazione e manutenzione."
+        )
+    
+    # Generic suggestions
+    if not suggestions:
+        suggestions = [
+            "Continua a monitorare le tue spese per identificare opportunità di risparmio.",
+            "Imposta promemoria per le scadenze per evitare more e interessi.",
+            "Utilizza le automazioni per calcolare IMU e generare F24 in anticipo."
+        ]
+    
+    return expenses, suggestions, potential_savings
+
+@router.post("/ai", response_model=ResponseWrapper[AISuggestionResponse], dependencies=[Depends(rate_limit("suggestions_ai"))])
 async def get_ai_suggestions(
     request: AISuggestionRequest,
     current_user: User = Depends(get_current_user),
@@ -27,88 +109,22 @@ async def get_ai_suggestions(
 ):
     """Get AI-powered saving suggestions based on expenses"""
     try:
-        # Calculate date range
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=request.period_months * 30)
-        
-        # Get expenses in the period
-        query = db.query(Expense).filter(
-            Expense.user_id == current_user.id,
-            Expense.created_at >= start_date
+        expenses, suggestions, potential_savings = collect_rule_based_suggestions(
+            request, current_user, db
         )
         
-        if request.asset_id:
-            query = query.filter(Expense.asset_id == request.asset_id)
-        
-        expenses = query.all()
-        
-        # Prepare expense summary
-        total_amount = sum(float(e.amount) for e in expenses)
-        category_totals = {}
-        for expense in expenses:
-            category = expense.category
-            category_totals[category] = category_totals.get(category, 0) + float(expense.amount)
-        
-        # Generate suggestions based on expense data
-        suggestions = []
-        potential_savings = Decimal("0")
-        
-        # Simple rule-based suggestions (fallback if no AI available)
-        if total_amount > 0:
-            # High expense categories
-            for category, amount in sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:3]:
-                if amount > total_amount * 0.2:  # More than 20% of total
-                    suggestions.append(
-                        f"La categoria '{category}' rappresenta una spesa significativa "
-                        f"(€{amount:.2f}). Considera di confrontare fornitori alternativi."
-                    )
-                    potential_savings += Decimal(str(amount * 0.1))  # Estimate 10% savings
-        
-        # IMU optimization suggestions
-        properties = db.query(Asset).filter(
-            Asset.user_id == current_user.id,
-            Asset.type == "property"
-        ).all()
-        
-        for prop in properties:
-            if prop.details_json and 'rendita' in prop.details_json:
-                suggestions.append(
-                    f"Per {prop.name}: verifica se hai diritto a detrazioni IMU "
-                    f"(prima casa, terreni agricoli, ecc.)"
-                )
-        
-        # Vehicle suggestions
-        vehicles = db.query(Asset).filter(
-            Asset.user_id == current_user.id,
-            Asset.type == "vehicle"
-        ).all()
-        
-        if len(vehicles) > 2:
-            suggestions.append(
-                f"Hai {len(vehicles)} veicoli registrati. Valuta se tutti sono necessari "
-                f"per ridurre i costi di assicurazione e manutenzione."
-            )
-        
-        # Generic suggestions
-        if not suggestions:
-            suggestions = [
-                "Continua a monitorare le tue spese per identificare opportunità di risparmio.",
-                "Imposta promemoria per le scadenze per evitare more e interessi.",
-                "Utilizza le automazioni per calcolare IMU e generare F24 in anticipo."
-            ]
-        
         # Try to use AI if available
         analysis = await generate_ai_analysis(expenses, suggestions)
         
-        return ResponseWrapper(
-            success=True,
-            message="AI suggestions generated successfully",
-            data=AISuggestionResponse(
-                suggestions=suggestions,
-                potential_savings=potential_savings,
-                analysis=analysis
-            )
-        )
+        return {
+            "success": True,
+            "message": "AI suggestions generated successfully",
+            "data": {
+                "suggestions": suggestions,
+                "potential_savings": potential_savings,
+                "analysis": analysis
+            }
+        }
         
     except Exception as e:
         logger.error(f"AI suggestions error: {str(e)}")
@@ -117,6 +133,80 @@ async def get_ai_suggestions(
             detail="Failed to generate AI suggestions"
         )
 
+@router.post("/ai/stream", dependencies=[Depends(rate_limit("suggestions_ai"))])
+async def stream_ai_suggestions(
+    request: AISuggestionRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Server-sent events variant of /ai.
+    
+    Emits a `suggestions` event with the rule-based suggestions as soon as the
+    SQL query completes, then one `analysis` event per AI token chunk and a
+    final `done` event. The upstream LLM stream is closed when the client
+    disconnects.
+    """
+    try:
+        expenses, suggestions, potential_savings = collect_rule_based_suggestions(
+            request, current_user, db
+        )
+        # Build the prompt now so the stream never touches the DB session
+        prompt = build_analysis_prompt(expenses, suggestions)
+    except Exception as e:
+        logger.error(f"AI suggestions stream error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate AI suggestions"
+        )
+    
+    async def event_stream():
+        yield format_sse("suggestions", {
+            "suggestions": suggestions,
+            "potential_savings": str(potential_savings)
+        })
+        
+        chunks = stream_ai_analysis(prompt)
+        try:
+            async for chunk in chunks:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling AI analysis stream")
+                    return
+                yield format_sse("analysis", {"text": chunk})
+        finally:
+            await chunks.aclose()
+        
+        yield format_sse("done", {})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def build_analysis_prompt(expenses, suggestions) -> str:
+    """Build the LLM prompt from the expenses and rule-based suggestions"""
+    expense_summary = "\n".join([
+        f"- {e.category}: €{e.amount} ({e.status})"
+        for e in expenses[:10]  # Limit to 10 recent expenses
+    ])
+    
+    return f"""Analizza queste spese familiari e fornisci consigli per risparmiare:
+
+{expense_summary}
+
+Suggerimenti già generati:
+{chr(10).join(f"- {s}" for s in suggestions)}
+
+Fornisci un'analisi breve (2-3 frasi) con consigli pratici in italiano."""
+
 async def generate_ai_analysis(expenses, suggestions):
     """Generate AI analysis using OpenAI or Anthropic"""
     try:
@@ -130,6 +220,7 @@ async def generate_ai_analysis(expenses, suggestions):
         logger.error(f"AI analysis error: {str(e)}")
         return "Analisi automatica basata sui dati delle spese."
 
+@traced("llm.anthropic", root=False)
 async def generate_anthropic_analysis(expenses, suggestions):
     """Generate analysis using Anthropic Claude"""
     try:
@@ -137,26 +228,15 @@ async def generate_anthropic_analysis(expenses, suggestions):
         
         client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
         
-        expense_summary = "\n".join([
-            f"- {e.category}: €{e.amount} ({e.status})"
-            for e in expenses[:10]  # Limit to 10 recent expenses
-        ])
-        
-        message = client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=500,
-            messages=[{
-                "role": "user",
-                "content": f"""Analizza queste spese familiari e fornisci consigli per risparmiare:
-
-{expense_summary}
-
-Suggerimenti già generati:
-{chr(10).join(f"- {s}" for s in suggestions)}
-
-Fornisci un'analisi breve (2-3 frasi) con consigli pratici in italiano."""
-            }]
-        )
+        with time_llm("anthropic"):
+            message = client.messages.create(
+                model="claude-3-sonnet-20240229",
+                max_tokens=500,
+                messages=[{
+                    "role": "user",
+                    "content": build_analysis_prompt(expenses, suggestions)
+                }]
+            )
         
         return message.content[0].text
         
@@ -164,6 +244,7 @@ Fornisci un'analisi breve (2-3 frasi) con consigli pratici in italiano."""
         logger.error(f"Anthropic analysis error: {str(e)}")
         return "Analisi automatica basata sui dati delle spese."
 
+@traced("llm.openai", root=False)
 async def generate_openai_analysis(expenses, suggestions):
     """Generate analysis using OpenAI"""
     try:
@@ -171,29 +252,79 @@ async def generate_openai_analysis(expenses, suggestions):
         
         client = openai.OpenAI(api_key=OPENAI_API_KEY)
         
-        expense_summary = "\n".join([
-            f"- {e.category}: €{e.amount} ({e.status})"
-            for e in expenses[:10]
-        ])
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{
-                "role": "user",
-                "content": f"""Analizza queste spese familiari e fornisci consigli per risparmiare:
-
-{expense_summary}
-
-Suggerimenti già generati:
-{chr(10).join(f"- {s}" for s in suggestions)}
-
-Fornisci un'analisi breve (2-3 frasi) con consigli pratici in italiano."""
-            }],
-            max_tokens=300
-        )
+        with time_llm("openai"):
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{
+                    "role": "user",
+                    "content": build_analysis_prompt(expenses, suggestions)
+                }],
+                max_tokens=300
+            )
         
         return response.choices[0].message.content
         
     except Exception as e:
         logger.error(f"OpenAI analysis error: {str(e)}")
-        return "Analisi automatica basata sui dati delle spese."
\ No newline at end of file
+        return "Analisi automatica basata sui dati delle spese."
+
+async def stream_ai_analysis(prompt: str) -> AsyncIterator[str]:
+    """Stream AI analysis text chunks using OpenAI or Anthropic"""
+    if ANTHROPIC_API_KEY:
+        chunks = stream_anthropic_analysis(prompt)
+    elif OPENAI_API_KEY:
+        chunks = stream_openai_analysis(prompt)
+    else:
+        yield "Analisi AI non disponibile. Installa OpenAI o Anthropic API."
+        return
+    
+    emitted = False
+    try:
+        async for chunk in chunks:
+            emitted = True
+            yield chunk
+    except Exception as e:
+        logger.error(f"AI analysis stream error: {str(e)}")
+        if not emitted:
+            yield "Analisi automatica basata sui dati delle spese."
+    finally:
+        await chunks.aclose()
+
+async def stream_anthropic_analysis(prompt: str) -> AsyncIterator[str]:
+    """Stream analysis tokens from Anthropic Claude"""
+    import anthropic
+    
+    client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    with time_llm("anthropic", "stream"), span("llm.anthropic.stream", root=False, activate=False):
+        stream = await client.messages.create(
+            model="claude-3-sonnet-20240229",
+            max_tokens=500,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        try:
+            async for event in stream:
+                if event.type == "content_block_delta" and event.delta.text:
+                    yield event.delta.text
+        finally:
+            # Closing the HTTP response aborts generation upstream
+            await stream.response.aclose()
+
+async def stream_openai_analysis(prompt: str) -> AsyncIterator[str]:
+    """Stream analysis tokens from OpenAI"""
+    import openai
+    
+    client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    with time_llm("openai", "stream"), span("llm.openai.stream", root=False, activate=False):
+        stream = await client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=300,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.response.aclose()
@@ -0,0 +1,103 @@
+"""
+Home screen summary endpoint
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from database import get_database
+from models import User, Asset, Expense, Reminder
+from schemas import HomeSummary, ResponseWrapper
+from utils.auth import get_current_user
+from utils.query_tracker import query_budget
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def month_bounds(now: datetime):
+    """First instant of the current and of the next month"""
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+def get_month_totals(db: Session, user_id: int, now: datetime) -> dict:
+    """Totals of the expenses due this month, by status and category, in one query"""
+    start, end = month_bounds(now)
+    rows = db.query(
+        Expense.category,
+        Expense.status,
+        func.coalesce(func.sum(Expense.amount), 0)
+    ).filter(
+        Expense.user_id == user_id,
+        Expense.due_date >= start,
+        Expense.due_date < end
+    ).group_by(Expense.category, Expense.status).all()
+
+    totals = {
+        "month": start.strftime("%Y-%m"),
+        "total": Decimal("0"),
+        "paid": Decimal("0"),
+        "pending": Decimal("0"),
+        "by_category": {}
+    }
+    for category, expense_status, amount in rows:
+        amount = Decimal(amount)
+        totals["total"] += amount
+        if expense_status == "paid":
+            totals["paid"] += amount
+        else:
+            totals["pending"] += amount
+        totals["by_category"][category] = totals["by_category"].get(category, Decimal("0")) + amount
+    return totals
+
+@router.get("/", response_model=ResponseWrapper[HomeSummary])
+@query_budget(10)
+async def get_summary(
+    reminder_days: int = 30,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Everything the home screen needs in one call.
+
+    Assets come with their automations, upcoming unnotified reminders and
+    pending expenses, each relationship loaded with a single SELECT ... IN.
+    """
+    try:
+        now = datetime.now()
+        horizon = now + timedelta(days=reminder_days)
+
+        assets = db.query(Asset).filter(Asset.user_id == current_user.id).options(
+            selectinload(Asset.automations),
+            selectinload(Asset.reminders.and_(
+                Reminder.date >= now,
+                Reminder.date <= horizon,
+                Reminder.notified == False
+            )),
+            selectinload(Asset.expenses.and_(Expense.status == "pending"))
+        ).order_by(Asset.created_at).all()
+
+        # Pending expenses not linked to any asset
+        unassigned_expenses = db.query(Expense).filter(
+            Expense.user_id == current_user.id,
+            Expense.asset_id.is_(None),
+            Expense.status == "pending"
+        ).order_by(Expense.due_date).all()
+
+        return {
+            "success": True,
+            "message": "Summary retrieved successfully",
+            "data": {
+                "user": current_user,
+                "assets": assets,
+                "unassigned_expenses": unassigned_expenses,
+                "month_totals": get_month_totals(db, current_user.id, now)
+            }
+        }
+    except Exception as e:
+        logger.error(f"Summary retrieval error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve summary"
+        )
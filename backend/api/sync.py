@@ -0,0 +1,51 @@
+"""
+Delta sync endpoint for offline-first clients
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_database
+from models import User
+from schemas import SyncResponse, ResponseWrapper
+from utils.auth import get_current_user
+from utils.sync import collect_changes, decode_sync_token
+from utils.query_tracker import query_budget
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/", response_model=ResponseWrapper[SyncResponse])
+@query_budget(10)
+async def sync(
+    since: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Get everything created, updated or deleted since a sync token.
+
+    Without `since` (or with an expired token) all the user's data is returned
+    with `full` set. Store the returned `token` for the next call.
+    """
+    try:
+        since_time = decode_sync_token(since) if since else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+
+    try:
+        changes = collect_changes(db, current_user.id, since_time)
+
+        return {
+            "success": True,
+            "message": "Full sync" if changes["full"] else "Changes retrieved successfully",
+            "data": changes
+        }
+    except Exception as e:
+        logger.error(f"Sync error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Sync failed"
+        )
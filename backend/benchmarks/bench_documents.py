@@ -0,0 +1,168 @@
+"""
+Document pipeline benchmarks
+
+Usage:
+    python -m benchmarks.bench_documents path/to/sample_bills [--compare text-layer|preprocess] [--output results.json]
+
+--compare text-layer (default): every PDF/JPG/PNG in the corpus directory is
+processed once forcing OCR on all pages and once with the text layer first.
+
+--compare preprocess: every document is OCR'd with and without the Pillow
+preprocessing stage, reporting OCR seconds per page and the accuracy of the
+extracted amounts against `expected.json` in the corpus directory
+({"bolletta.jpg": {"importo_totale": "123.45"}, ...}).
+
+CPU time includes the pdftoppm/tesseract child processes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, List
+from utils.document_pipeline import DocumentPipeline, _cpu_time, shutdown_ocr_pool
+
+FILE_TYPES = {".pdf": "pdf", ".jpg": "jpg", ".jpeg": "jpg", ".png": "png"}
+
+def load_corpus(corpus_dir: str) -> List[Dict[str, str]]:
+    """List the sample documents of a corpus directory"""
+    corpus = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        file_type = FILE_TYPES.get(os.path.splitext(filename)[1].lower())
+        if file_type:
+            corpus.append({"path": os.path.join(corpus_dir, filename), "file_type": file_type})
+    return corpus
+
+def load_expected(corpus_dir: str) -> Dict[str, Dict[str, str]]:
+    """Load the expected field values of a corpus, if provided"""
+    expected_path = os.path.join(corpus_dir, "expected.json")
+    if not os.path.exists(expected_path):
+        return {}
+    with open(expected_path) as expected_file:
+        return json.load(expected_file)
+
+async def run_mode(
+    pipeline: DocumentPipeline,
+    corpus: List[Dict[str, str]],
+    force_ocr: bool,
+    preprocess: bool = None,
+    expected: Dict[str, Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Process the whole corpus in one mode and collect CPU, wall time and accuracy"""
+    documents = []
+    wall_start = time.perf_counter()
+
+    for sample in corpus:
+        cpu_start = _cpu_time()
+        result = await pipeline.process(
+            sample["path"],
+            sample["file_type"],
+            force_ocr=force_ocr,
+            preprocess=preprocess
+        )
+        # OCR runs in pool workers: their CPU is reported per page
+        worker_cpu = sum(page.get("cpu_seconds", 0) for page in result["pages"])
+        documents.append({
+            "file": os.path.basename(sample["path"]),
+            "extraction": result["extraction"],
+            "pages": len(result["pages"]),
+            "ocr_pages": sum(1 for page in result["pages"] if page["method"] == "ocr"),
+            "cpu_seconds": round(_cpu_time() - cpu_start + worker_cpu, 4),
+            "ocr_seconds": round(sum(page.get("seconds", 0) for page in result["pages"]), 4),
+            "timings": result["timings"],
+            "fields": result["fields"]
+        })
+
+    ocr_pages = sum(document["ocr_pages"] for document in documents)
+    summary = {
+        "wall_seconds": round(time.perf_counter() - wall_start, 4),
+        "cpu_seconds": round(sum(document["cpu_seconds"] for document in documents), 4),
+        "pages": sum(document["pages"] for document in documents),
+        "ocr_pages": ocr_pages,
+        "ocr_seconds_per_page": round(
+            sum(document["ocr_seconds"] for document in documents) / ocr_pages, 4
+        ) if ocr_pages else 0.0,
+        "documents": documents
+    }
+
+    if expected:
+        checked = [document for document in documents if expected.get(document["file"], {}).get("importo_totale")]
+        correct = sum(
+            1 for document in checked
+            if document["fields"].get("importo_totale") == expected[document["file"]]["importo_totale"]
+        )
+        summary["amount_accuracy"] = round(correct / len(checked), 4) if checked else None
+
+    return summary
+
+async def run_text_layer_benchmark(corpus_dir: str) -> Dict[str, Any]:
+    """Compare OCR-only and text-layer-first processing on a corpus"""
+    corpus = load_corpus(corpus_dir)
+    pipeline = DocumentPipeline()
+    try:
+        ocr_only = await run_mode(pipeline, corpus, force_ocr=True)
+        text_first = await run_mode(pipeline, corpus, force_ocr=False)
+    finally:
+        shutdown_ocr_pool()
+
+    saved = ocr_only["cpu_seconds"] - text_first["cpu_seconds"]
+    return {
+        "corpus": corpus_dir,
+        "documents": len(corpus),
+        "modes": {"ocr_only": ocr_only, "text_first": text_first},
+        "cpu_seconds_saved": round(saved, 4),
+        "cpu_saved_pct": round(100 * saved / ocr_only["cpu_seconds"], 1) if ocr_only["cpu_seconds"] else 0.0
+    }
+
+async def run_preprocess_benchmark(corpus_dir: str) -> Dict[str, Any]:
+    """Compare OCR with and without Pillow preprocessing on a corpus"""
+    corpus = load_corpus(corpus_dir)
+    expected = load_expected(corpus_dir)
+    pipeline = DocumentPipeline()
+    try:
+        raw = await run_mode(pipeline, corpus, force_ocr=True, preprocess=False, expected=expected)
+        preprocessed = await run_mode(pipeline, corpus, force_ocr=True, preprocess=True, expected=expected)
+    finally:
+        shutdown_ocr_pool()
+
+    return {
+        "corpus": corpus_dir,
+        "documents": len(corpus),
+        "modes": {"raw": raw, "preprocessed": preprocessed}
+    }
+
+BENCHMARKS = {
+    "text-layer": run_text_layer_benchmark,
+    "preprocess": run_preprocess_benchmark
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", help="Directory with sample bills")
+    parser.add_argument("--compare", choices=sorted(BENCHMARKS), default="text-layer")
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    if not load_corpus(args.corpus_dir):
+        raise SystemExit(f"No PDF/JPG/PNG documents found in {args.corpus_dir}")
+
+    results = asyncio.run(BENCHMARKS[args.compare](args.corpus_dir))
+
+    for mode, summary in results["modes"].items():
+        line = (
+            f"{mode:<12} pages={summary['pages']:<4} ocr_pages={summary['ocr_pages']:<4} "
+            f"cpu={summary['cpu_seconds']:.2f}s wall={summary['wall_seconds']:.2f}s "
+            f"ocr/page={summary['ocr_seconds_per_page']:.2f}s"
+        )
+        if summary.get("amount_accuracy") is not None:
+            line += f" amount_accuracy={summary['amount_accuracy']:.0%}"
+        print(line)
+    if "cpu_seconds_saved" in results:
+        print(f"CPU saved: {results['cpu_seconds_saved']:.2f}s ({results['cpu_saved_pct']}%)")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+In-process load test of the main read and write endpoints
+
+Usage:
+    python -m benchmarks.bench_load [--seed-users 50] [--concurrency 20] [--duration 30] [--no-cache] [--output results.json]
+
+Requests go through httpx's ASGI transport straight into the FastAPI app
+(no network, no lifespan: the scheduler does not start), against the
+database in DATABASE_URL. Users are the ones created by benchmarks.seed;
+--seed-users seeds a fresh dataset first. Tokens are signed locally with
+SUPABASE_JWT_SECRET, which must match the backend configuration.
+
+Workers pick a random benchmark user and a weighted random route until
+--duration seconds have passed. The results report p50/p95/p99 latency,
+throughput and status codes per route, plus the git commit, so files
+from different releases can be compared (--baseline prints the p95 change).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+import httpx
+import jwt
+from benchmarks.seed import COMUNI
+
+# route name -> (weight, request builder taking the user and a random generator)
+ROUTES: Dict[str, tuple] = {
+    "GET /api/summary/": (20, lambda user, rng: ("GET", "/api/summary/", None)),
+    "GET /api/assets/": (15, lambda user, rng: ("GET", "/api/assets/", None)),
+    "GET /api/assets/?comune=": (5, lambda user, rng: ("GET", f"/api/assets/?comune={rng.choice(COMUNI)}", None)),
+    "GET /api/assets/{asset_id}": (10, lambda user, rng: ("GET", f"/api/assets/{rng.choice(user['asset_ids'])}", None)),
+    "GET /api/expenses/": (15, lambda user, rng: ("GET", "/api/expenses/", None)),
+    "GET /api/expenses/?status_filter=pending": (10, lambda user, rng: ("GET", "/api/expenses/?status_filter=pending&per_page=50", None)),
+    "GET /api/reminders/": (10, lambda user, rng: ("GET", "/api/reminders/", None)),
+    "GET /api/automations/{asset_id}": (5, lambda user, rng: ("GET", f"/api/automations/{rng.choice(user['asset_ids'])}", None)),
+    "GET /api/sync/": (5, lambda user, rng: ("GET", "/api/sync/", None)),
+    "POST /api/expenses/": (10, lambda user, rng: ("POST", "/api/expenses/", {
+        "asset_id": rng.choice(user["asset_ids"]),
+        "category": "bolletta",
+        "amount": round(rng.uniform(20, 200), 2),
+        "due_date": (datetime.now() + timedelta(days=rng.randint(1, 60))).isoformat(),
+        "status": "pending",
+        "description": "Load test"
+    }))
+}
+
+def make_token(supabase_id: str, secret: str) -> str:
+    """Supabase-like access token for a benchmark user"""
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": supabase_id, "aud": "authenticated", "iat": now, "exp": now + 3600},
+        secret,
+        algorithm="HS256"
+    )
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def summarize(samples: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Latency percentiles, throughput and status codes of a list of samples"""
+    timings = sorted(sample["seconds"] for sample in samples)
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / duration, 2),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "statuses": statuses,
+        "p50_ms": round(1000 * percentile(timings, 0.50), 2),
+        "p95_ms": round(1000 * percentile(timings, 0.95), 2),
+        "p99_ms": round(1000 * percentile(timings, 0.99), 2),
+        "max_ms": round(1000 * timings[-1], 2)
+    }
+
+async def worker(client: httpx.AsyncClient, users: List[Dict[str, Any]], routes: Dict[str, tuple],
+                 deadline: float, rng: random.Random, samples: List[Dict[str, Any]]):
+    """Send requests until the deadline"""
+    names = list(routes)
+    weights = [routes[name][0] for name in names]
+    while time.perf_counter() < deadline:
+        user = rng.choice(users)
+        name = rng.choices(names, weights)[0]
+        method, path, body = routes[name][1](user, rng)
+        start = time.perf_counter()
+        response = await client.request(method, path, json=body, headers={"Authorization": f"Bearer {user['token']}"})
+        samples.append({"route": name, "status": response.status_code, "seconds": time.perf_counter() - start})
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def run_load(concurrency: int, duration: float, routes: Dict[str, tuple], seed: int) -> Dict[str, Any]:
+    """Drive the app in process and collect per-route results"""
+    from main import app
+    from database import SessionLocal
+    from benchmarks.seed import load_bench_users
+
+    db = SessionLocal()
+    try:
+        users = [user for user in load_bench_users(db) if user["asset_ids"]]
+    finally:
+        db.close()
+    if not users:
+        raise SystemExit("No benchmark users with assets: run python -m benchmarks.seed first")
+
+    secret = os.environ["SUPABASE_JWT_SECRET"]
+    for user in users:
+        user["token"] = make_token(user["supabase_id"], secret)
+
+    samples: List[Dict[str, Any]] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm-up: one request per route
+        warmup_rng = random.Random(seed - 1)
+        for name, (_, build) in routes.items():
+            method, path, body = build(users[0], warmup_rng)
+            await client.request(method, path, json=body, headers={"Authorization": f"Bearer {users[0]['token']}"})
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, users, routes, start + duration, random.Random(seed + index), samples)
+            for index in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in samples:
+        by_route.setdefault(sample["route"], []).append(sample)
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(),
+        "users": len(users),
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "total": summarize(samples, elapsed),
+        "routes": {name: summarize(route_samples, elapsed) for name, route_samples in sorted(by_route.items())}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), help="Only these routes (default: all)")
+    parser.add_argument("--read-only", action="store_true", help="Skip the write routes")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--seed-users", type=int, help="Reset and seed this many benchmark users first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the full results as JSON")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to compare p95 against")
+    args = parser.parse_args()
+
+    routes = {name: ROUTES[name] for name in (args.routes or ROUTES)}
+    if args.read_only:
+        routes = {name: route for name, route in routes.items() if name.startswith("GET ")}
+
+    if args.seed_users:
+        from benchmarks.seed import seed_dataset
+
+        counts = seed_dataset(users=args.seed_users, seed=args.seed, reset=True)
+        print("Seeded " + ", ".join(f"{table}={count}" for table, count in counts.items()))
+
+    if args.no_cache:
+        from utils.cache import response_cache
+
+        response_cache.enabled = False
+
+    results = asyncio.run(run_load(args.concurrency, args.duration, routes, args.seed))
+    results["cache"] = not args.no_cache
+
+    for name, summary in [("TOTAL", results["total"])] + list(results["routes"].items()):
+        print(
+            f"{name:<42} n={summary['requests']:<6} {summary['throughput_rps']:>8.1f} rps "
+            f"p50={summary['p50_ms']:.1f}ms p95={summary['p95_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms "
+            f"errors={summary['errors']}"
+        )
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"\np95 vs {args.baseline} ({baseline.get('commit', 'unknown')[:12]}):")
+        for name, summary in results["routes"].items():
+            previous = baseline.get("routes", {}).get(name)
+            if previous and previous["p95_ms"]:
+                change = 100 * (summary["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+                print(f"{name:<42} {previous['p95_ms']:.1f}ms -> {summary['p95_ms']:.1f}ms ({change:+.1f}%)")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Micro benchmarks of the IMU, F24, reminder and notification hot paths
+
+Usage:
+    python -m benchmarks.bench_micro [--cases imu f24 fcm reminders] [--reminders 10000 100000 1000000]
+                                     [--output bench_micro.json] [--baseline bench_micro_v1.json] [--threshold 10]
+
+imu, f24 and fcm run in process without external services. fcm goes
+through NotificationService with a fake transport, so the time measured is
+message building and bookkeeping, not the FCM round trip. reminders runs
+SchedulerService.check_reminders against the database in DATABASE_URL: it
+inserts the requested number of due reminders on the benchmark users'
+assets (seed them first with benchmarks.seed), runs the job once per size
+and deletes them again. Already due seeded reminders are processed too.
+
+Each case reports the median and minimum time per call. With --baseline,
+cases whose median is more than --threshold percent slower are reported as
+regressions and the exit status is 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+from benchmarks.bench_load import git_commit
+
+BENCH_REMINDER_MESSAGE = "bench-micro"
+
+class FakeTransport:
+    """Stands in for firebase_admin.messaging, counting the messages it accepts"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, message) -> str:
+        self.sent += 1
+        return f"projects/bench/messages/{self.sent}"
+
+    def send_multicast(self, message):
+        self.sent += len(message.tokens)
+        return SimpleNamespace(success_count=len(message.tokens), failure_count=0, responses=[])
+
+def measure(func: Callable, repeat: int, number: int = 1) -> Dict[str, Any]:
+    """Time `number` calls `repeat` times and report the time per call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "runs": repeat * number,
+        "median_ms": round(1000 * statistics.median(timings), 4),
+        "min_ms": round(1000 * min(timings), 4)
+    }
+
+def bench_imu(repeat: int) -> Dict[str, Dict[str, Any]]:
+    from utils.imu_calc import IMUCalculator
+
+    calculator = IMUCalculator()
+    properties = [
+        {"rendita": 300 + index * 7.5, "categoria_catastale": "A/2" if index % 3 else "C/6",
+         "prima_casa": index % 4 == 0, "aliquota": None if index % 2 else 1.06}
+        for index in range(1000)
+    ]
+    return {
+        "imu.calculate_imu_annual": measure(
+            lambda: calculator.calculate_imu_annual(Decimal("1250.50"), "A/2", Decimal("1.06")), repeat, 1000
+        ),
+        "imu.calculate_imu_for_property": measure(
+            lambda: calculator.calculate_imu_for_property(properties[1]), repeat, 1000
+        ),
+        "imu.calculate_imu_for_property[batch=1000]": measure(
+            lambda: [calculator.calculate_imu_for_property(details) for details in properties], repeat
+        )
+    }
+
+def bench_f24(repeat: int) -> Dict[str, Dict[str, Any]]:
+    from utils.f24_pdf import F24Generator
+    from utils.imu_calc import IMUCalculator
+
+    generator = F24Generator()
+    property_data = {"indirizzo": "Via Roma 1", "comune": "Bologna", "categoria_catastale": "A/2", "rendita": 1250.50}
+    taxpayer_data = {"codice_fiscale": "RSSMRA80A01A944X", "nome_completo": "Mario Rossi",
+                     "indirizzo": "Via Roma 1", "comune": "Bologna", "cap": "40100", "provincia": "BO"}
+    calculation = IMUCalculator().calculate_imu_for_property({"rendita": 1250.50, "categoria_catastale": "A/2"})
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "F24.pdf")
+        result = measure(
+            lambda: generator.generate_imu_f24(taxpayer_data, property_data, calculation, "primo", output_path),
+            repeat
+        )
+        result["size_bytes"] = os.path.getsize(output_path)
+    return {"f24.generate_imu_f24": result}
+
+def bench_fcm(repeat: int) -> Dict[str, Dict[str, Any]]:
+    from utils.notifier import NotificationService
+
+    service = NotificationService(transport=FakeTransport())
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        # FCM accepts at most 500 tokens per multicast message
+        for size in (1, 100, 500):
+            tokens = [f"token-{index}" for index in range(size)]
+            results[f"fcm.send_bulk_notifications[tokens={size}]"] = measure(
+                lambda: loop.run_until_complete(
+                    service.send_bulk_notifications(tokens, "Promemoria", "Scadenza bollo", {"type": "bench"})
+                ),
+                repeat, 100
+            )
+    finally:
+        loop.close()
+    return results
+
+def bench_reminders(sizes: List[int]) -> Dict[str, Dict[str, Any]]:
+    from sqlalchemy import delete
+    from database import SessionLocal
+    from models import Reminder
+    from benchmarks.seed import bulk_insert, load_bench_users
+    from utils.notifier import NotificationService
+    from utils.scheduler import SchedulerService
+
+    db = SessionLocal()
+    try:
+        asset_ids = [asset_id for user in load_bench_users(db) for asset_id in user["asset_ids"]]
+    finally:
+        db.close()
+    if not asset_ids:
+        raise SystemExit("No benchmark assets: run python -m benchmarks.seed first")
+
+    transport = FakeTransport()
+    scheduler_service = SchedulerService(notification_service=NotificationService(transport=transport))
+    due_date = datetime.now() - timedelta(days=1)
+    results = {}
+    for size in sizes:
+        db = SessionLocal()
+        try:
+            for offset in range(0, size, 10000):
+                bulk_insert(db, Reminder, [
+                    {"asset_id": asset_ids[index % len(asset_ids)], "type": "bollo", "date": due_date,
+                     "message": BENCH_REMINDER_MESSAGE, "notified": False}
+                    for index in range(offset, min(size, offset + 10000))
+                ])
+                db.commit()
+
+            sent_before = transport.sent
+            start = time.perf_counter()
+            asyncio.run(scheduler_service.check_reminders())
+            elapsed = time.perf_counter() - start
+            sent = transport.sent - sent_before
+            results[f"scheduler.check_reminders[reminders={size}]"] = {
+                "runs": 1,
+                "median_ms": round(1000 * elapsed, 4),
+                "min_ms": round(1000 * elapsed, 4),
+                "notifications": sent,
+                "per_reminder_us": round(1e6 * elapsed / max(sent, 1), 2)
+            }
+        finally:
+            db.execute(delete(Reminder).where(Reminder.message == BENCH_REMINDER_MESSAGE))
+            db.commit()
+            db.close()
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the median change per case and return the cases slower than the threshold"""
+    regressions = []
+    print(f"\nmedian vs baseline ({baseline.get('commit', 'unknown')[:12]}), threshold {threshold:.0f}%:")
+    for name, case in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if not previous or not previous["median_ms"]:
+            print(f"{name:<52} new")
+            continue
+        change = 100 * (case["median_ms"] - previous["median_ms"]) / previous["median_ms"]
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<52} {previous['median_ms']:.3f}ms -> {case['median_ms']:.3f}ms ({change:+.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=["imu", "f24", "fcm", "reminders"], default=["imu", "f24", "fcm", "reminders"])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per case")
+    parser.add_argument("--reminders", nargs="+", type=int, default=[10000, 100000, 1000000], help="Reminder counts for check_reminders")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=10, help="Regression threshold on the median, in percent")
+    args = parser.parse_args()
+
+    cases: Dict[str, Dict[str, Any]] = {}
+    if "imu" in args.cases:
+        cases.update(bench_imu(args.repeat))
+    if "f24" in args.cases:
+        cases.update(bench_f24(args.repeat))
+    if "fcm" in args.cases:
+        cases.update(bench_fcm(args.repeat))
+    if "reminders" in args.cases:
+        cases.update(bench_reminders(args.reminders))
+
+    results = {"commit": git_commit(), "started_at": datetime.now().isoformat(), "cases": cases}
+    for name, case in cases.items():
+        extra = " ".join(f"{key}={value}" for key, value in case.items() if key not in ("runs", "median_ms", "min_ms"))
+        print(f"{name:<52} median={case['median_ms']:.3f}ms min={case['min_ms']:.3f}ms n={case['runs']} {extra}")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}%")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Response serialization benchmarks
+
+Usage:
+    python -m benchmarks.bench_serialization [--items 1000] [--repeat 50] [--output results.json]
+
+Serializes a page of in-memory Expense rows through FastAPI's response
+handling the way the expenses list endpoint does, in two modes:
+
+- before: untyped ResponseWrapper, `from_orm` per row, stdlib JSONResponse
+- after: ResponseWrapper[PaginatedResponse[Expense]] validated once from the
+  ORM objects, ORJSONResponse
+
+No database is needed: rows are transient model instances.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import Expense
+from schemas import Expense as ExpenseSchema, ResponseWrapper, PaginatedResponse
+
+def make_expenses(count: int) -> List[Expense]:
+    """Build transient expense rows"""
+    now = datetime.now()
+    return [
+        Expense(
+            id=index + 1,
+            user_id=1,
+            asset_id=index % 5 + 1,
+            category=("imu", "bollo", "assicurazione", "bolletta")[index % 4],
+            amount=Decimal("100.00") + index,
+            due_date=now + timedelta(days=index % 90),
+            status="pending",
+            description=f"Spesa {index + 1}",
+            created_at=now,
+            updated_at=None
+        )
+        for index in range(count)
+    ]
+
+def page_data(expenses: List[Any]) -> Dict[str, Any]:
+    """Paginated payload holding all the rows in one page"""
+    total = len(expenses)
+    return {"items": expenses, "total": total, "page": 1, "per_page": total, "pages": 1}
+
+async def serialize_before(field, expenses: List[Expense]) -> bytes:
+    """Untyped wrapper built from per-row schemas, rendered with the stdlib encoder"""
+    content = ResponseWrapper(
+        success=True,
+        message="Expenses retrieved successfully",
+        data=PaginatedResponse(**page_data([ExpenseSchema.from_orm(expense) for expense in expenses]))
+    )
+    body = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(body).body
+
+async def serialize_after(field, expenses: List[Expense]) -> bytes:
+    """Typed response model validated from the ORM rows, rendered with orjson"""
+    content = {
+        "success": True,
+        "message": "Expenses retrieved successfully",
+        "data": page_data(expenses)
+    }
+    body = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return ORJSONResponse(body).body
+
+async def run_benchmark(items: int, repeat: int) -> Dict[str, Any]:
+    """Time both serialization modes on the same rows"""
+    expenses = make_expenses(items)
+    modes = {
+        "before": (serialize_before, create_response_field("before", ResponseWrapper)),
+        "after": (
+            serialize_after,
+            create_response_field("after", ResponseWrapper[PaginatedResponse[ExpenseSchema]])
+        )
+    }
+
+    results = {}
+    for mode, (serialize, field) in modes.items():
+        body = await serialize(field, expenses)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await serialize(field, expenses)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[mode] = {
+            "median_ms": round(1000 * timings[len(timings) // 2], 3),
+            "min_ms": round(1000 * timings[0], 3),
+            "bytes": len(body)
+        }
+
+    return {
+        "items": items,
+        "repeat": repeat,
+        "modes": results,
+        "speedup": round(results["before"]["median_ms"] / results["after"]["median_ms"], 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.items, args.repeat))
+
+    for mode, summary in results["modes"].items():
+        print(
+            f"{mode:<8} items={results['items']} median={summary['median_ms']:.2f}ms "
+            f"min={summary['min_ms']:.2f}ms bytes={summary['bytes']}"
+        )
+    print(f"Speedup: {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Cold start time of the backend compared with a bare FastAPI import
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 10] [--output bench_startup.json]
+
+Each sample is a fresh interpreter running the statement, so module caches
+don't carry over; the difference between "import main" and
+"import fastapi" is what the application adds. For a per-module breakdown:
+
+    python -X importtime -c "import main" 2> importtime.log
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+from benchmarks.bench_load import git_commit
+
+STATEMENTS = {
+    "python": "pass",
+    "fastapi": "import fastapi",
+    "main": "import main"
+}
+
+def time_statement(statement: str, repeat: int) -> Dict[str, Any]:
+    """Wall time of a fresh interpreter running the statement"""
+    env = dict(os.environ, ENABLE_SCHEDULER="false")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], env=env, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return {"median_ms": round(1000 * statistics.median(timings), 1), "min_ms": round(1000 * min(timings), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), "cases": {name: time_statement(statement, args.repeat) for name, statement in STATEMENTS.items()}}
+    for name, case in results["cases"].items():
+        print(f"{name:<10} median={case['median_ms']:.1f}ms min={case['min_ms']:.1f}ms")
+    overhead = results["cases"]["main"]["median_ms"] - results["cases"]["fastapi"]["median_ms"]
+    print(f"\napplication overhead over import fastapi: {overhead:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Home screen latency benchmark: /api/summary vs the multi-call flow
+
+Usage:
+    python -m benchmarks.bench_summary --token $SUPABASE_JWT [--base-url http://localhost:8080] [--repeat 20]
+
+The multi-call flow is what the app does without the summary endpoint:
+profile, assets, one automation per asset, reminders and pending expenses,
+one request after the other. Each flow is timed end to end against a
+running backend; run it from the network the app uses to include its RTT.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Any, List
+import httpx
+
+async def multi_call_flow(client: httpx.AsyncClient) -> int:
+    """Load the home screen the old way, returns the number of requests"""
+    requests = 0
+    for path, params in (
+        ("/api/auth/profile", None),
+        ("/api/assets/", {"per_page": 100})
+    ):
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        requests += 1
+
+    assets = response.json()["data"]["items"]
+    for asset in assets:
+        # Assets without automations answer 404, still a round trip
+        await client.get(f"/api/automations/{asset['id']}")
+        requests += 1
+
+    for path, params in (
+        ("/api/reminders/", {"per_page": 100}),
+        ("/api/expenses/", {"status_filter": "pending", "per_page": 100})
+    ):
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        requests += 1
+
+    return requests
+
+async def summary_flow(client: httpx.AsyncClient) -> int:
+    """Load the home screen with the summary endpoint"""
+    response = await client.get("/api/summary/")
+    response.raise_for_status()
+    return 1
+
+async def time_flow(client: httpx.AsyncClient, flow, repeat: int) -> Dict[str, Any]:
+    """Run a flow `repeat` times after a warm-up and collect latency percentiles"""
+    requests = await flow(client)
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await flow(client)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "requests": requests,
+        "p50_ms": round(1000 * timings[len(timings) // 2], 2),
+        "p95_ms": round(1000 * timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "min_ms": round(1000 * timings[0], 2)
+    }
+
+async def run_benchmark(base_url: str, token: str, repeat: int) -> Dict[str, Any]:
+    """Compare both flows against a running backend"""
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        multi_call = await time_flow(client, multi_call_flow, repeat)
+        summary = await time_flow(client, summary_flow, repeat)
+
+    return {
+        "base_url": base_url,
+        "repeat": repeat,
+        "modes": {"multi_call": multi_call, "summary": summary},
+        "speedup_p50": round(multi_call["p50_ms"] / summary["p50_ms"], 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--token", required=True, help="Supabase access token of a test user")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.base_url, args.token, args.repeat))
+
+    for mode, summary in results["modes"].items():
+        print(
+            f"{mode:<11} requests={summary['requests']:<3} p50={summary['p50_ms']:.1f}ms "
+            f"p95={summary['p95_ms']:.1f}ms min={summary['min_ms']:.1f}ms"
+        )
+    print(f"Speedup (p50): {results['speedup_p50']}x")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Synthetic dataset for load tests
+
+Usage:
+    python -m benchmarks.seed [--users 50] [--properties 2] [--vehicles 1] [--years 3] [--seed 42] [--reset]
+
+Creates benchmark users (supabase_id "bench-<n>") with properties and
+vehicles, automations, years of monthly bills, IMU installments, vehicle
+expenses and reminders, with bulk INSERT ... RETURNING per table. The
+generator is seeded, so the same arguments always produce the same data.
+--reset deletes the previous benchmark users and everything they own first
+(required to seed again, user emails are unique).
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine
+from models import Base, User, Asset, Expense, Reminder, Automation, Document, Tombstone
+
+BENCH_PREFIX = "bench-"
+
+COMUNI = ["Roma", "Milano", "Torino", "Napoli", "Bologna", "Firenze", "Genova", "Bari"]
+CATEGORIE_CATASTALI = ["A/2", "A/3", "A/4", "A/7", "C/6"]
+VEHICLES = [("Fiat", "Panda"), ("Volkswagen", "Golf"), ("Toyota", "Yaris"), ("Renault", "Clio")]
+UTILITIES = [("luce", 40, 140), ("gas", 25, 180), ("acqua", 15, 60), ("internet", 25, 35)]
+
+def bench_supabase_id(index: int) -> str:
+    return f"{BENCH_PREFIX}{index}"
+
+def reset_dataset(db: Session):
+    """Delete the benchmark users and all their rows"""
+    user_ids = select(User.id).where(User.supabase_id.like(f"{BENCH_PREFIX}%"))
+    asset_ids = select(Asset.id).where(Asset.user_id.in_(user_ids))
+    for model in (Reminder, Automation, Document):
+        db.execute(delete(model).where(model.asset_id.in_(asset_ids)))
+    db.execute(delete(Expense).where(Expense.user_id.in_(user_ids)))
+    db.execute(delete(Tombstone).where(Tombstone.user_id.in_(user_ids)))
+    db.execute(delete(Asset).where(Asset.user_id.in_(user_ids)))
+    db.execute(delete(User).where(User.id.in_(user_ids)))
+    db.commit()
+
+def bulk_insert(db: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert rows in one executemany and return their ids in order"""
+    if not rows:
+        return []
+    return list(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+
+def property_details(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "comune": rng.choice(COMUNI),
+        "categoria_catastale": rng.choice(CATEGORIE_CATASTALI),
+        "rendita_catastale": round(rng.uniform(300, 2500), 2),
+        "abitazione_principale": rng.random() < 0.3,
+        "aliquota_imu": round(rng.uniform(0.76, 1.14), 2)
+    }
+
+def vehicle_details(rng: random.Random) -> Dict[str, Any]:
+    brand, model = rng.choice(VEHICLES)
+    return {
+        "marca": brand,
+        "modello": model,
+        "targa": f"{rng.choice('ABCDEFGH')}{rng.choice('ABCDEFGH')}{rng.randint(100, 999)}{rng.choice('XYZ')}{rng.choice('XYZ')}",
+        "kw": rng.randint(44, 110),
+        "immatricolazione": f"{rng.randint(2010, 2023)}-{rng.randint(1, 12):02d}-01"
+    }
+
+def expense_status(due_date: datetime, now: datetime, rng: random.Random) -> str:
+    if due_date > now:
+        return "pending"
+    return "paid" if rng.random() < 0.95 else "overdue"
+
+def seed_dataset(users: int = 50, properties: int = 2, vehicles: int = 1, years: int = 3,
+                 seed: int = 42, reset: bool = False) -> Dict[str, int]:
+    """Create the dataset and return the number of rows per table"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_month = now - timedelta(days=365 * years)
+
+    db = SessionLocal()
+    try:
+        if reset:
+            reset_dataset(db)
+
+        user_ids = bulk_insert(db, User, [
+            {"email": f"{bench_supabase_id(index)}@example.com", "name": f"Utente {index}", "supabase_id": bench_supabase_id(index)}
+            for index in range(users)
+        ])
+
+        asset_rows = []
+        for user_id in user_ids:
+            for index in range(properties):
+                asset_rows.append({"user_id": user_id, "type": "property", "name": f"Immobile {index + 1}", "details_json": property_details(rng)})
+            for index in range(vehicles):
+                asset_rows.append({"user_id": user_id, "type": "vehicle", "name": f"Veicolo {index + 1}", "details_json": vehicle_details(rng)})
+        asset_ids = bulk_insert(db, Asset, asset_rows)
+        assets = [dict(row, id=asset_id) for row, asset_id in zip(asset_rows, asset_ids)]
+
+        automation_rows = [{
+            "asset_id": asset["id"],
+            "imu_calc": asset["type"] == "property",
+            "f24_gen": asset["type"] == "property" and rng.random() < 0.5,
+            "ocr": rng.random() < 0.5,
+            "ai_suggestions": rng.random() < 0.3
+        } for asset in assets]
+
+        expense_rows, reminder_rows = [], []
+        for asset in assets:
+            user_id, asset_id = asset["user_id"], asset["id"]
+            renewal_month = rng.randint(1, 12)
+            month = first_month.replace(day=1)
+            while month <= now + timedelta(days=90):
+                if asset["type"] == "property":
+                    for utility, low, high in UTILITIES:
+                        if utility in ("luce", "gas") or month.month % 2 == 0:
+                            due_date = month + timedelta(days=rng.randint(10, 25))
+                            expense_rows.append({
+                                "user_id": user_id, "asset_id": asset_id, "category": "bolletta",
+                                "amount": Decimal(str(round(rng.uniform(low, high), 2))), "due_date": due_date,
+                                "status": expense_status(due_date, now, rng), "description": f"Bolletta {utility}"
+                            })
+                    if month.month in (6, 12):
+                        due_date = month.replace(day=16)
+                        expense_rows.append({
+                            "user_id": user_id, "asset_id": asset_id, "category": "imu",
+                            "amount": Decimal(str(round(rng.uniform(150, 900), 2))), "due_date": due_date,
+                            "status": expense_status(due_date, now, rng),
+                            "description": f"IMU {'acconto' if month.month == 6 else 'saldo'} {month.year}"
+                        })
+                        reminder_rows.append({
+                            "asset_id": asset_id, "type": "imu", "date": due_date - timedelta(days=15),
+                            "message": f"Pagamento IMU per {asset['name']}", "notified": due_date < now
+                        })
+                elif month.month == renewal_month:
+                    for category, low, high in (("bollo", 120, 400), ("assicurazione", 300, 900)):
+                        due_date = month + timedelta(days=rng.randint(0, 27))
+                        expense_rows.append({
+                            "user_id": user_id, "asset_id": asset_id, "category": category,
+                            "amount": Decimal(str(round(rng.uniform(low, high), 2))), "due_date": due_date,
+                            "status": expense_status(due_date, now, rng), "description": f"{category.capitalize()} {asset['name']}"
+                        })
+                        reminder_rows.append({
+                            "asset_id": asset_id, "type": category, "date": due_date - timedelta(days=7),
+                            "message": f"Scadenza {category} per {asset['name']}", "notified": due_date < now
+                        })
+                month = (month + timedelta(days=32)).replace(day=1)
+
+        bulk_insert(db, Automation, automation_rows)
+        bulk_insert(db, Expense, expense_rows)
+        bulk_insert(db, Reminder, reminder_rows)
+        db.commit()
+
+        return {
+            "users": len(user_ids),
+            "assets": len(asset_ids),
+            "automations": len(automation_rows),
+            "expenses": len(expense_rows),
+            "reminders": len(reminder_rows)
+        }
+    finally:
+        db.close()
+
+def load_bench_users(db: Session) -> List[Dict[str, Any]]:
+    """Benchmark users with the ids of their assets"""
+    users = {
+        user_id: {"id": user_id, "supabase_id": supabase_id, "asset_ids": []}
+        for user_id, supabase_id in db.execute(
+            select(User.id, User.supabase_id).where(User.supabase_id.like(f"{BENCH_PREFIX}%"))
+        )
+    }
+    for asset_id, user_id in db.execute(select(Asset.id, Asset.user_id).where(Asset.user_id.in_(users))):
+        users[user_id]["asset_ids"].append(asset_id)
+    return list(users.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--properties", type=int, default=2, help="Properties per user")
+    parser.add_argument("--vehicles", type=int, default=1, help="Vehicles per user")
+    parser.add_argument("--years", type=int, default=3, help="Years of expense history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Delete previous benchmark data first")
+    args = parser.parse_args()
+
+    counts = seed_dataset(args.users, args.properties, args.vehicles, args.years, args.seed, args.reset)
+    print(", ".join(f"{table}={count}" for table, count in counts.items()))
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,159 @@
 """
 Casa&Più - FastAPI Backend Main Entry Point
 """
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 import os
 from contextlib import asynccontextmanager
 
-from database import engine, Base, get_database
-from api import auth, assets, expenses, reminders, automations, suggestions, f24
-from utils.notifier import NotificationService
-from utils.scheduler import SchedulerService
-
-# Create all tables
-Base.metadata.create_all(bind=engine)
+from database import engine, init_db
+from api import auth, assets, expenses, reminders, automations, suggestions, f24, documents, summary, batch, sync
+from utils.document_pipeline import shutdown_ocr_pool
+from utils.compression import CompressionMiddleware
+from utils.cache import response_cache
+from utils.rate_limit import rate_limiter
+from utils.metrics import MetricsMiddleware, observe_pool, metrics_response, record_startup, mark_process_dead
+from utils import query_tracker
+from utils.services import get_scheduler_service, get_health_checker, ENABLE_SCHEDULER, DB_CREATE_TABLES
+from utils.profiling import ProfilingMiddleware, PROFILING_ENABLED
+from utils import tracing
 
-# Initialize services
-notification_service = NotificationService()
-scheduler_service = SchedulerService()
+record_startup("import", time.perf_counter() - _import_started)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     print("🚀 Starting Casa&Più Backend...")
-    await scheduler_service.start()
-    print("✅ Scheduler started")
+    started = time.perf_counter()
+    if DB_CREATE_TABLES:
+        # Create all tables
+        await run_in_threadpool(init_db)
+    if ENABLE_SCHEDULER:
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            print("⚠️ ENABLE_SCHEDULER with several workers: each one runs the jobs, use python -m scheduler instead")
+        await get_scheduler_service().start()
+        print("✅ Scheduler started")
+    record_startup("lifespan", time.perf_counter() - started)
     
     yield
     
     # Shutdown
-    await scheduler_service.shutdown()
+    if ENABLE_SCHEDULER:
+        await get_scheduler_service().shutdown()
+    shutdown_ocr_pool()
+    mark_process_dead()
     print("🛑 Casa&Più Backend stopped")
 
-# Create FastAPI app
-app = FastAPI(
-    title="Casa&Più API",
-    description="Family Expense Management for Real Estate and Vehicles",
-    version="1.0.0",
-    lifespan=lifespan
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure properly for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(assets.router, prefix="/api/assets", tags=["Assets"])
-app.include_router(expenses.router, prefix="/api/expenses", tags=["Expenses"])
-app.include_router(reminders.router, prefix="/api/reminders", tags=["Reminders"])
-app.include_router(automations.router, prefix="/api/automations", tags=["Automations"])
-app.include_router(suggestions.router, prefix="/api/suggestions", tags=["AI Suggestions"])
-app.include_router(f24.router, prefix="/api/f24", tags=["F24"])
-
-# Static files for PDFs and uploads
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-@app.get("/")
-async def root():
-    """Health check endpoint"""
-    return {
-        "message": "Casa&Più Backend API", 
-        "status": "healthy",
-        "version": "1.0.0"
-    }
-
-@app.get("/health")
-async def health_check():
-    """Detailed health check"""
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "scheduler": "running",
-        "notifications": "enabled"
-    }
+def create_app() -> FastAPI:
+    """Build the application.
+
+    Nothing here connects to the database, Supabase or Firebase: tables are
+    created and the scheduler started in the lifespan, and the services are
+    built on first use (see utils.services).
+    """
+    started = time.perf_counter()
+
+    # SQL statement counts per request and pool gauges for /metrics
+    query_tracker.install(engine)
+    observe_pool(engine)
+
+    # SQL spans when TRACING_EXPORTER is set
+    tracing.install(engine)
+
+    # Create FastAPI app
+    app = FastAPI(
+        title="Casa&Più API",
+        description="Family Expense Management for Real Estate and Vehicles",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
+    )
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure properly for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Retry-After", "X-Profile-File", "X-Trace-Id"],
+    )
+
+    # gzip/brotli for responses above COMPRESSION_MIN_SIZE
+    app.add_middleware(CompressionMiddleware)
+
+    # Root span per request, a pass-through when TRACING_EXPORTER is none
+    app.add_middleware(tracing.TracingMiddleware)
+
+    # Sampling profiler, not installed at all unless PROFILING_ENABLED
+    if PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    # Per-route latency, status and SQL metrics, outermost so it times the whole stack
+    app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(assets.router, prefix="/api/assets", tags=["Assets"])
+    app.include_router(expenses.router, prefix="/api/expenses", tags=["Expenses"])
+    app.include_router(reminders.router, prefix="/api/reminders", tags=["Reminders"])
+    app.include_router(automations.router, prefix="/api/automations", tags=["Automations"])
+    app.include_router(suggestions.router, prefix="/api/suggestions", tags=["AI Suggestions"])
+    app.include_router(f24.router, prefix="/api/f24", tags=["F24"])
+    app.include_router(documents.router, prefix="/api/documents", tags=["Documents"])
+    app.include_router(summary.router, prefix="/api/summary", tags=["Summary"])
+    app.include_router(batch.router, prefix="/api/batch", tags=["Batch"])
+    app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+
+    # Static files for PDFs and uploads
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    @app.get("/")
+    async def root():
+        """Health check endpoint"""
+        return {
+            "message": "Casa&Più Backend API", 
+            "status": "healthy",
+            "version": "1.0.0"
+        }
+
+    @app.get("/health/live")
+    async def liveness():
+        """Liveness probe: the process answers, no dependency is checked"""
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def readiness():
+        """Readiness probe: 503 when the database is unreachable or the pool is exhausted"""
+        report = await get_health_checker().check()
+        return ORJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+    @app.get("/health")
+    async def health_check():
+        """Detailed health check"""
+        report = await get_health_checker().check()
+        return ORJSONResponse(
+            {**report, "cache": response_cache.stats(), "rate_limit": rate_limiter.stats()},
+            status_code=200 if report["ready"] else 503
+        )
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics"""
+        return metrics_response()
+
+    record_startup("app", time.perf_counter() - started)
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
     uvicorn.run(
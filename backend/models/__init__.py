@@ -1,7 +1,8 @@
 """
 Database models for Casa&Più application
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, DECIMAL, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, DECIMAL, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -32,9 +33,23 @@ class Asset(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     type = Column(String, nullable=False)  # 'property' or 'vehicle'
     name = Column(String, nullable=False)
-    details_json = Column(JSON)  # Store specific details based on type
+    details_json = Column(JSON().with_variant(JSONB(), "postgresql"))  # Store specific details based on type
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("idx_assets_user_updated_at", "user_id", "updated_at"),
+        # Detail keys the API filters on, same expressions as the filters in api/assets.py
+        Index("idx_assets_details_comune", func.lower(details_json["comune"].as_string())).ddl_if(dialect="postgresql"),
+        Index("idx_assets_details_categoria", func.upper(details_json["categoria_catastale"].as_string())).ddl_if(dialect="postgresql"),
+        Index("idx_assets_details_targa", func.upper(details_json["targa"].as_string())).ddl_if(dialect="postgresql"),
+        # Containment (@>) on any other key, e.g. scadenza fields
+        Index(
+            "idx_assets_details_gin", details_json,
+            postgresql_using="gin",
+            postgresql_ops={"details_json": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
     
     # Relationships
     owner = relationship("User", back_populates="assets")
@@ -56,7 +71,11 @@ class Expense(Base):
     status = Column(String, default="pending")  # 'pending', 'paid', 'overdue'
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("idx_expenses_user_updated_at", "user_id", "updated_at"),
+    )
     
     # Relationships
     user = relationship("User", back_populates="expenses")
@@ -73,6 +92,17 @@ class Reminder(Base):
     message = Column(Text, nullable=False)
     notified = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("idx_reminders_asset_updated_at", "asset_id", "updated_at"),
+        # Pending reminders only: the due scan and a user's manual run read just these rows
+        Index(
+            "idx_reminders_pending_asset_date", "asset_id", "date",
+            postgresql_where=notified == False,
+            sqlite_where=notified == False
+        ),
+    )
     
     # Relationships
     asset = relationship("Asset", back_populates="reminders")
@@ -88,7 +118,11 @@ class Automation(Base):
     ocr = Column(Boolean, default=False)
     ai_suggestions = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("idx_automations_asset_updated_at", "asset_id", "updated_at"),
+    )
     
     # Relationships
     asset = relationship("Asset", back_populates="automations")
@@ -101,8 +135,31 @@ class Document(Base):
     asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
     file_url = Column(String, nullable=False)
     file_type = Column(String, nullable=False)  # 'pdf', 'jpg', 'png'
+    content_hash = Column(String(64), index=True)  # SHA-256 of the file content
+    size_bytes = Column(Integer)
+    thumbnail_url = Column(String)
     parsed_data_json = Column(JSON)  # OCR extracted data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("uq_documents_asset_hash", "asset_id", "content_hash", unique=True),
+        Index("idx_documents_asset_updated_at", "asset_id", "updated_at"),
+    )
     
     # Relationships
-    asset = relationship("Asset", back_populates="documents")
\ No newline at end of file
+    asset = relationship("Asset", back_populates="documents")
+
+class Tombstone(Base):
+    """Deleted rows, kept so delta sync can report deletions"""
+    __tablename__ = "tombstones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)  # 'asset', 'expense', 'reminder', 'automation', 'document'
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_tombstones_user_deleted_at", "user_id", "deleted_at"),
+    )
@@ -0,0 +1,95 @@
+"""
+Casa&Più - Scheduler process entrypoint
+
+Usage:
+    python -m scheduler                      # run the recurring jobs until SIGTERM
+    python -m scheduler --run check_reminders  # run one job once and exit
+
+Runs the APScheduler jobs (reminders, IMU, vehicles, tombstone purge) and
+their notifications outside the API, so the web service can run several
+uvicorn workers with ENABLE_SCHEDULER=false and each side is scaled and
+profiled on its own. Uses the same database.py, models and utils as the API.
+With SCHEDULER_METRICS_PORT set, Prometheus metrics of this process are
+served on that port.
+"""
+import time
+_import_started = time.perf_counter()
+
+import os
+import signal
+import asyncio
+import argparse
+import logging
+from database import engine
+from utils.metrics import observe_pool, record_startup
+from utils import query_tracker
+from utils import tracing
+from utils.services import get_scheduler_service
+
+logger = logging.getLogger("scheduler")
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Port of the Prometheus endpoint of the scheduler process, off when unset
+SCHEDULER_METRICS_PORT = os.getenv("SCHEDULER_METRICS_PORT")
+
+JOBS = {
+    "check_reminders": "check_reminders",
+    "check_imu_reminders": "check_imu_reminders",
+    "check_vehicle_reminders": "check_vehicle_reminders",
+    "tombstone_purge": "purge_tombstones"
+}
+
+async def run_forever():
+    """Start the scheduler and keep it running until SIGINT or SIGTERM"""
+    scheduler_service = get_scheduler_service()
+    if scheduler_service.scheduler is None:
+        # setup_scheduler logged why; idling here would silently run no job
+        logger.error("Scheduler could not be configured, exiting")
+        raise SystemExit(1)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    started = time.perf_counter()
+    if not await scheduler_service.start():
+        # schedule_recurring_jobs logged why; without jobs there is nothing to run
+        await scheduler_service.shutdown()
+        logger.error("Recurring jobs could not be scheduled, exiting")
+        raise SystemExit(1)
+    record_startup("lifespan", time.perf_counter() - started)
+    logger.info("✅ Scheduler process started")
+
+    await stop.wait()
+
+    await scheduler_service.shutdown()
+    logger.info("🛑 Scheduler process stopped")
+
+async def run_once(job: str):
+    """Run a single job now, without starting the scheduler"""
+    await getattr(get_scheduler_service(), JOBS[job])()
+    logger.info(f"Job {job} finished")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run", choices=list(JOBS), help="Run this job once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    record_startup("import", time.perf_counter() - _import_started)
+
+    # Same SQL instrumentation as the API: per-job query counts, pool gauges, spans
+    query_tracker.install(engine)
+    observe_pool(engine)
+    tracing.install(engine)
+
+    if SCHEDULER_METRICS_PORT and not args.run:
+        from prometheus_client import start_http_server
+
+        start_http_server(int(SCHEDULER_METRICS_PORT))
+        logger.info(f"Metrics on port {SCHEDULER_METRICS_PORT}")
+
+    asyncio.run(run_once(args.run) if args.run else run_forever())
+
+if __name__ == "__main__":
+    main()
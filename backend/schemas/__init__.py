@@ -2,7 +2,7 @@
 Pydantic schemas for request/response models
 """
 from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Generic, TypeVar
 from datetime import datetime
 from decimal import Decimal
 
@@ -106,10 +106,26 @@ class Reminder(ReminderBase):
     id: int
     notified: bool = False
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class ReminderRunItem(BaseModel):
+    id: int
+    asset_id: int
+    asset_name: str
+    type: str
+    date: datetime
+    sent: bool
+
+class ReminderRunResult(BaseModel):
+    processed: int
+    sent: int
+    reminders: List[ReminderRunItem]
+    ran_at: datetime
+    debounced: bool  # True when this is the result of a recent run
+
 # Automation schemas
 class AutomationBase(BaseModel):
     asset_id: int
@@ -147,11 +163,71 @@ class DocumentCreate(DocumentBase):
 
 class Document(DocumentBase):
     id: int
+    content_hash: Optional[str] = None
+    size_bytes: Optional[int] = None
+    thumbnail_url: Optional[str] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Home screen summary schemas
+class AssetSummary(Asset):
+    automations: List[Automation] = []
+    reminders: List[Reminder] = []
+    expenses: List[Expense] = []
+
+class MonthlyTotals(BaseModel):
+    month: str
+    total: Decimal
+    paid: Decimal
+    pending: Decimal
+    by_category: Dict[str, Decimal]
+
+class HomeSummary(BaseModel):
+    user: User
+    assets: List[AssetSummary]
+    unassigned_expenses: List[Expense]
+    month_totals: MonthlyTotals
+
+# Delta sync schemas
+class DeletedEntity(BaseModel):
+    entity: str
+    entity_id: int
+    deleted_at: datetime
     
     class Config:
         from_attributes = True
 
+class SyncResponse(BaseModel):
+    token: str  # Pass as `since` on the next sync
+    full: bool  # True when the client must replace its local data
+    assets: List[Asset]
+    expenses: List[Expense]
+    reminders: List[Reminder]
+    automations: List[Automation]
+    documents: List[Document]
+    deleted: List[DeletedEntity]
+
+# Batch schemas
+class BatchOperation(BaseModel):
+    id: Optional[str] = None  # Client reference, echoed in the result
+    op: str  # e.g. 'expense.update'
+    params: Dict[str, Any] = {}  # Path parameters, e.g. {"expense_id": 3}
+    body: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = False
+
+class BatchOperationResult(BaseModel):
+    id: Optional[str] = None
+    op: str
+    status: int
+    data: Optional[Any] = None
+    detail: Optional[str] = None
+
 # IMU calculation schemas
 class IMUCalculationRequest(BaseModel):
     rendita: Decimal
@@ -165,6 +241,10 @@ class IMUCalculationResponse(BaseModel):
     scadenza_primo: str
     scadenza_secondo: str
 
+class F24GenerateResponse(BaseModel):
+    file_url: str
+    path: str
+
 # AI Suggestion schemas
 class AISuggestionRequest(BaseModel):
     asset_id: Optional[int] = None
@@ -176,13 +256,17 @@ class AISuggestionResponse(BaseModel):
     analysis: str
 
 # Response wrappers
-class ResponseWrapper(BaseModel):
+# Parametrize per endpoint (ResponseWrapper[Expense]) so FastAPI validates the
+# returned ORM objects once; the bare classes keep accepting any payload
+T = TypeVar("T")
+
+class ResponseWrapper(BaseModel, Generic[T]):
     success: bool
     message: str
-    data: Optional[Any] = None
+    data: Optional[T] = None
 
-class PaginatedResponse(BaseModel):
-    items: List[Any]
+class PaginatedResponse(BaseModel, Generic[T]):
+    items: List[T]
     total: int
     page: int
     per_page: int
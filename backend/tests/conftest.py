@@ -0,0 +1,101 @@
+"""
+Shared fixtures: a throwaway SQLite database and no external services
+"""
+import os
+import tempfile
+
+# Set before any application module reads its configuration at import
+_db_dir = tempfile.mkdtemp(prefix="casapiu-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["ENABLE_SCHEDULER"] = "false"
+os.environ["DB_CREATE_TABLES"] = "false"
+os.environ["REDIS_URL"] = ""
+os.environ["WEB_CONCURRENCY"] = "1"
+os.environ["FIREBASE_KEY_PATH"] = ""
+# A route over its query budget fails the test that calls it
+os.environ["QUERY_BUDGET_STRICT"] = "true"
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine, get_database
+from models import Base, User
+from utils import query_tracker
+from utils.auth import get_current_user
+from utils.cache import MemoryCacheBackend, response_cache
+from utils.services import reset_services
+
+# Statement counts also outside of requests, as create_app does
+query_tracker.install(engine)
+
+# pysqlite's own transaction handling breaks SAVEPOINT (the batch endpoint
+# relies on it): let SQLAlchemy emit BEGIN, as its SQLite docs recommend.
+# WAL keeps the test session's open reads from locking out the API's writes.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+@event.listens_for(engine, "begin")
+def _begin(connection):
+    # On the DBAPI connection, so it isn't counted against query budgets (implicit on Postgres)
+    connection.connection.dbapi_connection.execute("BEGIN")
+
+@pytest.fixture(autouse=True)
+def database():
+    """Empty tables for every test"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db():
+    """A session on the test database"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def user(db):
+    """A stored user, detached so reading it doesn't open a transaction on `db`"""
+    user = User(email="mario.rossi@example.com", name="Mario Rossi", supabase_id="supabase-mario")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.rollback()
+    return user
+
+@pytest.fixture(autouse=True)
+def services():
+    """Fresh shared services for every test"""
+    reset_services()
+    yield
+    reset_services()
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """An empty response cache for every test, ids restart with the tables"""
+    monkeypatch.setattr(response_cache, "backend", MemoryCacheBackend())
+    monkeypatch.setattr(response_cache, "enabled", True)
+    for counter in ("hits", "misses", "errors"):
+        monkeypatch.setattr(response_cache, counter, 0)
+    return response_cache
+
+@pytest.fixture
+def client(user):
+    """API client authenticated as `user`"""
+    from main import create_app
+
+    app = create_app()
+
+    def current_user(db: Session = Depends(get_database)) -> User:
+        return db.get(User, user.id)
+
+    app.dependency_overrides[get_current_user] = current_user
+    with TestClient(app) as client:
+        yield client
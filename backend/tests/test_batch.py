@@ -0,0 +1,43 @@
+"""
+Batch endpoint: per-operation savepoints and atomic batches
+"""
+from models import Asset
+
+OPERATIONS = [
+    {"id": "q1", "op": "asset.create", "body": {"type": "vehicle", "name": "Panda"}},
+    {"id": "q2", "op": "expense.update", "params": {"expense_id": 999}, "body": {"status": "paid"}},
+    {"id": "q3", "op": "asset.create", "body": {"type": "vehicle", "name": "Punto"}}
+]
+
+def run_batch(client, atomic: bool) -> dict:
+    response = client.post("/api/batch/", json={"atomic": atomic, "operations": OPERATIONS})
+    assert response.status_code == 200
+    return response.json()
+
+def test_failed_operation_is_rolled_back_alone(client, db):
+    body = run_batch(client, atomic=False)
+
+    assert [result["status"] for result in body["data"]] == [200, 404, 200]
+    assert body["message"] == "2/3 operations applied"
+    assert sorted(name for (name,) in db.query(Asset.name)) == ["Panda", "Punto"]
+
+def test_atomic_failure_reports_earlier_operations_as_rolled_back(client, db):
+    body = run_batch(client, atomic=True)
+
+    assert body["success"] is False
+    assert [(result["status"], result["detail"]) for result in body["data"]] == [
+        (424, "Rolled back"),
+        (404, "Expense not found"),
+        (424, "Skipped after a failed operation")
+    ]
+    assert body["data"][0]["data"] is None
+    assert db.query(Asset).count() == 0
+
+def test_invalid_params_are_rejected(client):
+    response = client.post("/api/batch/", json={"operations": [
+        {"op": "expense.update", "params": {"expense_id": "3", "extra": 1}, "body": {}}
+    ]})
+
+    result = response.json()["data"][0]
+    assert result["status"] == 400
+    assert result["detail"] == "Invalid parameters for expense.update: Unknown parameters: extra"
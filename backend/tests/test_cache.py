@@ -0,0 +1,94 @@
+"""
+Response cache on the in-process and Redis (fakeredis) backends
+"""
+import asyncio
+import fakeredis.aioredis
+import pytest
+from utils import cache as cache_module
+from utils.cache import CacheEntry, MemoryCacheBackend, RedisCacheBackend, ResponseCache
+
+@pytest.fixture(params=["memory", "redis"])
+def make_backend(request):
+    """Factory of a fresh backend, called inside the event loop that uses it"""
+    if request.param == "redis":
+        return lambda: RedisCacheBackend(fakeredis.aioredis.FakeRedis())
+    return MemoryCacheBackend
+
+def test_miss_then_hit(make_backend):
+    async def scenario():
+        cache = ResponseCache(backend=make_backend(), enabled=True)
+        slot = await cache.lookup(1, "assets", "key")
+        assert slot.entry is None
+        await slot.store(CacheEntry(body=b'{"items": []}', etag='"abc"'))
+
+        slot = await cache.lookup(1, "assets", "key")
+        assert slot.entry == CacheEntry(body=b'{"items": []}', etag='"abc"')
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_invalidate_bumps_the_scope_version(make_backend):
+    async def scenario():
+        cache = ResponseCache(backend=make_backend(), enabled=True)
+        for user_id, scope in ((1, "assets"), (1, "expenses"), (2, "assets")):
+            slot = await cache.lookup(user_id, scope, "key")
+            await slot.store(CacheEntry(body=b"{}"))
+
+        await cache.invalidate(1, "assets")
+
+        return [
+            (await cache.lookup(user_id, scope, "key")).entry is not None
+            for user_id, scope in ((1, "assets"), (1, "expenses"), (2, "assets"))
+        ]
+
+    assert asyncio.run(scenario()) == [False, True, True]
+
+def test_response_computed_during_invalidation_is_not_served(make_backend):
+    async def scenario():
+        cache = ResponseCache(backend=make_backend(), enabled=True)
+        slot = await cache.lookup(1, "assets", "key")
+        await cache.invalidate(1, "assets")
+        await slot.store(CacheEntry(body=b"stale"))
+        return (await cache.lookup(1, "assets", "key")).entry
+
+    assert asyncio.run(scenario()) is None
+
+def test_hit_ratio_without_lookups():
+    assert ResponseCache(backend=MemoryCacheBackend(), enabled=True).stats()["hit_ratio"] == 0.0
+
+def test_memory_backend_disabled_with_several_workers(monkeypatch):
+    monkeypatch.setattr(cache_module, "WEB_CONCURRENCY", 4)
+
+    memory_cache = ResponseCache(backend=MemoryCacheBackend(), enabled=True)
+    redis_cache = ResponseCache(backend=RedisCacheBackend(fakeredis.aioredis.FakeRedis()), enabled=True)
+
+    assert memory_cache.stats()["enabled"] is False
+    assert asyncio.run(memory_cache.lookup(1, "assets", "key")).entry_key is None
+    assert redis_cache.stats()["enabled"] is True
+
+def test_asset_writes_invalidate_the_cached_list(client, cache, make_backend):
+    cache.backend = client.portal.call(make_backend)
+
+    def list_names():
+        response = client.get("/api/assets/")
+        assert response.status_code == 200
+        return [item["name"] for item in response.json()["data"]["items"]]
+
+    assert list_names() == []
+    assert list_names() == []
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    created = client.post("/api/assets/", json={"type": "vehicle", "name": "Panda"})
+    asset_id = created.json()["data"]["id"]
+    assert list_names() == ["Panda"]
+
+    client.put(f"/api/assets/{asset_id}", json={"name": "Panda 4x4"})
+    assert list_names() == ["Panda 4x4"]
+
+    client.delete(f"/api/assets/{asset_id}")
+    assert list_names() == []
+    assert (cache.hits, cache.misses) == (1, 4)
@@ -0,0 +1,52 @@
+"""
+Document pipeline: text layer first, OCR fallback
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pypdf import PdfWriter
+from utils import document_pipeline
+from utils.document_pipeline import DocumentPipeline
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Rasterize into two fake pages and OCR them in a thread, without poppler or Tesseract"""
+    rasterized = []
+
+    def rasterize_document(file_path, file_type, output_dir, pages=None):
+        rasterized.append(pages)
+        return [f"{output_dir}/page-{number}.png" for number in pages or (1, 2)]
+
+    def ocr_page(image_path, language, preprocess):
+        return {"text": f"ocr of {image_path.rsplit('/', 1)[-1]}", "seconds": 0.0, "cpu_seconds": 0.0}
+
+    monkeypatch.setattr(document_pipeline, "rasterize_document", rasterize_document)
+    monkeypatch.setattr(document_pipeline, "ocr_page", ocr_page)
+    return rasterized
+
+def process(file_path: str) -> dict:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return asyncio.run(DocumentPipeline(executor=executor).process(file_path, "pdf"))
+
+def test_unreadable_pdf_falls_back_to_ocr(tmp_path, fake_ocr):
+    file_path = tmp_path / "broken.pdf"
+    file_path.write_bytes(b"%PDF-1.4 not really a pdf")
+
+    result = process(str(file_path))
+
+    assert fake_ocr == [None]
+    assert result["extraction"] == "ocr"
+    assert [page["page"] for page in result["pages"]] == [1, 2]
+    assert result["text"] == "ocr of page-1.png\nocr of page-2.png"
+
+def test_pdf_without_pages_is_an_empty_text_result(tmp_path, fake_ocr):
+    file_path = tmp_path / "empty.pdf"
+    with open(file_path, "wb") as out:
+        PdfWriter().write(out)
+
+    result = process(str(file_path))
+
+    assert fake_ocr == []
+    assert result["extraction"] == "text"
+    assert result["pages"] == []
+    assert result["text"] == ""
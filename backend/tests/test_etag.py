@@ -0,0 +1,47 @@
+"""
+ETags of the list endpoints across content codings
+"""
+import pytest
+from models import Asset
+
+@pytest.fixture
+def assets(db, user):
+    """Enough assets for the list to be compressed"""
+    for index in range(20):
+        db.add(Asset(user_id=user.id, type="property", name=f"Appartamento in via Roma {index}",
+                     details_json={"comune": "Roma", "categoria_catastale": "A/2"}))
+    db.commit()
+
+def test_same_weak_etag_for_every_coding(client, assets):
+    identity = client.get("/api/assets/?per_page=20", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/assets/?per_page=20", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.headers["etag"].startswith('W/"')
+    assert gzipped.headers["etag"] == identity.headers["etag"]
+
+@pytest.mark.parametrize("if_none_match", [
+    lambda etag: etag,
+    lambda etag: etag[2:],  # the strong form matches under weak comparison
+    lambda etag: f'"other", {etag}'
+])
+def test_if_none_match_is_compared_weakly(client, assets, if_none_match):
+    etag = client.get("/api/assets/?per_page=20", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = client.get("/api/assets/?per_page=20", headers={
+        "Accept-Encoding": "identity",
+        "If-None-Match": if_none_match(etag)
+    })
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+def test_changed_list_is_sent_again(client, assets):
+    etag = client.get("/api/assets/?per_page=20").headers["etag"]
+    client.post("/api/assets/", json={"type": "vehicle", "name": "Panda"})
+
+    response = client.get("/api/assets/?per_page=20", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
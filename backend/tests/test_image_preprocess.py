@@ -0,0 +1,39 @@
+"""
+OCR image loading
+"""
+import os
+import pytest
+from PIL import Image
+from utils.image_preprocess import load_for_ocr
+
+def open_paths() -> list:
+    """Files this process has open"""
+    paths = []
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            paths.append(os.readlink(f"/proc/self/fd/{fd}"))
+        except OSError:
+            pass
+    return paths
+
+@pytest.fixture(params=["JPEG", "PNG"])
+def rotated_photo(request, tmp_path):
+    """A 400x200 RGB image whose EXIF says to rotate it upright (orientation 6)"""
+    path = tmp_path / f"photo.{request.param.lower()}"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (400, 200), "white").save(path, request.param, exif=exif)
+    return str(path)
+
+def test_load_for_ocr_is_upright_and_grayscale(rotated_photo):
+    image = load_for_ocr(rotated_photo)
+
+    assert image.size == (200, 400)
+    assert image.mode == "L"
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_load_for_ocr_closes_the_file(rotated_photo):
+    image = load_for_ocr(rotated_photo)
+
+    assert rotated_photo not in open_paths()
+    image.close()
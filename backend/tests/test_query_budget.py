@@ -0,0 +1,61 @@
+"""
+Query budgets and N+1 detection
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy.orm import lazyload
+from api import summary
+from models import Asset, Expense, Reminder
+from utils import query_tracker
+from utils.query_tracker import QueryBudgetExceeded, track_queries
+
+ASSET_COUNT = 6
+
+@pytest.fixture
+def assets(db, user):
+    """Assets each with a pending expense and an upcoming reminder"""
+    for index in range(ASSET_COUNT):
+        asset = Asset(user_id=user.id, type="property", name=f"Casa {index}", details_json={})
+        db.add(asset)
+        db.flush()
+        db.add(Expense(user_id=user.id, asset_id=asset.id, category="imu", amount=Decimal("100.00"),
+                       due_date=datetime.now() + timedelta(days=10), status="pending"))
+        db.add(Reminder(asset_id=asset.id, type="imu", date=datetime.now() + timedelta(days=5), message="IMU"))
+    db.commit()
+
+@pytest.fixture
+def n_plus_one(monkeypatch):
+    """Drop the summary's eager loading, so every asset lazy-loads its relationships"""
+    monkeypatch.setattr(summary, "selectinload", lazyload)
+
+@pytest.fixture
+def strict_budget(monkeypatch):
+    monkeypatch.setattr(query_tracker, "QUERY_BUDGET_STRICT", True)
+
+def test_summary_within_budget(strict_budget, client, assets):
+    response = client.get("/api/summary/")
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]["assets"]) == ASSET_COUNT
+
+def test_summary_n_plus_one_exceeds_budget(strict_budget, client, assets, n_plus_one):
+    with pytest.raises(QueryBudgetExceeded, match="GET /api/summary/ ran .* budget is 10"):
+        client.get("/api/summary/")
+
+def test_budget_overrun_is_only_logged_when_not_strict(monkeypatch, client, assets, n_plus_one):
+    monkeypatch.setattr(query_tracker, "QUERY_BUDGET_STRICT", False)
+
+    assert client.get("/api/summary/").status_code == 200
+
+def test_repeated_flags_an_n_plus_one_loop(db, assets):
+    with track_queries() as stats:
+        for asset in db.query(Asset).all():
+            asset.expenses
+
+    repeated = stats.repeated()
+    assert len(repeated) == 1
+    statement, count = repeated[0]
+    assert "FROM expenses" in statement
+    assert count == ASSET_COUNT
+    assert stats.repeated(threshold=ASSET_COUNT + 1) == []
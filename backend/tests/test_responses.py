@@ -0,0 +1,38 @@
+"""
+Typed response models of the API routes
+"""
+from datetime import datetime, timedelta
+from fastapi.routing import APIRoute
+from models import Asset, Reminder
+from schemas import ResponseWrapper
+
+def test_no_route_uses_the_bare_wrapper(client):
+    untyped = [
+        route.path for route in client.app.routes
+        if isinstance(route, APIRoute) and route.response_model is ResponseWrapper
+    ]
+
+    assert untyped == []
+    assert client.get("/openapi.json").status_code == 200
+
+def test_delete_returns_no_data(client):
+    asset_id = client.post("/api/assets/", json={"type": "vehicle", "name": "Panda"}).json()["data"]["id"]
+
+    response = client.delete(f"/api/assets/{asset_id}")
+
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "message": "Asset deleted successfully", "data": None}
+
+def test_reminder_run_result(client, db, user):
+    asset = Asset(user_id=user.id, type="vehicle", name="Panda")
+    db.add(asset)
+    db.flush()
+    db.add(Reminder(asset_id=asset.id, type="bollo", date=datetime.now() - timedelta(days=1), message="Bollo"))
+    db.commit()
+
+    data = client.post("/api/reminders/run").json()["data"]
+
+    assert data["processed"] == 1
+    assert data["debounced"] is False
+    assert data["reminders"][0]["asset_name"] == "Panda"
+    assert client.post("/api/reminders/run").json()["data"]["debounced"] is True
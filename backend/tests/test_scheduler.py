@@ -0,0 +1,90 @@
+"""
+Recurring jobs run through the started scheduler, with the memory and Redis jobstores
+"""
+import asyncio
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from apscheduler.jobstores import redis as redis_jobstore
+from prometheus_client import REGISTRY
+import scheduler
+from database import engine
+from models import Asset, Reminder
+from utils.health import HealthChecker
+from utils.metrics import job_last_runs
+from utils.services import get_scheduler_service
+
+@pytest.fixture(params=["memory", "redis"])
+def jobstore(request, monkeypatch):
+    """Configure the scheduler with an in-memory jobstore or a Redis one on fakeredis"""
+    if request.param == "redis":
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+        monkeypatch.setattr(redis_jobstore, "Redis", fakeredis.FakeRedis)
+    return request.param
+
+async def run_scheduled_job(job_id: str, job_name: str, timeout: float = 5) -> dict:
+    """Start the shared scheduler, fire one of its recurring jobs now and wait for its run"""
+    service = get_scheduler_service()
+    assert await service.start()
+    try:
+        before = dict(job_last_runs.get(job_name, {}))
+        service.scheduler.modify_job(job_id, next_run_time=datetime.now(service.scheduler.timezone))
+        async with asyncio.timeout(timeout):
+            while job_last_runs.get(job_name, {}) == before:
+                await asyncio.sleep(0.05)
+        return job_last_runs[job_name]
+    finally:
+        await service.shutdown()
+
+def test_scheduled_job_runs(jobstore):
+    last_run = asyncio.run(run_scheduled_job("tombstone_purge", "tombstone_purge"))
+
+    assert "last_success" in last_run
+    assert last_run["rows"] == 0
+
+def test_jobs_are_stored_by_reference(jobstore):
+    async def scheduled_jobs():
+        service = get_scheduler_service()
+        assert await service.start()
+        try:
+            return {job.id: job.func_ref for job in service.scheduler.get_jobs()}
+        finally:
+            await service.shutdown()
+
+    assert asyncio.run(scheduled_jobs()) == {
+        "daily_reminder_check": "utils.jobs:check_reminders",
+        "imu_reminder_check": "utils.jobs:check_imu_reminders",
+        "vehicle_reminder_check": "utils.jobs:check_vehicle_reminders",
+        "tombstone_purge": "utils.jobs:purge_tombstones"
+    }
+
+def test_run_forever_exits_when_jobs_cannot_be_scheduled(monkeypatch):
+    async def fail():
+        return False
+
+    monkeypatch.setattr(get_scheduler_service(), "schedule_recurring_jobs", fail)
+
+    with pytest.raises(SystemExit) as exit_info:
+        asyncio.run(scheduler.run_forever())
+    assert exit_info.value.code == 1
+
+def test_scheduled_job_records_metrics(db, user):
+    asset = Asset(user_id=user.id, type="vehicle", name="Panda")
+    db.add(asset)
+    db.flush()
+    db.add(Reminder(asset_id=asset.id, type="bollo", date=datetime.now() - timedelta(days=1), message="Bollo"))
+    db.commit()
+    labels = {"job": "check_reminders", "outcome": "success"}
+    runs_before = REGISTRY.get_sample_value("casapiu_job_runs_total", labels) or 0
+    rows_before = REGISTRY.get_sample_value("casapiu_job_rows_processed_total", {"job": "check_reminders"}) or 0
+
+    last_run = asyncio.run(run_scheduled_job("daily_reminder_check", "check_reminders"))
+
+    assert REGISTRY.get_sample_value("casapiu_job_runs_total", labels) == runs_before + 1
+    assert REGISTRY.get_sample_value("casapiu_job_rows_processed_total", {"job": "check_reminders"}) == rows_before + 1
+    assert REGISTRY.get_sample_value("casapiu_job_last_success_timestamp_seconds", {"job": "check_reminders"}) > 0
+    assert last_run["rows"] == 1
+    assert "last_success" in last_run
+    # Readiness reports the same last run
+    probe = HealthChecker(engine, get_scheduler_service()).probe_scheduler()
+    assert probe["jobs"]["check_reminders"] == last_run
@@ -2,11 +2,11 @@
 Authentication utilities for Supabase integration
 """
 import os
+import functools
 import jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from supabase import create_client, Client
 from database import get_database
 from models import User
 import logging
@@ -18,8 +18,11 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+@functools.lru_cache(maxsize=None)
+def get_supabase():
+    """Supabase client, created on first use: only sign up and login need it"""
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Security scheme
 security = HTTPBearer()
@@ -79,7 +82,7 @@ async def get_current_user(
 def create_supabase_user(email: str, password: str) -> dict:
     """Create user in Supabase Auth"""
     try:
-        response = supabase.auth.sign_up({
+        response = get_supabase().auth.sign_up({
             "email": email,
             "password": password
         })
@@ -94,7 +97,7 @@ def create_supabase_user(email: str, password: str) -> dict:
 def authenticate_supabase_user(email: str, password: str) -> dict:
     """Authenticate user with Supabase"""
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = get_supabase().auth.sign_in_with_password({
             "email": email,
             "password": password
         })
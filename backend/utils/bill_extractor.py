@@ -0,0 +1,301 @@
+"""
+Field extraction for Italian utility bills (importo, scadenza, fornitore, POD/PDR, periodo)
+"""
+import re
+import argparse
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, List, Optional, Pattern, Tuple
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Document, Expense
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when patterns or profiles change: stored documents with an older
+# version are picked up by the batch re-extraction
+EXTRACTOR_VERSION = 1
+
+# Building blocks shared by the patterns below
+_AMOUNT = r"(?:€|euro|eur)?\s*(\d{1,3}(?:[.\s]\d{3})+,\d{2}|\d+,\d{2}|\d+\.\d{2})\s*(?:€|euro|eur)?"
+_DATE = r"(\d{1,2})\s*[/.\-]\s*(\d{1,2})\s*[/.\-]\s*(\d{4}|\d{2})\b"
+_SEP = r"[\s:\-]*"
+
+MONTHS = {
+    "gennaio": 1, "febbraio": 2, "marzo": 3, "aprile": 4, "maggio": 5, "giugno": 6,
+    "luglio": 7, "agosto": 8, "settembre": 9, "ottobre": 10, "novembre": 11, "dicembre": 12
+}
+_TEXT_DATE = r"(\d{1,2})\s+(" + "|".join(MONTHS) + r")\s+(\d{4})"
+
+# Patterns are tried in order: the most specific labels come first
+TOTAL_PATTERNS: List[Pattern] = [
+    re.compile(label + _SEP + _AMOUNT, re.IGNORECASE)
+    for label in (
+        r"totale\s+da\s+pagare",
+        r"importo\s+da\s+pagare",
+        r"importo\s+totale",
+        r"totale\s+(?:bolletta|fattura|documento)",
+        r"totale\s+dovuto"
+    )
+]
+
+DUE_DATE_LABEL = r"(?:data\s+(?:di\s+)?scadenza|scadenza(?:\s+pagamento)?|(?:da\s+)?pagare\s+entro(?:\s+il)?|entro\s+il)"
+DUE_DATE_PATTERNS: List[Pattern] = [
+    re.compile(DUE_DATE_LABEL + _SEP + _DATE, re.IGNORECASE),
+    re.compile(DUE_DATE_LABEL + _SEP + _TEXT_DATE, re.IGNORECASE)
+]
+
+PERIOD_PATTERN = re.compile(
+    r"periodo(?:\s+di)?(?:\s+(?:fatturazione|riferimento|consumo))?" + _SEP +
+    r"(?:dal\s+)?" + _DATE + r"\s*(?:-|al|a)\s*" + _DATE,
+    re.IGNORECASE
+)
+
+# POD (electricity): IT + distributor code + E + meter number
+POD_PATTERN = re.compile(r"\b(IT\s?\d{3}\s?E\s?\d{7,9}[A-Z]?)\b", re.IGNORECASE)
+# PDR (gas): 14 digits after its label
+PDR_PATTERN = re.compile(r"(?:\bPDR\b|punto\s+di\s+riconsegna)\D{0,20}(\d{14})\b", re.IGNORECASE)
+
+# Supplier profiles: detection patterns, default utility and optional
+# supplier-specific total labels (tried before the generic ones)
+SUPPLIER_PROFILES: List[Dict[str, Any]] = [
+    {"name": "Enel Energia", "patterns": [r"enel\s+energia", r"servizio\s+elettrico\s+nazionale"], "utenza": "luce"},
+    {"name": "Eni Plenitude", "patterns": [r"plenitude", r"eni\s+gas\s+e\s+luce"], "utenza": "gas"},
+    {"name": "A2A Energia", "patterns": [r"a2a\s+energia"], "utenza": "luce"},
+    {"name": "Hera Comm", "patterns": [r"hera\s*comm", r"gruppo\s+hera"], "utenza": "gas"},
+    {"name": "Iren", "patterns": [r"iren\s+(?:mercato|luce|acqua)"], "utenza": "gas"},
+    {"name": "Acea", "patterns": [r"acea\s+(?:energia|ato)"], "utenza": "acqua"},
+    {"name": "Edison Energia", "patterns": [r"edison\s+energia"], "utenza": "luce"},
+    {"name": "Sorgenia", "patterns": [r"sorgenia"], "utenza": "luce"},
+    {"name": "Engie", "patterns": [r"engie\s+italia"], "utenza": "gas"},
+    {"name": "Illumia", "patterns": [r"illumia"], "utenza": "luce"},
+    {
+        "name": "TIM",
+        "patterns": [r"telecom\s+italia", r"\btim\s+s\.?p\.?a"],
+        "utenza": "telefono",
+        "total_labels": [r"totale\s+conto\s+telefonico"]
+    },
+    {"name": "Vodafone", "patterns": [r"vodafone\s+italia"], "utenza": "telefono"},
+    {"name": "WindTre", "patterns": [r"wind\s*tre"], "utenza": "telefono"},
+    {"name": "Fastweb", "patterns": [r"fastweb"], "utenza": "telefono"},
+    {"name": "Iliad", "patterns": [r"iliad\s+italia"], "utenza": "telefono"}
+]
+
+def _compile_profiles() -> Tuple[Pattern, List[Dict[str, Any]]]:
+    """Compile all supplier patterns into one alternation with a named group per profile"""
+    groups = []
+    profiles = []
+    for index, profile in enumerate(SUPPLIER_PROFILES):
+        groups.append(f"(?P<s{index}>" + "|".join(profile["patterns"]) + ")")
+        profiles.append({
+            **profile,
+            "total_patterns": [
+                re.compile(label + _SEP + _AMOUNT, re.IGNORECASE)
+                for label in profile.get("total_labels", [])
+            ]
+        })
+    return re.compile("|".join(groups), re.IGNORECASE), profiles
+
+SUPPLIER_PATTERN, _COMPILED_PROFILES = _compile_profiles()
+
+def parse_amount(value: str) -> Optional[Decimal]:
+    """Parse an Italian formatted amount (1.234,56 / 1 234,56 / 1234.56)"""
+    value = value.replace(" ", "")
+    if "," in value:
+        value = value.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(value).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+def parse_date(day: str, month: str, year: str) -> Optional[date]:
+    """Build a date from day/month/year strings, month may be an Italian name"""
+    try:
+        month_number = MONTHS.get(month.lower()) or int(month)
+        year_number = int(year) + 2000 if len(year) == 2 else int(year)
+        return date(year_number, month_number, int(day))
+    except ValueError:
+        return None
+
+class BillExtractor:
+    """Extract structured fields from the text of an Italian bill"""
+
+    version = EXTRACTOR_VERSION
+
+    def detect_supplier(self, text: str) -> Optional[Dict[str, Any]]:
+        """Find the first known supplier mentioned in the text"""
+        match = SUPPLIER_PATTERN.search(text)
+        if not match:
+            return None
+        return _COMPILED_PROFILES[int(match.lastgroup[1:])]
+
+    def extract_total(self, text: str, profile: Optional[Dict[str, Any]] = None) -> Optional[Decimal]:
+        """Extract the total amount to pay"""
+        patterns = (profile["total_patterns"] if profile else []) + TOTAL_PATTERNS
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                amount = parse_amount(match.group(1))
+                if amount is not None and amount > 0:
+                    return amount
+        return None
+
+    def extract_due_date(self, text: str) -> Optional[date]:
+        """Extract the payment due date"""
+        for pattern in DUE_DATE_PATTERNS:
+            for match in pattern.finditer(text):
+                due_date = parse_date(*match.groups())
+                if due_date:
+                    return due_date
+        return None
+
+    def extract_period(self, text: str) -> Optional[Dict[str, str]]:
+        """Extract the billing period"""
+        for match in PERIOD_PATTERN.finditer(text):
+            start = parse_date(*match.groups()[:3])
+            end = parse_date(*match.groups()[3:])
+            if start and end and start <= end:
+                return {"da": start.isoformat(), "a": end.isoformat()}
+        return None
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Extract all known fields from a bill text"""
+        fields: Dict[str, Any] = {}
+        profile = self.detect_supplier(text)
+        if profile:
+            fields["fornitore"] = profile["name"]
+            fields["utenza"] = profile["utenza"]
+
+        total = self.extract_total(text, profile)
+        if total is not None:
+            fields["importo_totale"] = str(total)
+
+        due_date = self.extract_due_date(text)
+        if due_date:
+            fields["scadenza"] = due_date.isoformat()
+
+        pod_match = POD_PATTERN.search(text)
+        if pod_match:
+            fields["pod"] = re.sub(r"\s", "", pod_match.group(1)).upper()
+            fields["utenza"] = "luce"
+
+        pdr_match = PDR_PATTERN.search(text)
+        if pdr_match:
+            fields["pdr"] = pdr_match.group(1)
+            fields["utenza"] = "gas"
+
+        period = self.extract_period(text)
+        if period:
+            fields["periodo"] = period
+
+        fields["extractor_version"] = self.version
+        return fields
+
+bill_extractor = BillExtractor()
+
+def build_expense_description(fields: Dict[str, Any]) -> str:
+    """Human readable description of a bill expense"""
+    parts = ["Bolletta"]
+    if fields.get("utenza"):
+        parts.append(fields["utenza"])
+    if fields.get("fornitore"):
+        parts.append(fields["fornitore"])
+    description = " ".join(parts)
+    if fields.get("periodo"):
+        description += f" ({fields['periodo']['da']} - {fields['periodo']['a']})"
+    return description
+
+def expense_link(parsed_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The expense reference of a document's parsed data, to carry across re-processing"""
+    if parsed_data and parsed_data.get("expense_id"):
+        return {"expense_id": parsed_data["expense_id"]}
+    return {}
+
+def create_expense_from_document(db: Session, document: Document, user_id: int) -> Optional[Expense]:
+    """Create a pending expense from the extracted fields of a document.
+
+    The expense id is stored in parsed_data_json so a document never creates
+    more than one expense. The caller commits.
+    """
+    parsed_data = dict(document.parsed_data_json or {})
+    fields = parsed_data.get("fields") or {}
+    if parsed_data.get("expense_id") or not fields.get("importo_totale"):
+        return None
+
+    expense = Expense(
+        user_id=user_id,
+        asset_id=document.asset_id,
+        category="bolletta",
+        amount=Decimal(fields["importo_totale"]),
+        due_date=datetime.fromisoformat(fields["scadenza"]) if fields.get("scadenza") else None,
+        status="pending",
+        description=build_expense_description(fields)
+    )
+    db.add(expense)
+    db.flush()
+
+    parsed_data["expense_id"] = expense.id
+    document.parsed_data_json = parsed_data
+    return expense
+
+def reextract_documents(batch_size: int = 500, force: bool = False) -> Dict[str, int]:
+    """Re-run the extractor on the stored text of processed documents.
+
+    Documents are read in id order in batches (only id and parsed data are
+    loaded) and written back with one bulk update per batch. Documents already
+    extracted with the current version are skipped unless `force` is set.
+    Expenses are never created here.
+    """
+    stats = {"scanned": 0, "updated": 0, "skipped": 0}
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.query(Document.id, Document.parsed_data_json).filter(
+                Document.id > last_id,
+                Document.parsed_data_json.isnot(None)
+            ).order_by(Document.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates = []
+            for document_id, parsed_data in rows:
+                stats["scanned"] += 1
+                if parsed_data.get("status") != "processed" or not parsed_data.get("text"):
+                    stats["skipped"] += 1
+                    continue
+                if not force and parsed_data.get("fields", {}).get("extractor_version") == EXTRACTOR_VERSION:
+                    stats["skipped"] += 1
+                    continue
+                updates.append({
+                    "id": document_id,
+                    "parsed_data_json": {**parsed_data, "fields": bill_extractor.extract(parsed_data["text"])}
+                })
+
+            if updates:
+                db.bulk_update_mappings(Document, updates)
+                db.commit()
+                stats["updated"] += len(updates)
+            logger.info(f"Re-extraction progress: {stats}")
+    finally:
+        db.close()
+
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract bill fields of stored documents")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--force", action="store_true", help="Also re-extract documents at the current version")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = reextract_documents(batch_size=args.batch_size, force=args.force)
+    print(
+        f"scanned={stats['scanned']} updated={stats['updated']} skipped={stats['skipped']} "
+        f"seconds={time.perf_counter() - start:.2f}"
+    )
+
+if __name__ == "__main__":
+    main()
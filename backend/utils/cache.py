@@ -0,0 +1,220 @@
+"""
+Per-user response cache for GET endpoints (Redis, in-process fallback)
+"""
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import orjson
+from fastapi import Request, Response
+from utils.etag import is_not_modified, not_modified_response, set_etag
+from utils.metrics import record_cache_lookup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")
+# uvicorn worker processes: an in-process cache can't be invalidated across them
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Scopes invalidated together: one per resource family
+ALL_SCOPES = ("assets", "expenses", "reminders", "automations")
+
+@dataclass
+class CacheEntry:
+    """A rendered response body with its ETag"""
+    body: bytes
+    etag: Optional[str] = None
+
+    def encode(self) -> bytes:
+        return f"{self.etag or ''}\n".encode() + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CacheEntry":
+        etag, body = value.split(b"\n", 1)
+        return cls(body=body, etag=etag.decode() or None)
+
+class MemoryCacheBackend:
+    """In-process LRU with TTL, used when Redis is not configured"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str):
+        self._counters[key] = self._counters.get(key, 0) + 1
+
+class RedisCacheBackend:
+    """Redis backend, takes any redis.asyncio compatible client (e.g. fakeredis in tests)"""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def get_counter(self, key: str) -> int:
+        value = await self.client.get(key)
+        return int(value) if value else 0
+
+    async def incr(self, key: str):
+        await self.client.incr(key)
+
+def create_backend():
+    """Redis when REDIS_URL is set and the client is installed, in-process otherwise"""
+    if REDIS_URL:
+        try:
+            from redis import asyncio as aioredis
+
+            return RedisCacheBackend(aioredis.from_url(REDIS_URL))
+        except ImportError:
+            logger.warning("redis package not installed, using in-process cache")
+    return MemoryCacheBackend()
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for a route and its parameters"""
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:32]
+
+def render_response(response_model: type, content: Dict[str, Any]) -> bytes:
+    """Validate a response once against its model and render it to JSON bytes"""
+    model = response_model.model_validate(content, from_attributes=True)
+    return orjson.dumps(model.model_dump(mode="json"))
+
+def entry_response(request: Request, entry: CacheEntry) -> Response:
+    """Response for a cache entry, 304 when the client already has it"""
+    if entry.etag and is_not_modified(request, entry.etag):
+        return not_modified_response(entry.etag)
+    response = Response(content=entry.body, media_type="application/json")
+    if entry.etag:
+        set_etag(response, entry.etag)
+    return response
+
+class CacheSlot:
+    """Result of a cache lookup: the cached entry on hit, where to store it on miss"""
+
+    def __init__(self, cache: "ResponseCache", entry_key: Optional[str], entry: Optional[CacheEntry] = None):
+        self.cache = cache
+        self.entry_key = entry_key
+        self.entry = entry
+
+    async def store(self, entry: CacheEntry):
+        if self.entry_key:
+            await self.cache.store(self.entry_key, entry)
+
+class ResponseCache:
+    """Rendered GET responses keyed by user, scope, route and parameters.
+
+    Each (user, scope) has a version counter that is part of every key:
+    invalidating a scope bumps the counter, so stale entries are never read
+    again and simply expire. Backend errors count as misses.
+    """
+
+    def __init__(self, backend=None, ttl: int = CACHE_TTL_SECONDS, enabled: bool = CACHE_ENABLED):
+        self.backend = backend or create_backend()
+        self.ttl = ttl
+        self.enabled = enabled
+        if enabled and isinstance(self.backend, MemoryCacheBackend) and WEB_CONCURRENCY > 1:
+            # A write on one worker would not invalidate the others' entries
+            logger.warning("Response cache disabled: several workers without REDIS_URL")
+            self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _version_key(self, user_id: int, scope: str) -> str:
+        return f"cache:{user_id}:{scope}:version"
+
+    async def lookup(self, user_id: int, scope: str, key: str) -> "CacheSlot":
+        """Look up a cached response; store the miss through the returned slot.
+
+        The slot keeps the scope version read here, so a response computed
+        while a write invalidates the scope is stored under the old version
+        and never served.
+        """
+        if not self.enabled:
+            return CacheSlot(self, None)
+        try:
+            version = await self.backend.get_counter(self._version_key(user_id, scope))
+            entry_key = f"cache:{user_id}:{scope}:{version}:{key}"
+            value = await self.backend.get(entry_key)
+        except Exception as e:
+            self.errors += 1
+            record_cache_lookup(scope, "error")
+            logger.warning(f"Cache read failed: {str(e)}")
+            return CacheSlot(self, None)
+
+        if value is None:
+            self.misses += 1
+            record_cache_lookup(scope, "miss")
+            return CacheSlot(self, entry_key)
+        self.hits += 1
+        record_cache_lookup(scope, "hit")
+        return CacheSlot(self, entry_key, CacheEntry.decode(value))
+
+    async def store(self, entry_key: str, entry: CacheEntry):
+        """Store a rendered response"""
+        try:
+            await self.backend.set(entry_key, entry.encode(), self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache write failed: {str(e)}")
+
+    async def invalidate(self, user_id: int, *scopes: str):
+        """Drop every cached response of the given scopes for a user"""
+        if not self.enabled:
+            return
+        for scope in scopes:
+            try:
+                await self.backend.incr(self._version_key(user_id, scope))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Cache invalidation failed for user {user_id}, scope {scope}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and ratio"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+response_cache = ResponseCache()
@@ -0,0 +1,52 @@
+"""
+Response compression middleware (brotli when available, gzip otherwise)
+"""
+import os
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold, leaving event streams untouched.
+
+    Whether a response is an event stream is only known from its
+    Content-Type, so the compressor wraps a send that hands text/event-stream
+    responses straight to the client instead of to the compressor (which
+    buffers its output and would hold back SSE events).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        try:
+            from brotli_asgi import BrotliMiddleware
+
+            # Falls back to gzip for clients that don't accept br
+            self.compressor = lambda inner: BrotliMiddleware(inner, minimum_size=minimum_size, gzip_fallback=True)
+        except ImportError:
+            logger.info("brotli-asgi not installed, using gzip compression only")
+            self.compressor = lambda inner: GZipMiddleware(inner, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def app_with_stream_bypass(scope: Scope, receive: Receive, compressor_send: Send):
+            bypass = False
+
+            async def send_wrapper(message: Message):
+                nonlocal bypass
+                if message["type"] == "http.response.start":
+                    content_type = Headers(raw=message["headers"]).get("content-type", "")
+                    bypass = content_type.startswith("text/event-stream")
+                await (send if bypass else compressor_send)(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        await self.compressor(app_with_stream_bypass)(scope, receive, send)
@@ -0,0 +1,376 @@
+"""
+Document ingestion pipeline: page rasterization, OCR and bill field extraction
+"""
+import os
+import time
+import asyncio
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from database import SessionLocal
+from models import Document
+from utils.bill_extractor import bill_extractor, create_expense_from_document, expense_link
+from utils.cache import response_cache
+from utils.tracing import run_in_threadpool, span, traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pipeline configuration
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "static/uploads")
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "ita")
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", "2"))
+OCR_RASTER_DPI = int(os.getenv("OCR_RASTER_DPI", "300"))
+# Pages whose text layer has fewer alphanumeric characters than this are OCR'd
+TEXT_LAYER_MIN_CHARS = int(os.getenv("TEXT_LAYER_MIN_CHARS", "40"))
+# Pillow preprocessing (downscale, deskew, threshold, crop) before Tesseract
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, "thumbs")
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+def _init_ocr_worker():
+    """Keep Tesseract single-threaded, parallelism comes from the page pool"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Get the shared, bounded OCR process pool"""
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=OCR_MAX_WORKERS,
+            initializer=_init_ocr_worker
+        )
+    return _ocr_pool
+
+def shutdown_ocr_pool():
+    """Shutdown the OCR process pool"""
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=False, cancel_futures=True)
+        _ocr_pool = None
+
+def _cpu_time() -> float:
+    """CPU time of this process plus its finished children (tesseract)"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+def ocr_page(image_path: str, language: str = OCR_LANGUAGE, preprocess: bool = OCR_PREPROCESS) -> Dict[str, Any]:
+    """OCR a single page image (runs inside the OCR process pool)"""
+    import pytesseract
+    from PIL import Image
+    from utils.image_preprocess import load_for_ocr, preprocess_for_ocr
+
+    start = time.perf_counter()
+    cpu_start = _cpu_time()
+    if preprocess:
+        image = load_for_ocr(image_path)
+        prepared = preprocess_for_ocr(image)
+        image.close()
+        text = pytesseract.image_to_string(prepared, lang=language)
+    else:
+        with Image.open(image_path) as image:
+            text = pytesseract.image_to_string(image, lang=language)
+
+    return {
+        "text": text,
+        "seconds": time.perf_counter() - start,
+        "cpu_seconds": _cpu_time() - cpu_start
+    }
+
+def generate_thumbnail(file_path: str, file_type: str, content_hash: str) -> str:
+    """Create (once per content hash) the list view thumbnail of a document"""
+    from PIL import Image
+    from utils.image_preprocess import THUMBNAIL_SIZE, make_thumbnail
+
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    thumbnail_path = os.path.join(THUMBNAIL_DIR, f"{content_hash}.jpg")
+    if not os.path.exists(thumbnail_path):
+        if file_type == "pdf":
+            from pdf2image import convert_from_path
+
+            first_page = convert_from_path(
+                file_path,
+                first_page=1,
+                last_page=1,
+                size=(None, THUMBNAIL_SIZE[1])
+            )[0]
+            make_thumbnail(first_page, thumbnail_path)
+        else:
+            with Image.open(file_path) as image:
+                # Decode JPEGs at reduced scale, a thumbnail needs few pixels
+                image.draft("RGB", THUMBNAIL_SIZE)
+                make_thumbnail(image, thumbnail_path)
+
+    return f"/{thumbnail_path}"
+
+def extract_text_layer(file_path: str) -> Optional[List[str]]:
+    """Extract the embedded text layer of every page of a PDF, None when pypdf can't read it"""
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(file_path)
+    except Exception as e:
+        logger.warning(f"Cannot read the text layer of {file_path}, falling back to OCR: {str(e)}")
+        return None
+    texts = []
+    for page in reader.pages:
+        try:
+            texts.append(page.extract_text() or "")
+        except Exception as e:
+            logger.warning(f"Text layer extraction failed on {file_path}: {str(e)}")
+            texts.append("")
+    return texts
+
+def has_usable_text(text: str) -> bool:
+    """Check whether a text layer is rich enough to skip OCR"""
+    return sum(1 for char in text if char.isalnum()) >= TEXT_LAYER_MIN_CHARS
+
+def rasterize_document(
+    file_path: str,
+    file_type: str,
+    output_dir: str,
+    pages: Optional[List[int]] = None
+) -> List[str]:
+    """Rasterize a document into one image file per page.
+    
+    `pages` restricts PDF rasterization to the given 1-based page numbers.
+    """
+    if file_type != "pdf":
+        # Images are already a single page
+        return [file_path]
+
+    from pdf2image import convert_from_path
+
+    if pages is None:
+        return convert_from_path(
+            file_path,
+            dpi=OCR_RASTER_DPI,
+            output_folder=output_dir,
+            fmt="png",
+            paths_only=True
+        )
+
+    images = []
+    for page_number in pages:
+        images.extend(convert_from_path(
+            file_path,
+            dpi=OCR_RASTER_DPI,
+            output_folder=output_dir,
+            fmt="png",
+            paths_only=True,
+            first_page=page_number,
+            last_page=page_number
+        ))
+    return images
+
+def document_file_path(document: Document) -> str:
+    """Local path of an uploaded document"""
+    return document.file_url.lstrip("/")
+
+class DocumentPipeline:
+    """Upload -> rasterize -> OCR (process pool) -> field extraction"""
+
+    def __init__(
+        self,
+        executor: Optional[ProcessPoolExecutor] = None,
+        language: str = OCR_LANGUAGE,
+        preprocess: bool = OCR_PREPROCESS
+    ):
+        self.executor = executor
+        self.language = language
+        self.preprocess = preprocess
+
+    async def process(
+        self,
+        file_path: str,
+        file_type: str,
+        force_ocr: bool = False,
+        preprocess: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Run the pipeline on a file and return the parsed data with per-stage timings.
+        
+        PDF pages with a usable embedded text layer are read with pypdf; only
+        the remaining pages (and images) are rasterized and OCR'd.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor or get_ocr_pool()
+        preprocess = self.preprocess if preprocess is None else preprocess
+        timings = {}
+        pipeline_start = time.perf_counter()
+
+        # Text layer first, per page
+        page_texts = None
+        if file_type == "pdf" and not force_ocr:
+            stage_start = time.perf_counter()
+            with span("ocr.text_layer", root=False):
+                page_texts = await run_in_threadpool(extract_text_layer, file_path)
+            timings["text_layer"] = time.perf_counter() - stage_start
+
+        if page_texts is not None:
+            pages = [
+                {"page": index + 1, "method": "text", "text": text}
+                for index, text in enumerate(page_texts)
+            ]
+            ocr_pages = [page for page in pages if not has_usable_text(page["text"])]
+        else:
+            # Images, forced OCR or a PDF pypdf can't read: every page, counted once rasterized
+            pages = []
+            ocr_pages = None
+
+        if ocr_pages is None or ocr_pages:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                stage_start = time.perf_counter()
+                with span("ocr.rasterize", root=False, pages="all" if ocr_pages is None else len(ocr_pages)):
+                    page_images = await run_in_threadpool(
+                        rasterize_document,
+                        file_path,
+                        file_type,
+                        tmp_dir,
+                        None if ocr_pages is None else [page["page"] for page in ocr_pages]
+                    )
+                timings["rasterize"] = time.perf_counter() - stage_start
+                if ocr_pages is None:
+                    pages = [{"page": index + 1, "method": "ocr"} for index in range(len(page_images))]
+                    ocr_pages = pages
+
+                # Page-level parallelism on the bounded process pool
+                stage_start = time.perf_counter()
+                with span("ocr.pages", root=False, pages=len(page_images), preprocess=preprocess):
+                    page_results = await asyncio.gather(*[
+                        loop.run_in_executor(executor, ocr_page, image_path, self.language, preprocess)
+                        for image_path in page_images
+                    ])
+                timings["ocr"] = time.perf_counter() - stage_start
+
+            for page, result in zip(ocr_pages, page_results):
+                page.update(
+                    method="ocr",
+                    text=result["text"],
+                    seconds=round(result["seconds"], 4),
+                    cpu_seconds=round(result["cpu_seconds"], 4)
+                )
+
+        stage_start = time.perf_counter()
+        text = "\n".join(page["text"] for page in pages)
+        with span("ocr.extract_fields", root=False):
+            fields = bill_extractor.extract(text)
+        timings["extract"] = time.perf_counter() - stage_start
+        timings["total"] = time.perf_counter() - pipeline_start
+
+        # A PDF without pages has an (empty) text layer and nothing to OCR
+        methods = {page["method"] for page in pages} or {"text"}
+        return {
+            "status": "processed",
+            "fields": fields,
+            "extraction": methods.pop() if len(methods) == 1 else "mixed",
+            "preprocess": preprocess,
+            "pages": [
+                {key: value for key, value in page.items() if key != "text"} | {"chars": len(page["text"])}
+                for page in pages
+            ],
+            "text": text,
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            "processed_at": datetime.now().isoformat()
+        }
+
+    @traced("document.ingest")
+    async def ingest(self, document_id: int, create_expense: bool = False):
+        """Process a stored document and save the results without blocking the event loop.
+        
+        With `create_expense` a pending expense is created from the extracted fields.
+        """
+        document = await run_in_threadpool(self._load_document, document_id)
+        if not document:
+            logger.warning(f"Document {document_id} not found, skipping ingestion")
+            return
+
+        file_path, file_type = document
+        try:
+            parsed_data = await self.process(file_path, file_type)
+            logger.info(f"Document {document_id} processed: {parsed_data['timings']}")
+        except Exception as e:
+            logger.error(f"Document {document_id} processing failed: {str(e)}")
+            parsed_data = {"status": "failed", "error": str(e)}
+
+        expense_user_id = await run_in_threadpool(self._save_result, document_id, parsed_data, create_expense)
+        if expense_user_id:
+            await response_cache.invalidate(expense_user_id, "expenses")
+
+    @traced("document.thumbnail")
+    async def create_thumbnail(self, document_id: int):
+        """Generate the thumbnail of a stored document off the event loop"""
+        document = await run_in_threadpool(self._get_document_file, document_id)
+        if not document:
+            return
+
+        file_path, file_type, content_hash = document
+        try:
+            thumbnail_url = await run_in_threadpool(generate_thumbnail, file_path, file_type, content_hash)
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for document {document_id}: {str(e)}")
+            return
+
+        await run_in_threadpool(self._save_thumbnail, document_id, thumbnail_url)
+
+    def _get_document_file(self, document_id: int):
+        """Load the file path, type and content hash of a document"""
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document or not document.content_hash:
+                return None
+            return document_file_path(document), document.file_type, document.content_hash
+        finally:
+            db.close()
+
+    def _save_thumbnail(self, document_id: int, thumbnail_url: str):
+        """Persist the thumbnail URL of a document"""
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(Document.id == document_id).update(
+                {Document.thumbnail_url: thumbnail_url},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _load_document(self, document_id: int):
+        """Load the file path and type of a document, marking it as processing"""
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                return None
+            document.parsed_data_json = {"status": "processing", **expense_link(document.parsed_data_json)}
+            db.commit()
+            return document_file_path(document), document.file_type
+        finally:
+            db.close()
+
+    def _save_result(self, document_id: int, parsed_data: Dict[str, Any], create_expense: bool = False) -> Optional[int]:
+        """Persist the parsed data of a document, optionally creating its expense.
+        
+        Returns the owner's user id when an expense was created.
+        """
+        db = SessionLocal()
+        expense_user_id = None
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document:
+                # Keep the link to an expense created by a previous run
+                document.parsed_data_json = {**parsed_data, **expense_link(document.parsed_data_json)}
+                if create_expense and parsed_data["status"] == "processed":
+                    expense = create_expense_from_document(db, document, document.asset.user_id)
+                    if expense:
+                        expense_user_id = expense.user_id
+                        logger.info(f"Expense {expense.id} created from document {document_id}")
+                db.commit()
+        finally:
+            db.close()
+        return expense_user_id
+
+document_pipeline = DocumentPipeline()
@@ -0,0 +1,263 @@
+"""
+Content-addressed storage and streaming receiver for uploaded documents
+"""
+import os
+import uuid
+import hashlib
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import HTTPException, Request, status
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import Asset, Document
+from utils.document_pipeline import UPLOAD_DIR
+import aiofiles
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upload limits
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+USER_UPLOAD_QUOTA_BYTES = int(os.getenv("USER_UPLOAD_QUOTA_MB", "500")) * 1024 * 1024
+# Room for multipart boundaries and part headers when checking Content-Length
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# Magic numbers of the accepted file types
+FILE_SIGNATURES = {
+    b"%PDF-": "pdf",
+    b"\xff\xd8\xff": "jpg",
+    b"\x89PNG\r\n\x1a\n": "png"
+}
+SIGNATURE_LENGTH = max(len(signature) for signature in FILE_SIGNATURES)
+
+# Declared part content types we accept before sniffing the content
+ALLOWED_CONTENT_TYPES = {
+    "application/pdf",
+    "image/jpeg",
+    "image/jpg",
+    "image/png",
+    "application/octet-stream"
+}
+
+# Bytes currently being received per user, across concurrent uploads of this process:
+# concurrent uploads to different workers each see the full remaining quota, so the total can exceed it
+_inflight_bytes: Dict[int, int] = {}
+
+def stored_file_name(content_hash: str, file_type: str) -> str:
+    """File name of a document in the upload directory"""
+    return f"{content_hash}.{file_type}"
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """Detect the file type from its first bytes"""
+    for signature, file_type in FILE_SIGNATURES.items():
+        if head.startswith(signature):
+            return file_type
+    return None
+
+def get_user_storage_bytes(db: Session, user_id: int) -> int:
+    """Total size of the documents stored for a user"""
+    return db.query(func.coalesce(func.sum(Document.size_bytes), 0)).join(Document.asset).filter(
+        Asset.user_id == user_id
+    ).scalar()
+
+class _MultipartEvents:
+    """Collect python-multipart callbacks as a list of events per fed chunk"""
+
+    def __init__(self, boundary: bytes):
+        self.events: List[Tuple[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Any]]:
+        self.parser.write(chunk)
+        events, self.events = self.events, []
+        return events
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        self.events.append(("part", self._headers))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", data[start:end]))
+
+    def _on_part_end(self):
+        self.events.append(("end", None))
+
+async def receive_upload(request: Request, user_id: int, used_bytes: int) -> Dict[str, Any]:
+    """Stream the `file` part of a multipart request straight to disk.
+
+    The content is hashed incrementally and stored once per SHA-256. Wrong
+    types are rejected on the declared part type and on the first bytes,
+    oversized files as soon as they cross the per-file limit or the user's
+    remaining quota, so memory use never depends on the file size.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected a multipart/form-data upload"
+        )
+
+    quota_remaining = USER_UPLOAD_QUOTA_BYTES - used_bytes
+    if quota_remaining <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+
+    # Reject before reading anything when the declared length is already too big
+    content_length = request.headers.get("content-length")
+    if content_length is not None and not content_length.strip().isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Content-Length header"
+        )
+    if content_length and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large"
+        )
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    tmp_path = os.path.join(UPLOAD_DIR, f".upload-{uuid.uuid4().hex}")
+    parser = _MultipartEvents(params[b"boundary"])
+    digest = hashlib.sha256()
+    out = None
+    in_file_part = False
+    file_done = False
+    head = b""
+    file_type = None
+    filename = None
+    size = 0
+
+    try:
+        async for chunk in request.stream():
+            for event, value in parser.feed(chunk):
+                if event == "part":
+                    disposition, options = parse_options_header(value.get(b"content-disposition", b""))
+                    in_file_part = not file_done and options.get(b"name") == b"file" and b"filename" in options
+                    if in_file_part:
+                        part_type = value.get(b"content-type", b"application/octet-stream").decode("latin-1")
+                        if part_type not in ALLOWED_CONTENT_TYPES:
+                            raise HTTPException(
+                                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Unsupported file type"
+                            )
+                        filename = options[b"filename"].decode("utf-8", "replace")
+                        out = await aiofiles.open(tmp_path, "wb")
+
+                elif event == "data" and in_file_part:
+                    size += len(value)
+                    _inflight_bytes[user_id] = _inflight_bytes.get(user_id, 0) + len(value)
+                    if size > MAX_UPLOAD_BYTES:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="File too large"
+                        )
+                    if _inflight_bytes[user_id] > quota_remaining:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Storage quota exceeded"
+                        )
+
+                    if file_type is None:
+                        head += value
+                        if len(head) < SIGNATURE_LENGTH:
+                            continue
+                        file_type = sniff_file_type(head)
+                        if not file_type:
+                            raise HTTPException(
+                                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Unsupported file type"
+                            )
+                        value = head
+
+                    digest.update(value)
+                    await out.write(value)
+
+                elif event == "end" and in_file_part:
+                    in_file_part = False
+                    file_done = True
+
+        if not file_done or size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Missing file"
+            )
+
+        if file_type is None:
+            # Files shorter than the longest signature
+            file_type = sniff_file_type(head)
+            if not file_type:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="Unsupported file type"
+                )
+            digest.update(head)
+            await out.write(head)
+
+        await out.close()
+        out = None
+
+        content_hash = digest.hexdigest()
+        final_path = os.path.join(UPLOAD_DIR, stored_file_name(content_hash, file_type))
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+
+        return {
+            "content_hash": content_hash,
+            "file_type": file_type,
+            "size_bytes": size,
+            "filename": filename
+        }
+    except Exception:
+        if out is not None:
+            await out.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if user_id in _inflight_bytes:
+            _inflight_bytes[user_id] -= size
+            if _inflight_bytes[user_id] <= 0:
+                del _inflight_bytes[user_id]
+
+def find_cached_parse(db: Session, content_hash: str) -> Optional[Dict[str, Any]]:
+    """Get the parsed data of an already processed document with the same content"""
+    document = db.query(Document).filter(
+        Document.content_hash == content_hash,
+        Document.parsed_data_json["status"].as_string() == "processed"
+    ).first()
+
+    if document is None:
+        return None
+    # The expense belongs to the other document
+    return {
+        key: value for key, value in document.parsed_data_json.items()
+        if key != "expense_id"
+    }
@@ -0,0 +1,52 @@
+"""
+Weak ETags and conditional GET for list endpoints
+"""
+import json
+import hashlib
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from fastapi import Request, Response, status
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+import logging
+
+logger = logging.getLogger(__name__)
+
+def list_fingerprint(query: Query, model) -> Tuple[int, Optional[datetime]]:
+    """Row count and latest change of a query's result set, in one aggregate query"""
+    last_change = func.coalesce(model.updated_at, model.created_at)
+    return query.order_by(None).with_entities(func.count(model.id), func.max(last_change)).one()
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the parts identifying a representation.
+
+    Weak because the same tag goes out on the identity, gzip and brotli
+    encodings of the body, which a strong validator must tell apart.
+    """
+    digest = hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def opaque_tag(etag: str) -> str:
+    """An ETag without its weak prefix, for the weak comparison of If-None-Match"""
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return opaque_tag(etag) in [opaque_tag(tag) for tag in if_none_match.split(",")]
+
+def set_etag(response: Response, etag: str):
+    """Attach the ETag and revalidation headers to a response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 response for an unchanged representation"""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
@@ -11,6 +11,7 @@ from reportlab.lib.units import mm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,6 +59,7 @@ class F24Generator:
             textColor=colors.grey
         ))
     
+    @traced("f24.render", root=False)
     def generate_imu_f24(
         self,
         taxpayer_data: Dict[str, Any],
@@ -0,0 +1,144 @@
+"""
+Liveness and readiness probes with cached results
+"""
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from utils.metrics import job_last_runs
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Probe results are reused for this long, so frequent health checks don't add load
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "5"))
+# A probe slower than this counts as failed
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+# Share of the pool (size + overflow) in use above which the instance is not ready
+HEALTH_POOL_SATURATION = float(os.getenv("HEALTH_POOL_SATURATION", "1.0"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+def elapsed_ms(start: float) -> float:
+    return round(1000 * (time.perf_counter() - start), 2)
+
+class HealthChecker:
+    """Runs the readiness probes at most once per HEALTH_CACHE_SECONDS.
+
+    Concurrent checks while probes run wait for the same result. Only the
+    database and the pool decide readiness: Redis, the scheduler and Firebase
+    have fallbacks or only affect background work, so they degrade the
+    status without taking the instance out of rotation.
+    """
+
+    def __init__(self, engine: Engine, scheduler_service=None, notification_service=None,
+                 cache_seconds: float = HEALTH_CACHE_SECONDS):
+        self.engine = engine
+        self.scheduler_service = scheduler_service
+        self.notification_service = notification_service
+        self.cache_seconds = cache_seconds
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._redis = None
+
+    async def check(self) -> Dict[str, Any]:
+        """Cached readiness report"""
+        async with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= self.cache_seconds:
+                self._result = await self._run_probes()
+                self._checked_at = time.monotonic()
+        return self._result
+
+    async def _run_probes(self) -> Dict[str, Any]:
+        database, redis = await asyncio.gather(self.probe_database(), self.probe_redis())
+        checks = {
+            "database": database,
+            "pool": self.probe_pool(),
+            "redis": redis,
+            "scheduler": self.probe_scheduler(),
+            "firebase": self.probe_firebase()
+        }
+        ready = checks["database"]["status"] == "ok" and checks["pool"]["status"] == "ok"
+        degraded = any(check["status"] not in ("ok", "disabled") for check in checks.values())
+        return {
+            "status": "unavailable" if not ready else "degraded" if degraded else "ok",
+            "ready": ready,
+            "checked_at": datetime.now().isoformat(),
+            "checks": checks
+        }
+
+    def _ping_database(self):
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def probe_database(self) -> Dict[str, Any]:
+        """Time a round trip to the database"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(run_in_threadpool(self._ping_database), HEALTH_PROBE_TIMEOUT)
+            return {"status": "ok", "latency_ms": elapsed_ms(start)}
+        except asyncio.TimeoutError:
+            return {"status": "error", "error": f"No answer in {HEALTH_PROBE_TIMEOUT}s"}
+        except Exception as e:
+            logger.error(f"Database health probe failed: {str(e)}")
+            return {"status": "error", "error": str(e), "latency_ms": elapsed_ms(start)}
+
+    def probe_pool(self) -> Dict[str, Any]:
+        """Connections in use against the pool capacity"""
+        pool = self.engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {"status": "ok", "pool": type(pool).__name__}
+        capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+        checked_out = pool.checkedout()
+        saturation = checked_out / capacity if capacity else 0.0
+        return {
+            "status": "ok" if saturation < HEALTH_POOL_SATURATION else "saturated",
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(saturation, 2)
+        }
+
+    async def probe_redis(self) -> Dict[str, Any]:
+        """Ping Redis when it is configured"""
+        if not REDIS_URL:
+            return {"status": "disabled"}
+        start = time.perf_counter()
+        try:
+            if self._redis is None:
+                from redis import asyncio as aioredis
+
+                self._redis = aioredis.from_url(REDIS_URL, socket_timeout=HEALTH_PROBE_TIMEOUT)
+            await asyncio.wait_for(self._redis.ping(), HEALTH_PROBE_TIMEOUT)
+            return {"status": "ok", "latency_ms": elapsed_ms(start)}
+        except Exception as e:
+            logger.warning(f"Redis health probe failed: {str(e)}")
+            return {"status": "error", "error": str(e) or type(e).__name__}
+
+    def probe_scheduler(self) -> Dict[str, Any]:
+        """Scheduler state, next run and last outcome of each job"""
+        scheduler = getattr(self.scheduler_service, "scheduler", None)
+        if scheduler is None:
+            return {"status": "disabled"}
+        if not scheduler.running:
+            return {"status": "stopped", "jobs": job_last_runs}
+        try:
+            jobs = {
+                job.id: {
+                    "next_run": job.next_run_time.isoformat() if job.next_run_time else None
+                }
+                for job in scheduler.get_jobs()
+            }
+        except Exception as e:
+            # The Redis jobstore may be unreachable
+            return {"status": "error", "error": str(e), "jobs": job_last_runs}
+        return {"status": "ok", "jobs": jobs, "last_runs": job_last_runs}
+
+    def probe_firebase(self) -> Dict[str, Any]:
+        """Whether push notifications can be sent"""
+        if self.notification_service is None:
+            return {"status": "disabled"}
+        return {"status": "ok" if self.notification_service.transport else "not_initialized"}
@@ -0,0 +1,141 @@
+"""
+Pillow-based image preprocessing for OCR and document thumbnails
+"""
+import os
+from typing import Optional, Tuple
+from PIL import Image, ImageFilter, ImageOps
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Preprocessing configuration
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+# Bills are assumed to be A4 when a photo carries no usable DPI
+A4_LONG_SIDE_INCHES = 11.69
+DESKEW_MAX_ANGLE = float(os.getenv("OCR_DESKEW_MAX_ANGLE", "5"))
+DESKEW_STEP = 0.5
+# Width of the copy used to estimate the skew angle
+DESKEW_SAMPLE_WIDTH = 800
+CROP_MARGIN = 20
+THUMBNAIL_SIZE = (256, 256)
+
+def target_long_side(dpi: int = OCR_TARGET_DPI) -> int:
+    """Maximum long side in pixels of an A4 page at the target DPI"""
+    return int(A4_LONG_SIDE_INCHES * dpi)
+
+def load_for_ocr(image_path: str, dpi: int = OCR_TARGET_DPI) -> Image.Image:
+    """Open an image upright and grayscale, letting the JPEG decoder downscale while decoding"""
+    with Image.open(image_path) as source:
+        max_side = target_long_side(dpi)
+        # JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale: much less work on 12+ MP photos
+        source.draft("L", (max_side, max_side))
+        # Both return new, loaded images, so the file can be closed
+        return ImageOps.exif_transpose(source).convert("L")
+
+def downscale(image: Image.Image, dpi: int = OCR_TARGET_DPI) -> Image.Image:
+    """Downscale so the long side fits an A4 page at the target DPI"""
+    max_side = target_long_side(dpi)
+    if max(image.size) <= max_side:
+        return image
+    scale = max_side / max(image.size)
+    return image.resize(
+        (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+        Image.LANCZOS
+    )
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Compute the Otsu binarization threshold of a grayscale image"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 127
+    best_variance = 0.0
+
+    for level, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += level * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+
+    return best_threshold
+
+def binarize(image: Image.Image, threshold: Optional[int] = None) -> Image.Image:
+    """Threshold a grayscale image to black text on white"""
+    if threshold is None:
+        threshold = otsu_threshold(image)
+    return image.point([255 if value > threshold else 0 for value in range(256)], mode="L")
+
+def _row_profile_score(image: Image.Image) -> float:
+    """Variance of the row darkness: highest when text lines are horizontal"""
+    # A 1-pixel wide BOX resize yields the mean of every row
+    rows = list(image.resize((1, image.height), Image.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((value - mean) ** 2 for value in rows) / len(rows)
+
+def estimate_skew_angle(image: Image.Image, max_angle: float = DESKEW_MAX_ANGLE) -> float:
+    """Estimate the skew angle in degrees with a projection profile search"""
+    sample = image
+    if image.width > DESKEW_SAMPLE_WIDTH:
+        ratio = DESKEW_SAMPLE_WIDTH / image.width
+        sample = image.resize((DESKEW_SAMPLE_WIDTH, max(1, int(image.height * ratio))), Image.BILINEAR)
+    # Text as white on black so rotation padding does not add ink
+    sample = ImageOps.invert(binarize(sample))
+
+    best_angle = 0.0
+    best_score = _row_profile_score(sample)
+    steps = int(max_angle / DESKEW_STEP)
+    for step in range(-steps, steps + 1):
+        angle = step * DESKEW_STEP
+        if angle == 0:
+            continue
+        score = _row_profile_score(sample.rotate(angle, resample=Image.NEAREST, fillcolor=0))
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+
+    return best_angle
+
+def crop_to_content(image: Image.Image, margin: int = CROP_MARGIN) -> Image.Image:
+    """Crop a binarized image to the bounding box of its dark content"""
+    bbox = ImageOps.invert(image).getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - margin),
+        max(0, top - margin),
+        min(image.width, right + margin),
+        min(image.height, bottom + margin)
+    ))
+
+def preprocess_for_ocr(image: Image.Image, dpi: int = OCR_TARGET_DPI) -> Image.Image:
+    """Downscale, grayscale, deskew, threshold and crop an image for Tesseract"""
+    image = downscale(image, dpi)
+    image = ImageOps.autocontrast(image.convert("L"), cutoff=1)
+
+    angle = estimate_skew_angle(image)
+    if angle:
+        image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    # Light denoise before thresholding removes speckles from phone photos
+    image = binarize(image.filter(ImageFilter.MedianFilter(3)))
+    return crop_to_content(image)
+
+def make_thumbnail(image: Image.Image, output_path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> str:
+    """Save a small JPEG thumbnail of an image"""
+    thumbnail = ImageOps.exif_transpose(image).convert("RGB")
+    thumbnail.thumbnail(size, Image.LANCZOS)
+    thumbnail.save(output_path, "JPEG", quality=80, optimize=True)
+    return output_path
@@ -3,6 +3,7 @@ IMU (Imposta Municipale Unica) calculation utilities
 """
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any
+from utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
@@ -114,6 +115,7 @@ class IMUCalculator:
             logger.error(f"Error calculating annual IMU: {str(e)}")
             raise
     
+    @traced("imu.calculate", root=False)
     def calculate_imu_for_property(self, property_details: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate IMU for a specific property"""
         try:
@@ -0,0 +1,24 @@
+"""
+Scheduler job entrypoints, referenced by name ("utils.jobs:check_reminders")
+
+A persistent jobstore like Redis pickles each job, so jobs can't point at
+methods of SchedulerService, which holds the scheduler itself; these
+functions look the process' service up when they run instead.
+"""
+from utils.services import get_scheduler_service
+
+async def check_reminders():
+    """Daily check of the due reminders"""
+    await get_scheduler_service().check_reminders()
+
+async def check_imu_reminders():
+    """IMU reminders before the June and December payments"""
+    await get_scheduler_service().check_imu_reminders()
+
+async def check_vehicle_reminders():
+    """Weekly check of the vehicle reminders"""
+    await get_scheduler_service().check_vehicle_reminders()
+
+async def purge_tombstones():
+    """Weekly purge of the expired delta sync tombstones"""
+    await get_scheduler_service().purge_tombstones()
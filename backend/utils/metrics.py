@@ -0,0 +1,243 @@
+"""
+Prometheus metrics and the instrumentation helpers modules call
+"""
+import os
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator
+
+# prometheus_client enters multiprocess mode when the variable merely exists;
+# an empty value (e.g. from .env) means off here, as in metrics_response
+if "PROMETHEUS_MULTIPROC_DIR" in os.environ and not os.environ["PROMETHEUS_MULTIPROC_DIR"]:
+    del os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.query_tracker import track_queries, report, budget_of
+import logging
+
+logger = logging.getLogger(__name__)
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "casapiu_http_request_duration_seconds", "Request latency by route",
+    ["method", "route"]
+)
+HTTP_RESPONSES = Counter(
+    "casapiu_http_responses_total", "Responses by route and status code",
+    ["method", "route", "status"]
+)
+HTTP_DB_QUERIES = Histogram(
+    "casapiu_http_request_db_queries", "SQL statements executed per request",
+    ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+HTTP_DB_DURATION = Histogram(
+    "casapiu_http_request_db_seconds", "Time spent in SQL statements per request",
+    ["route"]
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "casapiu_query_budget_exceeded_total", "Requests over their route's query budget", ["route"]
+)
+REPEATED_QUERIES = Counter(
+    "casapiu_repeated_queries_total", "Requests or jobs repeating the same SELECT (possible N+1)", ["source"]
+)
+
+# Database pool
+DB_POOL_SIZE = Gauge("casapiu_db_pool_size", "Configured connection pool size")
+DB_POOL_CHECKED_OUT = Gauge("casapiu_db_pool_checked_out", "Connections currently in use")
+DB_POOL_OVERFLOW = Gauge("casapiu_db_pool_overflow", "Connections open beyond the pool size")
+
+# Scheduler jobs
+JOB_DURATION = Histogram(
+    "casapiu_job_duration_seconds", "Scheduler job duration",
+    ["job"], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+JOB_RUNS = Counter("casapiu_job_runs_total", "Scheduler job runs by outcome", ["job", "outcome"])
+JOB_ROWS = Counter("casapiu_job_rows_processed_total", "Rows processed by scheduler jobs", ["job"])
+JOB_DB_QUERIES = Counter("casapiu_job_db_queries_total", "SQL statements executed by scheduler jobs", ["job"])
+JOB_LAST_SUCCESS = Gauge("casapiu_job_last_success_timestamp_seconds", "Last successful run of a job", ["job"])
+
+# Last run of each job in this process, for the readiness check
+job_last_runs: Dict[str, Dict[str, Any]] = {}
+
+# Integrations
+FCM_SENDS = Counter("casapiu_fcm_sends_total", "Push notifications by outcome", ["outcome"])
+F24_RENDER_DURATION = Histogram(
+    "casapiu_f24_render_seconds", "F24 PDF render time",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+LLM_DURATION = Histogram(
+    "casapiu_llm_request_seconds", "LLM request latency (whole stream when streaming)",
+    ["provider", "mode"], buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+)
+
+# Startup
+STARTUP_DURATION = Gauge("casapiu_startup_seconds", "Time spent starting this process, by phase", ["phase"])
+
+# Cache and rate limiting
+CACHE_LOOKUPS = Counter("casapiu_cache_lookups_total", "Response cache lookups", ["scope", "result"])
+RATE_LIMIT_DECISIONS = Counter(
+    "casapiu_rate_limit_requests_total", "Rate limited route requests by decision",
+    ["route", "decision"]
+)
+
+@contextmanager
+def timed(histogram: Histogram, **labels) -> Iterator[None]:
+    """Observe the duration of the block, also when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - start)
+
+@dataclass
+class JobRun:
+    """A scheduler job run, set `rows` to the rows it processed"""
+    name: str
+    rows: int = 0
+
+@contextmanager
+def track_job(name: str) -> Iterator[JobRun]:
+    """Record duration, outcome, rows and SQL statements of a scheduler job"""
+    run = JobRun(name)
+    start = time.perf_counter()
+    with track_queries() as queries:
+        try:
+            yield run
+        except Exception as e:
+            JOB_RUNS.labels(job=name, outcome="failure").inc()
+            job_last_runs.setdefault(name, {}).update(last_failure=datetime.now().isoformat(), error=str(e))
+            raise
+        else:
+            JOB_RUNS.labels(job=name, outcome="success").inc()
+            JOB_LAST_SUCCESS.labels(job=name).set_to_current_time()
+            job_last_runs.setdefault(name, {}).update(last_success=datetime.now().isoformat(), rows=run.rows)
+        finally:
+            JOB_DURATION.labels(job=name).observe(time.perf_counter() - start)
+            JOB_ROWS.labels(job=name).inc(run.rows)
+            JOB_DB_QUERIES.labels(job=name).inc(queries.count)
+            repeated, _ = report(queries, f"job {name}")
+            if repeated:
+                REPEATED_QUERIES.labels(source=f"job:{name}").inc()
+            logger.info(f"Job {name}: {run.rows} rows, {queries.count} queries, {1000 * queries.duration:.1f}ms in DB")
+
+def record_fcm(outcome: str, count: int = 1):
+    """Count push notifications: sent, failed or skipped"""
+    if count:
+        FCM_SENDS.labels(outcome=outcome).inc(count)
+
+def time_f24_render():
+    """Time an F24 PDF render"""
+    return timed(F24_RENDER_DURATION)
+
+def time_llm(provider: str, mode: str = "complete"):
+    """Time an LLM call, mode is complete or stream"""
+    return timed(LLM_DURATION, provider=provider, mode=mode)
+
+def record_cache_lookup(scope: str, result: str):
+    """Count a response cache lookup: hit, miss or error"""
+    CACHE_LOOKUPS.labels(scope=scope, result=result).inc()
+
+def record_rate_limit(route: str, allowed: bool):
+    """Count a rate limit decision"""
+    RATE_LIMIT_DECISIONS.labels(route=route, decision="allowed" if allowed else "rejected").inc()
+
+def record_startup(phase: str, seconds: float):
+    """Record and log a startup phase: import, app or lifespan"""
+    STARTUP_DURATION.labels(phase=phase).set(seconds)
+    logger.info(f"Startup {phase}: {1000 * seconds:.0f}ms")
+
+def observe_pool(engine: Engine):
+    """Expose the connection pool of an engine as gauges, read at scrape time"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        logger.info(f"{type(pool).__name__} has no size statistics, pool gauges disabled")
+        return
+    DB_POOL_SIZE.set_function(pool.size)
+    DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+    DB_POOL_OVERFLOW.set_function(lambda: max(0, pool.overflow()))
+
+def route_label(scope: Scope) -> str:
+    """Route template of a request, so path parameters don't create new series"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """Per-route latency, status and SQL statement metrics.
+
+    Also logs each request with its query count and DB time, and checks
+    the route's query budget (see utils.query_tracker.query_budget).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = time.perf_counter() - start
+                route = route_label(scope)
+                method = scope["method"]
+                HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(duration)
+                HTTP_RESPONSES.labels(method=method, route=route, status=str(status_code)).inc()
+                HTTP_DB_QUERIES.labels(route=route).observe(queries.count)
+                HTTP_DB_DURATION.labels(route=route).observe(queries.duration)
+                logger.info(
+                    f"{method} {scope['path']} {status_code} {1000 * duration:.1f}ms "
+                    f"queries={queries.count} db={1000 * queries.duration:.1f}ms"
+                )
+
+        budget = budget_of(getattr(scope.get("route"), "endpoint", None))
+        repeated, exceeded = report(queries, f"{method} {route}", budget)
+        if repeated:
+            REPEATED_QUERIES.labels(source=f"route:{route}").inc()
+        if exceeded:
+            QUERY_BUDGET_EXCEEDED.labels(route=route).inc()
+
+def mark_process_dead():
+    """Drop this worker's live gauge files at shutdown in multiprocess mode.
+
+    Stands in for gunicorn's child_exit hook, which uvicorn doesn't have;
+    workers that crash leave their files until the directory is emptied
+    at the next start.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+def metrics_response() -> Response:
+    """Prometheus exposition of every metric of this process.
+
+    With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR (a directory
+    shared by the workers, emptied before uvicorn starts) to aggregate the
+    metrics of all of them; gauges read at scrape time, like the pool ones,
+    are then left out.
+    """
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -6,16 +6,27 @@ import json
 import firebase_admin
 from firebase_admin import credentials, messaging
 from typing import List, Dict, Any
+from utils.metrics import record_fcm
+from utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
-    """Firebase Cloud Messaging service for push notifications"""
+    """Firebase Cloud Messaging service for push notifications.
+
+    `transport` sends the built messages (send and send_multicast, like
+    firebase_admin.messaging); when given, Firebase is not initialized,
+    which lets benchmarks and tests run against a fake one.
+    """
     
-    def __init__(self):
+    def __init__(self, transport=None):
         self.app = None
-        self.initialize_firebase()
+        self.transport = transport
+        if transport is None:
+            self.initialize_firebase()
+            if self.app:
+                self.transport = messaging
     
     def initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
@@ -37,6 +48,7 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Firebase initialization error: {str(e)}")
     
+    @traced("fcm.send", root=False)
     async def send_notification(
         self,
         token: str,
@@ -45,8 +57,9 @@ class NotificationService:
         data: Dict[str, Any] = None
     ) -> bool:
         """Send push notification to a single device"""
-        if not self.app:
+        if not self.transport:
             logger.warning("Firebase not initialized, skipping notification")
+            record_fcm("skipped")
             return False
         
         try:
@@ -73,14 +86,17 @@ class NotificationService:
                 )
             )
             
-            response = messaging.send(message)
+            response = self.transport.send(message)
             logger.info(f"Notification sent successfully: {response}")
+            record_fcm("sent")
             return True
             
         except Exception as e:
             logger.error(f"Failed to send notification: {str(e)}")
+            record_fcm("failed")
             return False
     
+    @traced("fcm.send_multicast", root=False)
     async def send_bulk_notifications(
         self,
         tokens: List[str],
@@ -89,8 +105,9 @@ class NotificationService:
         data: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """Send push notifications to multiple devices"""
-        if not self.app:
+        if not self.transport:
             logger.warning("Firebase not initialized, skipping notifications")
+            record_fcm("skipped", len(tokens))
             return {"success": 0, "failure": len(tokens)}
         
         try:
@@ -117,8 +134,10 @@ class NotificationService:
                 )
             )
             
-            response = messaging.send_multicast(message)
+            response = self.transport.send_multicast(message)
             logger.info(f"Bulk notifications sent: {response.success_count} success, {response.failure_count} failed")
+            record_fcm("sent", response.success_count)
+            record_fcm("failed", response.failure_count)
             
             return {
                 "success": response.success_count,
@@ -128,6 +147,7 @@ class NotificationService:
             
         except Exception as e:
             logger.error(f"Failed to send bulk notifications: {str(e)}")
+            record_fcm("failed", len(tokens))
             return {"success": 0, "failure": len(tokens)}
     
     async def send_imu_reminder(self, token: str, asset_name: str, due_date: str, amount: float):
@@ -0,0 +1,181 @@
+"""
+Opt-in sampling profiler for requests and scheduler jobs
+"""
+import os
+import re
+import hmac
+import time
+import random
+import functools
+from datetime import datetime
+from typing import Callable, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.metrics import route_label
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Profiling configuration, nothing is profiled unless PROFILING_ENABLED is set
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Share of requests and job runs profiled at random
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# When set, every request and job is profiled and kept only if slower than this
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+# Requests sending "X-Profile: <token>" are always profiled
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+PROFILE_HEADER = "x-profile"
+
+class Profile:
+    """A running profile: pyinstrument when installed (HTML output), cProfile otherwise (.prof)"""
+
+    _cprofile_active = False
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+
+            # async_mode attributes awaited time to the task that awaits it
+            self._profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+            self.kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self.kind = "cprofile"
+
+    @classmethod
+    def start(cls) -> Optional["Profile"]:
+        """Start a profile, None when one can't run now (cProfile runs one at a time)"""
+        profile = cls()
+        if profile.kind == "cprofile":
+            if cls._cprofile_active:
+                return None
+            cls._cprofile_active = True
+            profile._profiler.enable()
+        else:
+            profile._profiler.start()
+        return profile
+
+    def stop(self):
+        if self.kind == "cprofile":
+            self._profiler.disable()
+            Profile._cprofile_active = False
+        else:
+            self._profiler.stop()
+
+    def save(self, base_name: str) -> str:
+        """Write the profile under PROFILE_DIR and return its path"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self.kind == "cprofile":
+            path = os.path.join(PROFILE_DIR, f"{base_name}.prof")
+            self._profiler.dump_stats(path)
+        else:
+            path = os.path.join(PROFILE_DIR, f"{base_name}.html")
+            with open(path, "w") as out:
+                out.write(self._profiler.output_html())
+        prune_profiles()
+        return path
+
+def prune_profiles(max_files: int = PROFILE_MAX_FILES):
+    """Delete the oldest profiles beyond max_files"""
+    paths = sorted(
+        (os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)),
+        key=os.path.getmtime
+    )
+    for path in paths[:max(0, len(paths) - max_files)]:
+        os.remove(path)
+
+def profile_name(kind: str, name: str, elapsed_ms: float) -> str:
+    """File name: time, request or job, route or job name, duration"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") or "root"
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{kind}_{slug}_{elapsed_ms:.0f}ms"
+
+def admin_requested(headers: Headers) -> bool:
+    """Whether the request carries the admin profiling token"""
+    token = headers.get(PROFILE_HEADER)
+    return bool(PROFILE_ADMIN_TOKEN and token and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN))
+
+def should_keep(forced: bool, sampled: bool, elapsed_ms: float) -> bool:
+    """Keep forced and sampled profiles, the others only when slow"""
+    return forced or sampled or (PROFILE_SLOW_MS > 0 and elapsed_ms >= PROFILE_SLOW_MS)
+
+class ProfilingMiddleware:
+    """Profile requests selected by admin header, sampling rate or latency threshold.
+
+    Only installed when PROFILING_ENABLED is set. Admin-requested profiles
+    answer with an X-Profile-File header naming the saved file.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = admin_requested(Headers(scope=scope))
+        sampled = forced or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+        profile = Profile.start() if (sampled or PROFILE_SLOW_MS > 0) else None
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        base_name = None
+
+        async def send_wrapper(message: Message):
+            nonlocal base_name
+            if message["type"] == "http.response.start" and forced:
+                # Name the file now so the client learns it; the duration is the time to headers
+                elapsed_ms = 1000 * (time.perf_counter() - start)
+                base_name = profile_name("request", f"{scope['method']} {route_label(scope)}", elapsed_ms)
+                MutableHeaders(scope=message).append("X-Profile-File", base_name)
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            elapsed_ms = 1000 * (time.perf_counter() - start)
+            if should_keep(forced, sampled, elapsed_ms):
+                name = base_name or profile_name("request", f"{scope['method']} {route_label(scope)}", elapsed_ms)
+                try:
+                    path = await run_in_threadpool(profile.save, name)
+                    logger.info(f"Profile of {scope['method']} {scope['path']} ({elapsed_ms:.0f}ms) saved to {path}")
+                except Exception as e:
+                    logger.error(f"Failed to save profile: {str(e)}")
+
+def profile_job(name: str) -> Callable:
+    """Profile an async scheduler job selected by sampling rate or latency threshold"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not PROFILING_ENABLED:
+                return await func(*args, **kwargs)
+
+            sampled = PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+            profile = Profile.start() if (sampled or PROFILE_SLOW_MS > 0) else None
+            if profile is None:
+                return await func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                profile.stop()
+                elapsed_ms = 1000 * (time.perf_counter() - start)
+                if should_keep(False, sampled, elapsed_ms):
+                    try:
+                        path = await run_in_threadpool(profile.save, profile_name("job", name, elapsed_ms))
+                        logger.info(f"Profile of job {name} ({elapsed_ms:.0f}ms) saved to {path}")
+                    except Exception as e:
+                        logger.error(f"Failed to save profile: {str(e)}")
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""
+SQL statement counting per request or job through SQLAlchemy engine events,
+with N+1 detection and per-route query budgets
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The same SELECT run this many times in one request or job is flagged as N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+# Raise QueryBudgetExceeded instead of logging (set in tests and CI)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more statements than its declared budget"""
+
+@dataclass
+class QueryStats:
+    """Statements executed and time spent in the database by one unit of work"""
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """SELECT statements run at least `threshold` times, most repeated first"""
+        return [
+            (statement, count) for statement, count in self.statements.most_common()
+            if count >= threshold and statement.lstrip().upper().startswith("SELECT")
+        ]
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed inside the block (nested blocks count separately)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def current_stats() -> Optional[QueryStats]:
+    """Stats of the innermost tracked block, None outside of one"""
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - context._query_started_at
+        # Bound parameters are not part of the text: an N+1 loop repeats the same string
+        stats.statements[statement] += 1
+
+def install(engine: Engine):
+    """Listen to the statements of an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the maximum number of statements an endpoint may run.
+
+    Put it below the route decorator. Exceeding it is logged and counted,
+    and raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is set.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+def budget_of(endpoint: Optional[Callable]) -> Optional[int]:
+    """Declared query budget of an endpoint, None when it has none"""
+    return getattr(endpoint, "__query_budget__", None)
+
+def report(stats: QueryStats, label: str, budget: Optional[int] = None,
+           strict: Optional[bool] = None) -> Tuple[bool, bool]:
+    """Flag repeated statements and budget overruns of a unit of work.
+
+    Returns (has repeated statements, budget exceeded). `strict` defaults to
+    QUERY_BUDGET_STRICT, read at call time so tests can switch it on; for a
+    request the error is raised once the response is sent, which the test
+    client re-raises.
+    """
+    if strict is None:
+        strict = QUERY_BUDGET_STRICT
+    repeated = stats.repeated()
+    for statement, count in repeated:
+        logger.warning(f"Possible N+1 in {label}: statement run {count} times: {' '.join(statement.split())[:200]}")
+
+    exceeded = budget is not None and stats.count > budget
+    if exceeded:
+        message = f"{label} ran {stats.count} SQL statements, budget is {budget}"
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return bool(repeated), exceeded
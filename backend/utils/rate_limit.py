@@ -0,0 +1,201 @@
+"""
+Per-user token bucket rate limiting for expensive endpoints (Redis, in-process fallback)
+"""
+import os
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from models import User
+from utils.auth import get_current_user
+from utils.metrics import record_rate_limit
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rate limit configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Default "<requests>/<seconds>" per route, overridable with RATE_LIMIT_<ROUTE>
+DEFAULT_LIMITS = {
+    "f24_generate": "10/60",
+    "suggestions_ai": "20/3600",
+    "reminders_run": "5/300"
+}
+
+# Per-user overrides as JSON, e.g. {"42": {"suggestions_ai": "100/3600"}}
+RATE_LIMIT_USER_OVERRIDES = os.getenv("RATE_LIMIT_USER_OVERRIDES", "{}")
+
+@dataclass(frozen=True)
+class Limit:
+    """Bucket of `capacity` tokens refilled at `capacity / period` per second"""
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        requests, seconds = value.split("/", 1)
+        limit = cls(capacity=int(requests), period=float(seconds))
+        if limit.capacity <= 0 or limit.period <= 0:
+            raise ValueError(f"Invalid rate limit: {value}")
+        return limit
+
+def load_limits() -> Dict[str, Limit]:
+    """Route limits from the defaults and the environment"""
+    return {
+        route: Limit.parse(os.getenv(f"RATE_LIMIT_{route.upper()}", default))
+        for route, default in DEFAULT_LIMITS.items()
+    }
+
+def load_user_overrides() -> Dict[int, Dict[str, Limit]]:
+    """Per-user route limits from RATE_LIMIT_USER_OVERRIDES"""
+    try:
+        overrides = json.loads(RATE_LIMIT_USER_OVERRIDES)
+        return {
+            int(user_id): {route: Limit.parse(value) for route, value in limits.items()}
+            for user_id, limits in overrides.items()
+        }
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Invalid RATE_LIMIT_USER_OVERRIDES, ignoring it: {str(e)}")
+        return {}
+
+class MemoryRateLimitBackend:
+    """In-process buckets, used when Redis is not configured (limits are per worker)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, limit: Limit, cost: float, now: float) -> Tuple[bool, float]:
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + max(0.0, now - updated_at) * limit.rate)
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            return True, 0.0
+        self._buckets[key] = (tokens, now)
+        return False, (cost - tokens) / limit.rate
+
+# Refill and take atomically: KEYS[1] bucket, ARGV capacity, rate, now, cost
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+class RedisRateLimitBackend:
+    """Buckets shared by all workers, takes any redis.asyncio compatible client (e.g. fakeredis in tests)"""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, limit: Limit, cost: float, now: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[key], args=[limit.capacity, limit.rate, now, cost])
+        return bool(int(allowed)), float(retry_after)
+
+def create_backend():
+    """Redis when REDIS_URL is set and the client is installed, in-process otherwise"""
+    if REDIS_URL:
+        try:
+            from redis import asyncio as aioredis
+
+            return RedisRateLimitBackend(aioredis.from_url(REDIS_URL))
+        except ImportError:
+            logger.warning("redis package not installed, using in-process rate limiting")
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning("In-process rate limiting with several workers: each worker allows the full limit, set REDIS_URL")
+    return MemoryRateLimitBackend()
+
+class RateLimiter:
+    """Token buckets keyed by user and route.
+
+    A request takes `cost` tokens from its bucket; an empty bucket rejects it
+    with the seconds until enough tokens are refilled. Backend errors let the
+    request through.
+    """
+
+    def __init__(self, backend=None, limits: Optional[Dict[str, Limit]] = None,
+                 user_overrides: Optional[Dict[int, Dict[str, Limit]]] = None,
+                 enabled: bool = RATE_LIMIT_ENABLED):
+        self.backend = backend or create_backend()
+        self.limits = limits if limits is not None else load_limits()
+        self.user_overrides = user_overrides if user_overrides is not None else load_user_overrides()
+        self.enabled = enabled
+        self.allowed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.errors = 0
+
+    def limit_for(self, user_id: int, route: str) -> Optional[Limit]:
+        """Limit of a route for a user, None when the route is unlimited"""
+        return self.user_overrides.get(user_id, {}).get(route, self.limits.get(route))
+
+    async def check(self, user_id: int, route: str, cost: float = 1) -> Tuple[bool, float]:
+        """Take tokens for a request, returns whether it is allowed and the seconds to wait otherwise"""
+        limit = self.limit_for(user_id, route)
+        if not self.enabled or limit is None:
+            return True, 0.0
+
+        try:
+            allowed, retry_after = await self.backend.take(
+                f"ratelimit:{route}:{user_id}", limit, cost, time.time()
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Rate limit check failed for {route}: {str(e)}")
+            return True, 0.0
+
+        counters = self.allowed if allowed else self.rejected
+        counters[route] = counters.get(route, 0) + 1
+        record_rate_limit(route, allowed)
+        return allowed, retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Allowed and rejected requests per route"""
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "errors": self.errors
+        }
+
+rate_limiter = RateLimiter()
+
+def rate_limit(route: str, cost: float = 1):
+    """Dependency rejecting the request with 429 when the user's bucket for `route` is empty"""
+    async def dependency(current_user: User = Depends(get_current_user)):
+        allowed, retry_after = await rate_limiter.check(current_user.id, route, cost)
+        if not allowed:
+            logger.info(f"Rate limit exceeded on {route} for user {current_user.id}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+    return dependency
@@ -2,24 +2,40 @@
 Scheduler service for automated reminders and tasks
 """
 import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.redis import RedisJobStore
-from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.executors.asyncio import AsyncIOExecutor
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 from database import SessionLocal
 from models import Reminder, User, Asset, Expense
 from utils.notifier import NotificationService
+from utils.cache import response_cache
+from utils.metrics import track_job
+from utils.profiling import profile_job
+from utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
 
+# A user's manual reminder run within this many seconds of the previous one returns its result
+REMINDERS_RUN_DEBOUNCE_SECONDS = float(os.getenv("REMINDERS_RUN_DEBOUNCE_SECONDS", "60"))
+
 class SchedulerService:
     """Background scheduler for automated reminders and tasks"""
     
-    def __init__(self):
+    def __init__(self, notification_service: NotificationService = None):
         self.scheduler = None
-        self.notification_service = NotificationService()
+        self.notification_service = notification_service or NotificationService()
+        # user id -> (monotonic time, result) of the last manual run, and a lock per user
+        self._user_runs: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._user_run_locks: Dict[int, asyncio.Lock] = {}
         self.setup_scheduler()
     
     def setup_scheduler(self):
@@ -28,18 +44,23 @@ class SchedulerService:
             # Configure jobstore (use in-memory if Redis not available)
             redis_url = os.getenv("REDIS_URL")
             if redis_url:
+                url = urlparse(redis_url)
                 jobstores = {
                     'default': RedisJobStore(
-                        host=redis_url.split('@')[1].split(':')[0] if '@' in redis_url else 'localhost',
-                        port=int(redis_url.split(':')[-1]) if ':' in redis_url else 6379,
-                        db=0
+                        host=url.hostname or 'localhost',
+                        port=url.port or 6379,
+                        db=int(url.path.lstrip('/') or 0),
+                        username=url.username,
+                        password=url.password,
+                        ssl=url.scheme == 'rediss'
                     )
                 }
             else:
-                jobstores = {'default': 'memory'}
+                jobstores = {'default': MemoryJobStore()}
             
+            # The jobs are coroutines: they have to be awaited on the event loop
             executors = {
-                'default': ThreadPoolExecutor(max_workers=4),
+                'default': AsyncIOExecutor(),
             }
             
             job_defaults = {
@@ -59,15 +80,17 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Scheduler setup error: {str(e)}")
     
-    async def start(self):
-        """Start the scheduler"""
+    async def start(self) -> bool:
+        """Start the scheduler, returns whether the recurring jobs were scheduled"""
         if self.scheduler:
             self.scheduler.start()
             
             # Schedule recurring jobs
-            await self.schedule_recurring_jobs()
+            scheduled = await self.schedule_recurring_jobs()
             
             logger.info("Scheduler started")
+            return scheduled
+        return False
     
     async def shutdown(self):
         """Shutdown the scheduler"""
@@ -75,12 +98,16 @@ class SchedulerService:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
     
-    async def schedule_recurring_jobs(self):
-        """Schedule all recurring jobs"""
+    async def schedule_recurring_jobs(self) -> bool:
+        """Schedule all recurring jobs, returns whether they were scheduled.
+
+        Jobs are given as textual references to utils.jobs, so a Redis
+        jobstore can serialize them.
+        """
         try:
             # Daily reminder check at 9:00 AM
             self.scheduler.add_job(
-                func=self.check_reminders,
+                func="utils.jobs:check_reminders",
                 trigger="cron",
                 hour=9,
                 minute=0,
@@ -90,7 +117,7 @@ class SchedulerService:
             
             # IMU reminder check (run twice yearly)
             self.scheduler.add_job(
-                func=self.check_imu_reminders,
+                func="utils.jobs:check_imu_reminders",
                 trigger="cron",
                 month="6,12",
                 day=1,
@@ -102,7 +129,7 @@ class SchedulerService:
             
             # Weekly vehicle reminder check
             self.scheduler.add_job(
-                func=self.check_vehicle_reminders,
+                func="utils.jobs:check_vehicle_reminders",
                 trigger="cron",
                 day_of_week="mon",
                 hour=10,
@@ -111,81 +138,206 @@ class SchedulerService:
                 replace_existing=True
             )
             
+            # Weekly purge of expired delta sync tombstones
+            self.scheduler.add_job(
+                func="utils.jobs:purge_tombstones",
+                trigger="cron",
+                day_of_week="sun",
+                hour=3,
+                minute=0,
+                id="tombstone_purge",
+                replace_existing=True
+            )
+            
             logger.info("Recurring jobs scheduled")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to schedule recurring jobs: {str(e)}")
+            return False
     
+    @profile_job("check_reminders")
+    @traced("job check_reminders")
     async def check_reminders(self):
         """Check and send due reminders"""
         try:
-            db = SessionLocal()
-            
-            # Get reminders due today or overdue
-            tomorrow = datetime.now() + timedelta(days=1)
-            due_reminders = db.query(Reminder).filter(
-                Reminder.date <= tomorrow,
-                Reminder.notified == False
-            ).all()
-            
-            for reminder in due_reminders:
-                await self.send_reminder_notification(reminder, db)
-                reminder.notified = True
-            
-            db.commit()
-            db.close()
-            
-            logger.info(f"Processed {len(due_reminders)} reminders")
+            with track_job("check_reminders") as job:
+                db = SessionLocal()
+                
+                processed = await self.process_due_reminders(db)
+                
+                db.close()
+                job.rows = len(processed)
+                
+                logger.info(f"Processed {len(processed)} reminders")
             
         except Exception as e:
             logger.error(f"Reminder check failed: {str(e)}")
     
+    async def process_due_reminders(self, db: Session, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Send and mark the due reminders, of one user when user_id is given"""
+        # Get reminders due today or overdue
+        tomorrow = datetime.now() + timedelta(days=1)
+        # Asset and owner are read per reminder: load them in the same query
+        query = db.query(Reminder).options(
+            joinedload(Reminder.asset).joinedload(Asset.owner)
+        ).filter(
+            Reminder.date <= tomorrow,
+            Reminder.notified == False
+        )
+        if user_id is not None:
+            # Served by the partial index on pending reminders (asset_id, date)
+            query = query.filter(Reminder.asset_id.in_(select(Asset.id).where(Asset.user_id == user_id)))
+        due_reminders = query.all()
+        
+        processed = []
+        user_ids = set()
+        for reminder in due_reminders:
+            sent = await self.send_reminder_notification(reminder, db)
+            reminder.notified = True
+            user_ids.add(reminder.asset.user_id)
+            processed.append({
+                "id": reminder.id,
+                "asset_id": reminder.asset_id,
+                "asset_name": reminder.asset.name,
+                "type": reminder.type,
+                "date": reminder.date,
+                "sent": sent
+            })
+        
+        db.commit()
+        
+        for affected_user_id in user_ids:
+            await response_cache.invalidate(affected_user_id, "reminders")
+        
+        return processed
+    
+    async def run_user_reminders(self, user_id: int, db: Session) -> Dict[str, Any]:
+        """Manual run over one user's due reminders, debounced per user.
+
+        Calls within REMINDERS_RUN_DEBOUNCE_SECONDS of the previous run, or
+        while one is in progress, return that run's result without scanning.
+        The state lives in this process: with several API workers each one
+        debounces on its own and only the rate limiter applies across them.
+        """
+        lock = self._user_run_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            last_run = self._user_runs.get(user_id)
+            if last_run and now - last_run[0] < REMINDERS_RUN_DEBOUNCE_SECONDS:
+                return {**last_run[1], "debounced": True}
+            
+            processed = await self.process_due_reminders(db, user_id=user_id)
+            result = {
+                "processed": len(processed),
+                "sent": sum(1 for reminder in processed if reminder["sent"]),
+                "reminders": processed,
+                "ran_at": datetime.now().isoformat(),
+                "debounced": False
+            }
+            
+            # Drop expired entries so the maps only hold recent runs and locks in use
+            self._user_runs = {
+                other_id: run for other_id, run in self._user_runs.items()
+                if now - run[0] < REMINDERS_RUN_DEBOUNCE_SECONDS
+            }
+            self._user_runs[user_id] = (now, result)
+            self._user_run_locks = {
+                other_id: other_lock for other_id, other_lock in self._user_run_locks.items()
+                if other_id in self._user_runs or other_lock.locked()
+            }
+            logger.info(f"Manual reminder run for user {user_id}: {len(processed)} reminders")
+            return result
+    
+    @profile_job("check_imu_reminders")
+    @traced("job check_imu_reminders")
     async def check_imu_reminders(self):
         """Check for IMU payment reminders"""
         try:
-            db = SessionLocal()
-            
-            # Get properties with IMU automation enabled
-            current_month = datetime.now().month
-            is_first_payment = current_month == 6
-            is_second_payment = current_month == 12
-            
-            if is_first_payment or is_second_payment:
-                properties = db.query(Asset).join(Asset.automations).filter(
-                    Asset.type == "property",
-                    Asset.automations.any(imu_calc=True)
-                ).all()
+            with track_job("check_imu_reminders") as job:
+                db = SessionLocal()
                 
-                for property_asset in properties:
-                    await self.create_imu_reminder(property_asset, is_first_payment, db)
-            
-            db.commit()
-            db.close()
+                # Get properties with IMU automation enabled
+                current_month = datetime.now().month
+                is_first_payment = current_month == 6
+                is_second_payment = current_month == 12
+                
+                user_ids = set()
+                if is_first_payment or is_second_payment:
+                    properties = db.query(Asset).join(Asset.automations).filter(
+                        Asset.type == "property",
+                        Asset.automations.any(imu_calc=True)
+                    ).all()
+                    
+                    # One query for the existing reminders instead of one per property
+                    reminder_date = self.imu_reminder_date(is_first_payment)
+                    existing_asset_ids = {
+                        asset_id for (asset_id,) in db.query(Reminder.asset_id).filter(
+                            Reminder.asset_id.in_([property_asset.id for property_asset in properties]),
+                            Reminder.type == "imu",
+                            Reminder.date == reminder_date
+                        )
+                    }
+                    
+                    for property_asset in properties:
+                        if property_asset.id in existing_asset_ids:
+                            continue
+                        if await self.create_imu_reminder(property_asset, is_first_payment, db, check_existing=False):
+                            user_ids.add(property_asset.user_id)
+                    job.rows = len(properties)
+                
+                db.commit()
+                db.close()
+                
+                for user_id in user_ids:
+                    await response_cache.invalidate(user_id, "reminders")
             
         except Exception as e:
             logger.error(f"IMU reminder check failed: {str(e)}")
     
+    @profile_job("check_vehicle_reminders")
+    @traced("job check_vehicle_reminders")
     async def check_vehicle_reminders(self):
         """Check for vehicle-related reminders"""
         try:
-            db = SessionLocal()
-            
-            # This would typically check external APIs or predefined schedules
-            # For now, we'll create placeholder reminders
-            vehicles = db.query(Asset).filter(Asset.type == "vehicle").all()
-            
-            for vehicle in vehicles:
-                # Create reminders based on vehicle registration date, etc.
-                pass
-            
-            db.commit()
-            db.close()
+            with track_job("check_vehicle_reminders") as job:
+                db = SessionLocal()
+                
+                # This would typically check external APIs or predefined schedules
+                # For now, we'll create placeholder reminders
+                vehicles = db.query(Asset).filter(Asset.type == "vehicle").all()
+                
+                for vehicle in vehicles:
+                    # Create reminders based on vehicle registration date, etc.
+                    pass
+                
+                db.commit()
+                db.close()
+                job.rows = len(vehicles)
             
         except Exception as e:
             logger.error(f"Vehicle reminder check failed: {str(e)}")
     
-    async def send_reminder_notification(self, reminder: Reminder, db: Session):
-        """Send notification for a specific reminder"""
+    @profile_job("tombstone_purge")
+    @traced("job tombstone_purge")
+    async def purge_tombstones(self):
+        """Delete delta sync tombstones past their retention"""
+        try:
+            from utils.sync import purge_tombstones
+            with track_job("tombstone_purge") as job:
+                db = SessionLocal()
+                
+                job.rows = purge_tombstones(db)
+                db.close()
+                
+                logger.info(f"Purged {job.rows} tombstones")
+            
+        except Exception as e:
+            logger.error(f"Tombstone purge failed: {str(e)}")
+    
+    async def send_reminder_notification(self, reminder: Reminder, db: Session) -> bool:
+        """Send notification for a specific reminder, returns whether it was delivered"""
+        sent = False
         try:
             asset = reminder.asset
             user = asset.owner
@@ -195,14 +347,14 @@ class SchedulerService:
             fcm_token = "placeholder_token"
             
             if reminder.type == "imu":
-                await self.notification_service.send_imu_reminder(
+                sent = await self.notification_service.send_imu_reminder(
                     token=fcm_token,
                     asset_name=asset.name,
                     due_date=reminder.date.strftime("%d/%m/%Y"),
                     amount=0  # Calculate from asset details
                 )
             elif reminder.type in ["bollo", "assicurazione", "revisione"]:
-                await self.notification_service.send_vehicle_reminder(
+                sent = await self.notification_service.send_vehicle_reminder(
                     token=fcm_token,
                     vehicle_name=asset.name,
                     reminder_type=reminder.type,
@@ -213,15 +365,21 @@ class SchedulerService:
             
         except Exception as e:
             logger.error(f"Failed to send reminder notification: {str(e)}")
+        return sent
+    
+    def imu_reminder_date(self, is_first_payment: bool) -> datetime:
+        """Date of this year's IMU reminder, 15 days before the due date"""
+        due_date = datetime(datetime.now().year, 6 if is_first_payment else 12, 16)
+        return due_date - timedelta(days=15)
     
-    async def create_imu_reminder(self, property_asset: Asset, is_first_payment: bool, db: Session):
-        """Create IMU reminder for a property"""
+    async def create_imu_reminder(self, property_asset: Asset, is_first_payment: bool, db: Session,
+                                  check_existing: bool = True) -> bool:
+        """Create IMU reminder for a property, returns whether one was added"""
         try:
-            due_date = datetime(datetime.now().year, 6 if is_first_payment else 12, 16)
-            reminder_date = due_date - timedelta(days=15)  # 15 days before
+            reminder_date = self.imu_reminder_date(is_first_payment)
             
             # Check if reminder already exists
-            existing = db.query(Reminder).filter(
+            existing = check_existing and db.query(Reminder).filter(
                 Reminder.asset_id == property_asset.id,
                 Reminder.type == "imu",
                 Reminder.date == reminder_date
@@ -237,9 +395,11 @@ class SchedulerService:
                 )
                 db.add(reminder)
                 logger.info(f"Created IMU reminder for {property_asset.name}")
+                return True
         
         except Exception as e:
             logger.error(f"Failed to create IMU reminder: {str(e)}")
+        return False
     
     def add_custom_reminder(self, run_date: datetime, func, *args, **kwargs):
         """Add a custom one-time reminder"""
@@ -0,0 +1,41 @@
+"""
+Shared service instances, created on first use instead of at import
+"""
+import os
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Run the background jobs in this process; off in tests and in extra web instances
+ENABLE_SCHEDULER = os.getenv("ENABLE_SCHEDULER", "true").lower() == "true"
+# Run create_all at startup (off when the schema is managed by migrations)
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "true").lower() == "true"
+
+@functools.lru_cache(maxsize=None)
+def get_notification_service():
+    """The process' NotificationService, Firebase is initialized once on first use"""
+    from utils.notifier import NotificationService
+    return NotificationService()
+
+@functools.lru_cache(maxsize=None)
+def get_scheduler_service():
+    """The process' SchedulerService, sharing the notification service (configured, not started)"""
+    from utils.scheduler import SchedulerService
+    return SchedulerService(notification_service=get_notification_service())
+
+@functools.lru_cache(maxsize=None)
+def get_health_checker():
+    """Health checker over the shared services; the scheduler is reported disabled when ENABLE_SCHEDULER is off"""
+    from database import engine
+    from utils.health import HealthChecker
+    return HealthChecker(
+        engine,
+        get_scheduler_service() if ENABLE_SCHEDULER else None,
+        get_notification_service()
+    )
+
+def reset_services():
+    """Forget the shared instances, so tests can start from a clean state"""
+    for factory in (get_notification_service, get_scheduler_service, get_health_checker):
+        factory.cache_clear()
@@ -0,0 +1,241 @@
+"""
+Lightweight tracing: spans for requests, SQL, PDF, OCR, FCM and LLM calls with a local exporter
+"""
+import os
+import json
+import time
+import random
+import secrets
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tracing configuration: exporter is none, console or jsonl
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+# Share of new traces recorded; an incoming sampled traceparent is always followed
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+
+@dataclass
+class Span:
+    """A timed operation in a trace"""
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": datetime.fromtimestamp(self.start, timezone.utc).isoformat(),
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+class ConsoleExporter:
+    """One log line per finished span"""
+
+    def export(self, span: Span):
+        logger.info(
+            f"span {span.name} {span.duration_ms:.1f}ms trace={span.trace_id} "
+            f"parent={span.parent_id or '-'} {span.attributes}{' error=' + span.error if span.error else ''}"
+        )
+
+class JsonLinesExporter:
+    """One JSON object per finished span, appended to a file"""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as out:
+            out.write(line + "\n")
+
+def create_exporter():
+    """Exporter selected by TRACING_EXPORTER, None when tracing is off"""
+    if TRACING_EXPORTER == "console":
+        return ConsoleExporter()
+    if TRACING_EXPORTER == "jsonl":
+        return JsonLinesExporter()
+    return None
+
+exporter = create_exporter()
+
+# Innermost open span; None outside a trace or in an unsampled one
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def _finish(span: Span, started_at: float):
+    span.duration_ms = round(1000 * (time.perf_counter() - started_at), 3)
+    try:
+        exporter.export(span)
+    except Exception as e:
+        logger.warning(f"Span export failed: {str(e)}")
+
+@contextmanager
+def span(name: str, root: bool = True, trace_id: Optional[str] = None,
+         parent_id: Optional[str] = None, activate: bool = True, **attributes) -> Iterator[Optional[Span]]:
+    """Record the block as a span, child of the current one.
+
+    Outside a trace a new one is started (sampled by TRACE_SAMPLE_RATE)
+    unless `root` is False. Yields None when nothing is recorded. Use
+    `activate=False` in async generators, whose steps may run in different
+    contexts: the span is recorded but does not become the parent of others.
+    """
+    parent = _current_span.get()
+    if exporter is None or (parent is None and (
+        not root or (trace_id is None and random.random() >= TRACE_SAMPLE_RATE)
+    )):
+        yield None
+        return
+
+    new_span = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else trace_id or secrets.token_hex(16),
+        parent_id=parent.span_id if parent else parent_id,
+        attributes=attributes
+    )
+    token = _current_span.set(new_span) if activate else None
+    started_at = time.perf_counter()
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+        _finish(new_span, started_at)
+
+def traced(name: Optional[str] = None, root: bool = True) -> Callable:
+    """Decorator recording each call of a sync or async function as a span"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, root=root):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, root=root):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def in_context(func: Callable) -> Callable:
+    """Bind a callable to the current context, so spans opened in another thread nest correctly"""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """starlette's run_in_threadpool carrying the current span into the worker thread"""
+    return await starlette_run_in_threadpool(in_context(func), *args, **kwargs)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None:
+        context._trace_span = Span(
+            name="db.query",
+            trace_id=parent.trace_id,
+            parent_id=parent.span_id,
+            attributes={"statement": " ".join(statement.split())[:500], "executemany": executemany}
+        )
+        context._trace_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql_span = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.set(rows=cursor.rowcount)
+        _finish(sql_span, context._trace_started_at)
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    sql_span = getattr(context, "_trace_span", None) if context is not None else None
+    if sql_span is not None:
+        sql_span.error = f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}"
+        _finish(sql_span, context._trace_started_at)
+
+def install(engine: Engine):
+    """Record SQL statements run inside a trace as child spans (no-op when tracing is off)"""
+    if exporter is None or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def parse_traceparent(value: Optional[str]):
+    """(trace id, parent span id) of a sampled W3C traceparent header, (None, None) otherwise"""
+    try:
+        version, trace_id, parent_id, flags = value.split("-")
+        if len(trace_id) == 32 and len(parent_id) == 16 and int(flags, 16) & 1:
+            return trace_id, parent_id
+    except (AttributeError, ValueError):
+        pass
+    return None, None
+
+class TracingMiddleware:
+    """Root span per request, continuing the caller's trace from a traceparent header.
+
+    Sampled responses carry the trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        with span(f"{scope['method']} {scope['path']}", trace_id=trace_id, parent_id=parent_id,
+                  method=scope["method"], path=scope["path"]) as request_span:
+            if request_span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    request_span.set(status=message["status"])
+                    MutableHeaders(scope=message).append("X-Trace-Id", request_span.trace_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.name = f"{scope['method']} {route}"
+                    request_span.set(route=route)
@@ -59,6 +59,25 @@ class ApiService {
     return this.api.put('/auth/profile', data);
   }
 
+  // Home summary
+  async getSummary(reminderDays = 30) {
+    return this.api.get('/summary/', {
+      params: { reminder_days: reminderDays },
+    });
+  }
+
+  // Batch (offline queue replay)
+  async runBatch(operations: any[], atomic = false) {
+    return this.api.post('/batch/', { operations, atomic });
+  }
+
+  // Delta sync
+  async sync(since?: string) {
+    return this.api.get('/sync/', {
+      params: { since },
+    });
+  }
+
   // Assets
   async getAssets(type?: string, page = 1, perPage = 10) {
     return this.api.get('/assets/', {
@@ -19,7 +19,7 @@ CREATE TABLE IF NOT EXISTS assets (
     name VARCHAR(255) NOT NULL,
     details_json JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create expenses table
@@ -33,7 +33,7 @@ CREATE TABLE IF NOT EXISTS expenses (
     status VARCHAR(50) DEFAULT 'pending' CHECK (status IN ('pending', 'paid', 'overdue')),
     description TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create reminders table
@@ -44,7 +44,8 @@ CREATE TABLE IF NOT EXISTS reminders (
     date TIMESTAMP WITH TIME ZONE NOT NULL,
     message TEXT NOT NULL,
     notified BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create automations table
@@ -56,7 +57,7 @@ CREATE TABLE IF NOT EXISTS automations (
     ocr BOOLEAN DEFAULT FALSE,
     ai_suggestions BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(asset_id)
 );
 
@@ -66,10 +67,44 @@ CREATE TABLE IF NOT EXISTS documents (
     asset_id INTEGER NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
     file_url TEXT NOT NULL,
     file_type VARCHAR(50) NOT NULL,
+    content_hash VARCHAR(64),
+    size_bytes INTEGER,
+    thumbnail_url TEXT,
     parsed_data_json JSONB,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Deleted rows, reported by delta sync
+CREATE TABLE IF NOT EXISTS tombstones (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entity VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Upgrade existing databases
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS size_bytes INTEGER;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS thumbnail_url TEXT;
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE;
+-- Delta sync filters on updated_at alone: every row needs one
+ALTER TABLE assets ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE expenses ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE reminders ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE automations ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE documents ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+UPDATE assets SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE expenses SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE reminders SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE automations SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE documents SET updated_at = created_at WHERE updated_at IS NULL;
+
+-- details_json as JSONB for databases created with a plain JSON column
+ALTER TABLE assets ALTER COLUMN details_json TYPE JSONB USING details_json::jsonb;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_assets_user_id ON assets(user_id);
 CREATE INDEX IF NOT EXISTS idx_assets_type ON assets(type);
@@ -82,6 +117,19 @@ CREATE INDEX IF NOT EXISTS idx_reminders_date ON reminders(date);
 CREATE INDEX IF NOT EXISTS idx_reminders_notified ON reminders(notified);
 CREATE INDEX IF NOT EXISTS idx_automations_asset_id ON automations(asset_id);
 CREATE INDEX IF NOT EXISTS idx_documents_asset_id ON documents(asset_id);
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_documents_asset_hash ON documents(asset_id, content_hash);
+CREATE INDEX IF NOT EXISTS idx_assets_user_updated_at ON assets(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_updated_at ON expenses(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_reminders_asset_updated_at ON reminders(asset_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_reminders_pending_asset_date ON reminders(asset_id, date) WHERE notified = FALSE;
+CREATE INDEX IF NOT EXISTS idx_automations_asset_updated_at ON automations(asset_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_documents_asset_updated_at ON documents(asset_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted_at ON tombstones(user_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_assets_details_comune ON assets(lower(details_json ->> 'comune'));
+CREATE INDEX IF NOT EXISTS idx_assets_details_categoria ON assets(upper(details_json ->> 'categoria_catastale'));
+CREATE INDEX IF NOT EXISTS idx_assets_details_targa ON assets(upper(details_json ->> 'targa'));
+CREATE INDEX IF NOT EXISTS idx_assets_details_gin ON assets USING GIN (details_json jsonb_path_ops);
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -105,6 +153,12 @@ CREATE TRIGGER update_expenses_updated_at BEFORE UPDATE ON expenses
 CREATE TRIGGER update_automations_updated_at BEFORE UPDATE ON automations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_reminders_updated_at BEFORE UPDATE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_documents_updated_at BEFORE UPDATE ON documents
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Enable Row Level Security (RLS) for Supabase
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE assets ENABLE ROW LEVEL SECURITY;
@@ -112,6 +166,7 @@ ALTER TABLE expenses ENABLE ROW LEVEL SECURITY;
 ALTER TABLE reminders ENABLE ROW LEVEL SECURITY;
 ALTER TABLE automations ENABLE ROW LEVEL SECURITY;
 ALTER TABLE documents ENABLE ROW LEVEL SECURITY;
+ALTER TABLE tombstones ENABLE ROW LEVEL SECURITY;
 
 -- Create policies for users
 CREATE POLICY "Users can view own profile" ON users
@@ -198,6 +253,10 @@ CREATE POLICY "Users can create own documents" ON documents
         )
     ));
 
+-- Create policies for tombstones
+CREATE POLICY "Users can view own tombstones" ON tombstones
+    FOR SELECT USING (user_id IN (SELECT id FROM users WHERE supabase_id = auth.uid()::text));
+
 -- Insert sample data (optional, for testing)
 -- Uncomment to add test data
 
@@ -243,6 +302,7 @@ COMMENT ON TABLE expenses IS 'Expense tracking for assets';
 COMMENT ON TABLE reminders IS 'Automated reminders for payments and deadlines';
 COMMENT ON TABLE automations IS 'Automation settings per asset';
 COMMENT ON TABLE documents IS 'Uploaded documents and OCR data';
+COMMENT ON TABLE tombstones IS 'Deleted rows reported by delta sync';
 
 -- Grant permissions for authenticated users
 GRANT USAGE ON SCHEMA public TO authenticated;